@@ -13,6 +13,9 @@ import pandas as pd
 
 import shimoku_api_python as shimoku
 
+from client_metrics import client_metrics
+from profiling import profile_stage, profiler
+
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 logging.basicConfig(
@@ -21,6 +24,7 @@ logging.basicConfig(
 )
 
 
+@profile_stage()
 def set_overview_page(
     s: shimoku.Client, workspaces: List[Dict], menu_paths: List[Dict], components: List[Dict], dashboard_id: str
 ):
@@ -72,6 +76,7 @@ def set_overview_page(
     s.plt.indicator(data=data_overview_indicator, order=3)
 
 
+@profile_stage()
 def set_workspace_detail(s: shimoku.Client, workspaces: List[Dict]):
     s.plt.change_path('Workspaces Detail')
     for workspace_ in workspaces:
@@ -84,6 +89,7 @@ def set_workspace_detail(s: shimoku.Client, workspaces: List[Dict]):
     s.plt.table(data=workspace_df, order=0)
 
 
+@profile_stage()
 def set_menu_paths_detail(s: shimoku.Client, menu_paths: List[Dict]):
     s.plt.change_path('Menu Paths Detail')
 
@@ -95,6 +101,7 @@ def set_menu_paths_detail(s: shimoku.Client, menu_paths: List[Dict]):
     s.plt.table(data=menu_paths_df, order=0)
 
 
+@profile_stage()
 def set_component_detail(s: shimoku.Client, components: List[Dict]):
     if not components:
         return
@@ -187,10 +194,15 @@ def main():
         verbosity='INFO',
         async_execution=True,
     )
+    # Latency and bytes of every client call, written to CLIENT_METRICS_FILE when it is set
+    s = client_metrics.instrument(s)
+    client_metrics.export(getenv('CLIENT_METRICS_FILE'), getenv('CLIENT_METRICS_INTERVAL'))
     s.reuse_data_sets()
     start_time = dt.datetime.now()
 
-    workspaces, menu_paths, components = get_data(s)
+    with profiler.stage('load') as stage:
+        workspaces, menu_paths, components = get_data(s)
+        stage.rows = len(workspaces) + len(menu_paths) + len(components)
     logger.info('Data retrieved')
 
     s.set_workspace(workspace_id)
@@ -216,7 +228,12 @@ def main():
     end_time = dt.datetime.now()
     logger.info(f'Execution time: {end_time - start_time}')
 
-    s.run()
+    with profiler.stage('run'):
+        s.run()
+
+    # Time, CPU and memory of each stage, and the trace of the run when TRACE_DIR is set
+    profiler.report(getenv('TRACE_DIR'))
+    client_metrics.report()
 
 
 if __name__ == '__main__':
@@ -3,6 +3,7 @@ from dotenv import load_dotenv
 from typing import List, Dict, Tuple
 import pandas as pd
 from utils import get_data
+from downsampling import DEFAULT_MAX_POINTS, downsample
 from copy import deepcopy
 import shimoku_api_python as shimoku
 
@@ -49,7 +50,8 @@ def page_header(s: shimoku.Client, data: Dict):
 
 def amplitude_chart(
     s: shimoku.Client, df: pd.DataFrame, x: str, y: List[str],
-    cols_size: int, rows_size: int, order: int, legend: bool = False, padding: str = '0,0,0,0'
+    cols_size: int, rows_size: int, order: int, legend: bool = False, padding: str = '0,0,0,0',
+    max_points: int = DEFAULT_MAX_POINTS
 ):
     v_cols = []
     for y_value in y:
@@ -57,7 +59,8 @@ def amplitude_chart(
         df[f'-{y_value}'] = -df[y_value]
         v_cols.extend([y_value, f'-{y_value}'])
 
-    df = df[[x, *v_cols]]
+    # Keep every peak of the envelopes within a fixed number of points
+    df = downsample(df[[x, *v_cols]], x=x, y=y, max_points=max_points, method='min_max')
     chart_options = {
         'legend': {
             'show': legend,
@@ -0,0 +1,89 @@
+import numpy as np
+
+# Bins follow np.array_split: the first total % n_bins bins have one element more than the rest
+
+
+def bin_sizes(total: int, n_bins: int) -> np.ndarray:
+    """ Number of elements of each bin """
+    size, extra = divmod(total, n_bins)
+    return np.where(np.arange(n_bins) < extra, size + 1, size)
+
+
+def bin_starts(total: int, n_bins: int) -> np.ndarray:
+    """ Index of the first element of each bin """
+    return np.concatenate([[0], np.cumsum(bin_sizes(total, n_bins))[:-1]]).astype(np.int64)
+
+
+def bin_index(positions: np.ndarray, total: int, n_bins: int) -> np.ndarray:
+    """ Bin of each position, without building the bins """
+    size, extra = divmod(total, n_bins)
+    boundary = extra * (size + 1)
+    return np.where(positions < boundary, positions // (size + 1),
+                    extra + (positions - boundary) // max(size, 1))
+
+
+def add_to_bins(sums: np.ndarray, values: np.ndarray, bins: np.ndarray):
+    """ Adds the values up into sums[..., bin] along the last axis, bins have to be sorted """
+    if len(bins):
+        uniques, starts = np.unique(bins, return_index=True)
+        sums[..., uniques] += np.add.reduceat(values, starts, axis=-1)
+
+
+def bin_reduce(values: np.ndarray, n_bins: int, how: str = 'mean') -> np.ndarray:
+    """
+    Reduces the last axis of a 1-D or 2-D array to n_bins bins in one call.
+
+    When the length is a multiple of n_bins the array is reshaped to (..., n_bins, size)
+    and reduced, otherwise the bins are reduced with ufunc.reduceat. Empty bins, when
+    there are less elements than bins, are NaN.
+
+    Args:
+        values (np.ndarray): Array to reduce, binned along its last axis.
+        n_bins (int): Number of bins.
+        how (str): 'mean', 'max', 'min', 'sum' or 'rms'.
+
+    Returns:
+        np.ndarray: Array with n_bins elements in its last axis.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    total = values.shape[-1]
+    if how == 'rms':
+        return np.sqrt(bin_reduce(values ** 2, n_bins, 'mean'))
+
+    if total % n_bins == 0 and total:
+        binned = values.reshape(*values.shape[:-1], n_bins, total // n_bins)
+        return getattr(binned, how)(axis=-1)
+
+    ufunc = {'mean': np.add, 'sum': np.add, 'max': np.maximum, 'min': np.minimum}[how]
+    sizes = bin_sizes(total, n_bins)
+    result = np.full(values.shape[:-1] + (n_bins,), np.nan)
+    filled = sizes > 0
+    if filled.any():
+        result[..., filled] = ufunc.reduceat(values, bin_starts(total, n_bins)[filled], axis=-1)
+    if how == 'mean':
+        result[..., filled] /= sizes[filled]
+    elif how == 'sum':
+        result[..., ~filled] = 0
+    return result
+
+
+def time_labels(duration_s: float, n_bins: int, fraction_scale: int = 1000) -> np.ndarray:
+    """
+    'minutes:seconds.fraction' label of the start of each of n_bins bins of a duration,
+    the fraction of second is multiplied by fraction_scale and truncated.
+    """
+    t = duration_s / n_bins * np.arange(n_bins)
+    minutes = (t // 60).astype(np.int64).astype(str)
+    seconds = (t % 60).astype(np.int64).astype(str)
+    fractions = ((t % 1) * fraction_scale).astype(np.int64).astype(str)
+    return np.char.add(np.char.add(np.char.add(np.char.add(minutes, ':'), seconds), '.'), fractions)
+
+
+def range_labels(values: np.ndarray, n_bins: int) -> np.ndarray:
+    """ 'first - last' label of the truncated first and last values of each non empty bin """
+    sizes = bin_sizes(len(values), n_bins)
+    starts = bin_starts(len(values), n_bins)[sizes > 0]
+    ends = starts + sizes[sizes > 0] - 1
+    first = np.asarray(values)[starts].astype(np.int64).astype(str)
+    last = np.asarray(values)[ends].astype(np.int64).astype(str)
+    return np.char.add(np.char.add(first, ' - '), last)
@@ -0,0 +1,66 @@
+import hashlib
+import os
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+
+def file_hash(path: str, block_size: int = 1 << 20) -> str:
+    """ sha256 of the content of a file, read in blocks """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()[:32]
+
+
+class FeatureStore:
+    """
+    On-disk cache of the features of the songs.
+
+    The features of a song are stored in one .npz file named after the hash of the
+    audio file and n_samples, so a renamed song is still found and a song whose file
+    changes is computed again. Every DataFrame column is saved as a plain array,
+    strings included, so loading never needs pickle.
+
+    Attributes:
+        directory (str): Directory of the .npz files.
+    """
+
+    def __init__(self, directory: str = 'features'):
+        self.directory = directory
+
+    def path(self, song_hash: str, n_samples: int) -> str:
+        return os.path.join(self.directory, f'{song_hash}_{n_samples}.npz')
+
+    def load(self, song_hash: str, n_samples: int) -> Optional[Dict[str, pd.DataFrame]]:
+        """ Features of a song, None if they are not stored """
+        try:
+            with np.load(self.path(song_hash, n_samples), allow_pickle=False) as arrays:
+                features = {}
+                for key in arrays.files:
+                    feature, column = key.split('/', 1)
+                    features.setdefault(feature, {})[column] = arrays[key]
+        except (OSError, ValueError):
+            return None
+        return {feature: pd.DataFrame(columns) for feature, columns in features.items()}
+
+    def save(self, song_hash: str, n_samples: int, features: Dict[str, pd.DataFrame]) -> str:
+        """
+        Stores the features of a song. The file is written with a temporary name and
+        renamed, so an interrupted run never leaves a truncated file behind.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(song_hash, n_samples)
+        arrays = {
+            f'{feature}/{column}': df[column].to_numpy(
+                dtype=None if pd.api.types.is_numeric_dtype(df[column]) else str
+            )
+            for feature, df in features.items()
+            for column in df.columns
+        }
+        with open(path + '.tmp', 'wb') as file:
+            np.savez(file, **arrays)
+        os.replace(path + '.tmp', path)
+        return path
@@ -1,86 +1,153 @@
-from os import listdir
-from typing import List, Dict, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from os import cpu_count, listdir, makedirs
+from typing import List, Dict, Optional, Tuple
 import librosa
 import numpy as np
 import pandas as pd
 from pytube import YouTube
 
+from binning import add_to_bins, bin_index, bin_reduce, bin_sizes, range_labels, time_labels
+from feature_store import FeatureStore, file_hash
 
-def retrieve_songs_data(yt_codes) -> List[Tuple[str, Tuple[np.ndarray, float], str]]:
-    """ Retrieves the songs data from youtube and saves them in the songs folder """
-    names = []
+
+def download_songs(yt_codes) -> List[Tuple[str, str, str]]:
+    """ Downloads the songs from youtube that are not in the songs folder yet, returns their name, path and url """
+    makedirs('songs', exist_ok=True)
+    songs = []
     yt_urls = [f'https://www.youtube.com/embed/{yt_code}' for yt_code in yt_codes]
     for url in yt_urls:
         yt = YouTube(url)
 
         video = yt.streams.filter(only_audio=True).first()
-        names += [video.title]
         if video.title+'.mp4' not in listdir('songs'):
             video.download(output_path='songs')
             print(f'File {video.title+".mp4"} downloaded successfully')
+        songs.append((video.title, f'songs/{video.title}.mp4', url))
 
-    songs_data = []
+    return songs
 
-    for name in names:
-        songs_data.append(librosa.load(f'songs/{name}.mp4'))  # needs ffmpeg to be installed
 
-    return list(zip(names, songs_data, yt_urls))
+FRAME_LENGTH = 2048  # Samples of each STFT frame, as librosa's default n_fft
+HOP_LENGTH = 512  # Samples between the start of consecutive frames
+BLOCK_FRAMES = 256  # Frames transformed at once, bounds the memory used
+PITCHES = ['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'Bb', 'B']
 
 
-def calculate_amplitude_df(song_data: Tuple[np.ndarray, float], n_samples: int) -> pd.DataFrame:
-    """  Calculates the amplitude of a song in n_samples parts """
-    song, sr = song_data
-    abs_song = np.abs(song)
-    grouped_song = np.array_split(abs_song, n_samples)
-    resized_song = np.array([np.mean(group) for group in grouped_song])
-    song_length_s = librosa.get_duration(y=song, sr=sr)
-    times = [f'{int(t // 60)}:{int(t % 60)}.{int((t % 1) * 1000)}'
-             for t in [song_length_s / n_samples * i for i in range(n_samples)]]
+def calculate_song_features(
+    song_data: Tuple[np.ndarray, float], n_samples: int, frame_length: int = FRAME_LENGTH,
+    hop_length: int = HOP_LENGTH, block_frames: int = BLOCK_FRAMES
+) -> Dict[str, pd.DataFrame]:
+    """
+    Calculates the amplitude, FFT and chroma of a song in n_samples parts, in a single pass.
 
-    return pd.DataFrame({'time': times, 'amplitude': resized_song})
+    The song is walked in blocks of block_frames centered STFT frames, each frame is
+    transformed with rfft, and the amplitude envelope, the magnitude spectrum and the
+    chroma are accumulated into their n_samples bins. Only one block of frames is in
+    memory at a time, whatever the length of the song.
 
+    The spectrum is the mean magnitude spectrum of the frames, so its resolution is
+    sr / frame_length Hz, and the chroma matches librosa.feature.chroma_stft with tuning=0.
+    The spectrum only has frame_length // 2 positive frequencies, so it is binned into
+    min(n_samples, frame_length // 2) bins and every bin holds at least one frequency.
 
-def calculate_fft_df(song_data: Tuple[np.ndarray, float], n_samples: int) -> pd.DataFrame:
-    """  Calculates the FFT of a song in n_samples parts """
+    Returns:
+        dict: 'amplitude' and 'chroma' DataFrames with n_samples bins, and the 'fft'
+            DataFrame with min(n_samples, frame_length // 2) bins.
+    """
     song, sr = song_data
-    # Perform FFT on the data
-    fft_values = np.fft.fft(song)
+    n = len(song)
+    n_frames = 1 + n // hop_length
+    half = frame_length // 2
+    window = librosa.filters.get_window('hann', frame_length, fftbins=True)
+    chroma_filter = librosa.filters.chroma(sr=sr, n_fft=frame_length, tuning=0.0)
 
-    # Calculate the frequencies corresponding to the FFT values
-    freq = np.fft.fftfreq(len(fft_values), 1 / sr)
+    amplitude_sums = np.zeros(n_samples)
+    spectrum_sums = np.zeros(frame_length // 2 + 1)
+    chroma_sums = np.zeros((len(PITCHES), n_samples))
+    for first in range(0, n_frames, block_frames):
+        last = min(first + block_frames, n_frames)
 
-    # Keep only the positive frequencies
-    positive_freq = freq[:len(freq) // 2]
+        # Amplitude envelope of the samples from this frame to the next block, the last block takes the tail
+        start, stop = first * hop_length, n if last == n_frames else last * hop_length
+        add_to_bins(amplitude_sums, np.abs(song[start:stop]), bin_index(np.arange(start, stop), n, n_samples))
 
-    # Keep only the corresponding FFT values for the positive frequencies
-    positive_fft_values = 2.0 / len(song) * np.abs(fft_values[:len(fft_values) // 2])
+        # Frames are centered on their first sample, the song is zero padded at its edges
+        segment_start = first * hop_length - half
+        segment_stop = (last - 1) * hop_length - half + frame_length
+        segment = np.pad(song[max(segment_start, 0):min(segment_stop, n)],
+                         (max(-segment_start, 0), max(segment_stop - n, 0)))
+        frames = np.lib.stride_tricks.sliding_window_view(segment, frame_length)[::hop_length]
+        magnitudes = np.abs(np.fft.rfft(frames * window, axis=1))
+        spectrum_sums += magnitudes.sum(axis=0)
 
-    # Select a specific number of values for the plot
-    freq_ranges = [f'{int(freq_range[0])} - {int(freq_range[-1])}'
-                   for freq_range in np.array_split(positive_freq, n_samples)]
-    mean_fft_values = np.array([np.mean(group) for group in np.array_split(positive_fft_values, n_samples)])
-    return pd.DataFrame({'amplitude': mean_fft_values, 'frequency': freq_ranges})
+        # Chroma of each frame normalized by its loudest pitch, as chroma_stft does
+        chroma = chroma_filter @ (magnitudes ** 2).T
+        loudest = chroma.max(axis=0)
+        chroma /= np.where(loudest > np.finfo(chroma.dtype).tiny, loudest, 1)
+        add_to_bins(chroma_sums, chroma, bin_index(np.arange(first, last), n_frames, n_samples))
 
+    song_length_s = n / sr
+    with np.errstate(invalid='ignore', divide='ignore'):
+        resized_song = amplitude_sums / bin_sizes(n, n_samples)
+        mean_chroma = chroma_sums / bin_sizes(n_frames, n_samples)
 
-def calculate_chroma_df(song_data: Tuple[np.ndarray, float], n_samples: int) -> pd.DataFrame:
-    """  Calculates the chroma of a song in n_samples parts"""
-    song, sr = song_data
-    song_length_s = librosa.get_duration(y=song, sr=sr)
-    times = [f'{int(t // 60)}:{int(t % 60)}.{int((t % 1) * n_samples)}'
-             for t in [song_length_s / n_samples * i for i in range(n_samples)]]
-    chroma = librosa.feature.chroma_stft(y=song, sr=sr)
-    chroma_data = pd.DataFrame(columns=['time', 'pitch', 'amplitude'])
-    pitches = ['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'Bb', 'B']
-    for pitch, row in zip(pitches, chroma):
-        grouped_row = np.array_split(row, n_samples)
-        aux_df = pd.DataFrame([{'time': t, 'pitch': pitch, 'amplitude': round(float(np.mean(group)), 2)}
-                               for t, group in zip(times, grouped_row)])
-        chroma_data = pd.concat([chroma_data, aux_df], ignore_index=True)
+    # Keep only the positive frequencies, scaled to the amplitude of the sinusoids
+    n_freqs = frame_length // 2
+    positive_freq = np.fft.rfftfreq(frame_length, 1 / sr)[:n_freqs]
+    positive_fft_values = 2.0 / window.sum() * spectrum_sums[:n_freqs] / n_frames
+    fft_bins = min(n_samples, n_freqs)
+    freq_ranges = range_labels(positive_freq, fft_bins)
+    mean_fft_values = bin_reduce(positive_fft_values, fft_bins)
+
+    amplitude_times = time_labels(song_length_s, n_samples)
+    chroma_times = time_labels(song_length_s, n_samples, fraction_scale=n_samples)
+
+    return {
+        'amplitude': pd.DataFrame({'time': amplitude_times, 'amplitude': resized_song}),
+        'fft': pd.DataFrame({'amplitude': mean_fft_values, 'frequency': freq_ranges}),
+        'chroma': pd.DataFrame({
+            'time': np.tile(chroma_times, len(PITCHES)),
+            'pitch': np.repeat(PITCHES, n_samples),
+            'amplitude': np.round(mean_chroma, 2).ravel(),
+        }),
+    }
+
+
+def load_song_features(path: str, n_samples: int) -> Dict[str, pd.DataFrame]:
+    """ Decodes a song and calculates its features, it runs in the worker processes """
+    return calculate_song_features(librosa.load(path), n_samples)  # needs ffmpeg to be installed
+
+
+def get_songs_features(
+    paths: List[str], n_samples: int, store: Optional[FeatureStore] = None, processes: int = 1
+) -> List[Dict[str, pd.DataFrame]]:
+    """
+    Features of each song file, in order.
+
+    The features are read from the feature store when a file with the same content was
+    already processed with the same n_samples. The rest of the songs are decoded and
+    processed in a pool of processes, one song per process, and then stored.
+    """
+    store = store if store is not None else FeatureStore()
+    hashes = [file_hash(path) for path in paths]
+    features = [store.load(song_hash, n_samples) for song_hash in hashes]
+
+    missing = [i for i, song_features in enumerate(features) if song_features is None]
+    if processes <= 1 or len(missing) <= 1:
+        computed = [load_song_features(paths[i], n_samples) for i in missing]
+    else:
+        with ProcessPoolExecutor(min(processes, len(missing))) as executor:
+            computed = list(executor.map(load_song_features, [paths[i] for i in missing], repeat(n_samples)))
+
+    for i, song_features in zip(missing, computed):
+        store.save(hashes[i], n_samples, song_features)
+        features[i] = song_features
 
-    return chroma_data
+    return features
 
 
-def get_data(n_samples: int) -> Dict:
+def get_data(n_samples: int, processes: int = cpu_count() or 1, features_dir: str = 'features') -> Dict:
 
     result = {}
     #-------------- BUTTON DEFINITIONS --------------#
@@ -194,23 +261,18 @@ def get_data(n_samples: int) -> Dict:
     }
     #-------------- FOR EACH SONG --------------#
     yt_codes = ['ZwvkDlLOkr0', 'Z2BVPNDWPmI', 'lQtvpAp8xN0']
-    song_tuples = retrieve_songs_data(yt_codes)
-    result['song_tuples'] = [(name, url) for name, _, url in song_tuples]
-    for name, song_data, url in song_tuples:
-        result[name] = {
-            'amplitude': calculate_amplitude_df(song_data, n_samples),
-            'fft': calculate_fft_df(song_data, n_samples),
-            'chroma': calculate_chroma_df(song_data, n_samples)
-        }
+    songs = download_songs(yt_codes)
+    result['song_tuples'] = [(name, url) for name, _, url in songs]
+    songs_features = get_songs_features([path for _, path, _ in songs], n_samples,
+                                        FeatureStore(features_dir), processes)
+    for (name, _, _), song_features in zip(songs, songs_features):
+        result[name] = song_features
         # This is a premium feature, by default use the local files
         # s.activity.execute_activity('Separate Instruments', params: {'song_data': song})
         # Make sure to have the necessary files in the separated songs folder
         # for track in ['bass', 'other', 'drums']:
         #     track_loaded = librosa.load(f'separated_songs/{name}/{track}.mp3')
-        #     result[name][track] = {
-        #         'amplitude': calculate_amplitude_df(track_loaded, n_samples),
-        #         'chroma': calculate_chroma_df(track_loaded, n_samples)
-        #     }
+        #     result[name][track] = calculate_song_features(track_loaded, n_samples)
 
     return result
 
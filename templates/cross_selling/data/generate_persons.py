@@ -0,0 +1,123 @@
+import numpy as np
+import pandas as pd
+from typing import Optional
+
+try:
+    from synthetic import Chunk, parse_generator_args, write_dataset
+except ImportError:  # Imported as data.generate_persons from the template root
+    from data.synthetic import Chunk, parse_generator_args, write_dataset
+
+# Initial Configuration
+output_file = "persons.csv"
+total_data = 20000  # Total number of persons to generate
+first_person_id = 10000
+commercials = [f"Comercial_{i}" for i in range(1, 13)]
+campaign_results = ["Positivo", "Negativo", "Sin respuesta"]
+marital_status = ["Soltero", "Casado", "Divorciado", "Viudo"]
+housing = ["Propia", "Alquiler"]
+missing_rate = 0.03  # Fraction of missing values of the optional attributes
+
+# Intercept of the logit of holding each product, with the weights of product_logits
+# it sets how common each product is (20-35% of the persons) and how many persons
+# who do not hold it score above 75%
+product_intercepts = {"Vida": -3.6, "Salud": -3.2, "Viaje": -2.8, "Hogar": -3.8}
+
+
+def with_missing(rng: np.random.Generator, values: np.ndarray, rate: float = missing_rate) -> pd.Series:
+    """
+    Replace a random fraction of the values with NaN.
+    """
+    values = pd.Series(values)
+    return values.mask(rng.random(len(values)) < rate)
+
+
+def product_logits(persons: pd.DataFrame) -> dict:
+    """
+    Logit of holding each product given the attributes of the persons, missing
+    attributes contribute as an average person.
+
+    The numeric attributes are centered and scaled to about unit variance, so the
+    weights compare, and the logits spread over about 2 to 3 standard units. The
+    propensity is then driven by the features: the fitted models separate the
+    persons and give a realistic share of High, Medium and Low scores.
+    """
+    age = (persons["Edad"].fillna(51.5).to_numpy() - 51.5) / 19.6
+    income = np.log(persons["Ingresos"].fillna(30000).to_numpy() / 30000) / 0.5
+    children = (persons["NumHijos"].to_numpy() - 2) / 1.41
+    trips = (persons["ViajesAnuales"].to_numpy() - 2) / 1.41
+    positive = (persons["ResultHistoricoCampañas"] == "Positivo").to_numpy()
+    married = (persons["EstadoCivil"] == "Casado").to_numpy()
+    owner = (persons["Vivienda"] == "Propia").to_numpy()
+    recent = persons["UltimoContacto"].to_numpy() < 90
+
+    return {
+        "Vida": 1.6 * age + 1.2 * children + 1.8 * married + 2.0 * positive + 0.6 * income,
+        "Salud": 1.4 * age + 1.8 * income + 1.6 * positive + 1.2 * recent,
+        "Viaje": -1.0 * age + 2.0 * trips + 1.6 * income + 0.8 * positive,
+        "Hogar": 3.0 * owner + 1.4 * married + 1.2 * income + 1.0 * recent,
+    }
+
+
+def make_chunk(chunk: Chunk) -> pd.DataFrame:
+    """
+    Generate the attributes and held products of one chunk of persons.
+
+    Args:
+        chunk (Chunk): Rows to generate and their random generator.
+
+    Returns:
+        pd.DataFrame: One row per person, with a 0/1 'Product_<name>' column per product.
+    """
+    rng = chunk.rng
+    size = chunk.size
+    persons = pd.DataFrame(
+        {
+            "sPerson": chunk.ids() + first_person_id,
+            "Edad": with_missing(rng, rng.integers(18, 86, size=size).astype(np.float64), 0.005),
+            "Sexo": with_missing(rng, rng.choice(["Hombre", "Mujer"], size=size)),
+            "Ingresos": with_missing(rng, np.round(rng.lognormal(np.log(30000), 0.5, size=size), 2)),
+            "ComercialAsignado": with_missing(rng, rng.choice(commercials, size=size)),
+            "YearsSinceCampaign": rng.integers(0, 11, size=size),
+            "UltimoContacto": rng.integers(0, 731, size=size),
+            "ResultHistoricoCampañas": rng.choice(campaign_results, size=size, p=[0.2, 0.5, 0.3]),
+            "EstadoCivil": rng.choice(marital_status, size=size, p=[0.35, 0.45, 0.12, 0.08]),
+            "NumHijos": rng.integers(0, 5, size=size),
+            "Vivienda": rng.choice(housing, size=size, p=[0.6, 0.4]),
+            "ViajesAnuales": rng.poisson(2, size=size),
+        }
+    )
+
+    for product, logit in product_logits(persons).items():
+        probability = 1 / (1 + np.exp(-(product_intercepts[product] + logit)))
+        persons[f"Product_{product}"] = (rng.random(size) < probability).astype(np.float64)
+
+    return persons
+
+
+def generate_data(
+    total_rows: int = total_data,
+    output_file: str = output_file,
+    chunk_rows: int = 1_000_000,
+    processes: int = 1,
+    seed: Optional[int] = None,
+) -> pd.DataFrame:
+    """
+    Generate the persons used to train the propensity models and save them to a CSV
+    or Parquet file, chunk by chunk.
+
+    Args:
+        total_rows (int): Number of persons to generate.
+        output_file (str): Output path, '.csv' or '.parquet'.
+        chunk_rows (int): Rows generated at once.
+        processes (int): Number of worker processes.
+        seed (int): Seed for a reproducible dataset.
+
+    Returns:
+        pd.DataFrame: The first rows of the generated data.
+    """
+    return write_dataset(make_chunk, total_rows, output_file, chunk_rows, processes, seed)
+
+
+if __name__ == "__main__":
+    args = parse_generator_args(total_data, output_file, "Generate the cross selling persons")
+    generate_data(args.rows, args.output, args.chunk_rows, args.processes, args.seed)
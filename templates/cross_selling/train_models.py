@@ -0,0 +1,27 @@
+import argparse
+
+from transformations.propensity_models import train_propensity_models
+from utils.utils import data_folder
+
+
+def main():
+    """
+    Train the propensity model of every product and write the prediction files
+    read by the dashboard.
+    """
+    parser = argparse.ArgumentParser(description="Train the cross selling propensity models")
+    parser.add_argument("persons_path", help="CSV file with the persons and their held products")
+    parser.add_argument("--output-folder", default=data_folder, help="Folder of the output files")
+    parser.add_argument("--processes", type=int, default=1, help="Number of products fitted at once")
+    parser.add_argument("--chunk-rows", type=int, default=100_000, help="Persons read at once")
+    parser.add_argument("--top", type=int, default=5, help="Drivers and barriers kept per person")
+    args = parser.parse_args()
+
+    products = train_propensity_models(
+        args.persons_path, args.output_folder, args.processes, args.chunk_rows, args.top
+    )
+    print(f"Propensity models trained for {', '.join(products)}")
+
+
+if __name__ == "__main__":
+    main()
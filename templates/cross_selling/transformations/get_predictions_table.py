@@ -5,7 +5,14 @@ from pathlib import Path
 import pandas as pd
 import numpy as np
 
-from utils.utils import read_csv, to_csv, search_string, factors_to_string
+from utils.utils import (
+    read_csv,
+    to_csv,
+    search_string,
+    is_factor_column,
+    factor_lists_to_columns,
+    factors_to_strings,
+)
 
 
 import pandas as pd
@@ -119,28 +126,23 @@ def get_positive_neg_factors():
     assert enriched_dir.is_dir()
 
     for file in enriched_dir.iterdir():
-        with file.open() as f:
-            # Get the file name
-            file_name = os.path.basename(file)
-            # Extract product from file name
-
-            product_name = enriched_regex.match(file_name).group(1)
-
-            # Load the dataframe
-            df_product_factors = pd.read_csv(
-                f,
-                # Only keep needed columns
-                usecols=[
-                    "sPerson",
-                    "list_driver_names",
-                    "list_driver_values",
-                    "list_barrier_names",
-                    "list_barrier_values",
-                    "_base_values",
-                ],
-            )
-            df_product_factors["product_name"] = product_name
-            df_to_concat.append(df_product_factors)
+        # Get the file name
+        file_name = os.path.basename(file)
+        # Extract product from file name
+
+        product_name = enriched_regex.match(file_name).group(1)
+
+        # Only keep needed columns, the factors are either parallel columns
+        # or, in files written by older pipelines, stringified lists
+        header = pd.read_csv(file, nrows=0).columns
+        df_product_factors = pd.read_csv(
+            file,
+            usecols=["sPerson", "_base_values"]
+            + [col for col in header if is_factor_column(col)],
+        )
+        df_product_factors = factor_lists_to_columns(df_product_factors)
+        df_product_factors["product_name"] = product_name
+        df_to_concat.append(df_product_factors)
 
     # Append to main dataframe
     df_factors = pd.concat(df_to_concat)
@@ -154,12 +156,13 @@ def add_actual_values_to_factors(df_factors: pd.DataFrame):
     (not the importance)
     """
     # Only one csv is needed because all of the rest have the same columns and vals
+    # The factors of each product are already in df_factors, only the person
+    # columns and the base value are taken
     df_factors_sample = read_csv(
-        "df_enriched_db_{ProductName}_10/df_enriched_db_Product_Vida_1.0"
+        "df_enriched_db_{ProductName}_10/df_enriched_db_Product_Vida_1.0",
+        usecols=lambda col: not is_factor_column(col),
     )
 
-    df_factors_sample = df_factors_sample.iloc[:, 0:48]
-
     # Merge with df_factors
     df_factors_with_vals = df_factors.merge(
         left_on="sPerson",
@@ -214,12 +217,7 @@ def drop_original_factors(df_premodel_factors):
     # Drop original factors Since the drivers are transformed,
     # to be displayed in the dashboard.
     df_premodel_factors.drop(
-        columns=[
-            "list_driver_names_y",
-            "list_driver_values_y",
-            "list_barrier_names_y",
-            "list_barrier_values_y",
-        ],
+        columns=[col for col in df_premodel_factors.columns if is_factor_column(col)],
         inplace=True,
     )
 
@@ -267,19 +265,13 @@ def get_predicted_opportunities():
     )
 
     # Process and format positive impact factors
-    df_premodel_factors["positive_impact_factors"] = df_premodel_factors.apply(
-        factors_to_string,
-        axis=1,
-        names_col="list_driver_names_y",
-        values_col="list_driver_values_y",
+    df_premodel_factors["positive_impact_factors"] = factors_to_strings(
+        df_premodel_factors, "driver"
     )
 
     # Process and format negative impact factors
-    df_premodel_factors["negative_impact_factors"] = df_premodel_factors.apply(
-        factors_to_string,
-        axis=1,
-        names_col="list_barrier_names_y",
-        values_col="list_barrier_values_y",
+    df_premodel_factors["negative_impact_factors"] = factors_to_strings(
+        df_premodel_factors, "barrier"
     )
 
     # Drop original factor columns
@@ -0,0 +1,390 @@
+import os
+import re
+import tempfile
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import numpy as np
+import pandas as pd
+from scipy.special import expit
+from sklearn.linear_model import LogisticRegression
+
+from utils.utils import data_folder, factor_columns, search_string
+
+# Hyperparameters of the propensity model of every product
+HYPERPARAMETERS = {"C": 1.0, "max_iter": 1000}
+
+ENRICHED_DIR = "df_enriched_db_{ProductName}_10"
+ID_COLUMN = "sPerson"
+REGEX_PRODUCT = r"^Product_(.*)"
+
+
+class FeatureSpace:
+    """
+    Columns of the persons file turned into a dense feature matrix.
+
+    Numeric columns are standardized with missing values replaced by the mean, and
+    categorical columns are one-hot encoded with missing values replaced by the mode.
+    The statistics are accumulated chunk by chunk, so the persons file is never loaded
+    at once.
+
+    The features of each column are contiguous, group_starts_ holds the first feature
+    of each column so per feature values are added up per column with np.add.reduceat.
+
+    Attributes:
+        columns (list): Columns used as features.
+        numeric_columns_ (list): Numeric columns found in the first chunk.
+        categorical_columns_ (list): The rest of the columns.
+        means_ (np.ndarray): Mean of each numeric column.
+        stds_ (np.ndarray): Standard deviation of each numeric column, 1 when constant.
+        categories_ (dict): Sorted categories of each categorical column.
+        modes_ (dict): Most common category of each categorical column.
+        feature_names_ (list): Name of each column of the feature matrix.
+        group_starts_ (np.ndarray): Index of the first feature of each column.
+        rows_ (int): Number of rows seen in fit.
+    """
+
+    def __init__(self, columns: list):
+        self.columns = list(columns)
+
+    def fit(self, chunks) -> "FeatureSpace":
+        """
+        Accumulate the statistics of the features over an iterable of DataFrames.
+        """
+        counts = sums = squares = None
+        frequencies = {}
+        self.rows_ = 0
+        for chunk in chunks:
+            if counts is None:
+                self.numeric_columns_ = [
+                    c for c in self.columns
+                    if pd.api.types.is_numeric_dtype(chunk[c]) and not pd.api.types.is_bool_dtype(chunk[c])
+                ]
+                self.categorical_columns_ = [c for c in self.columns if c not in self.numeric_columns_]
+                counts = np.zeros(len(self.numeric_columns_))
+                sums = np.zeros(len(self.numeric_columns_))
+                squares = np.zeros(len(self.numeric_columns_))
+                frequencies = {col: Counter() for col in self.categorical_columns_}
+
+            numeric = self._numeric(chunk)
+            counts += np.sum(~np.isnan(numeric), axis=0)
+            sums += np.nansum(numeric, axis=0)
+            squares += np.nansum(numeric**2, axis=0)
+            for col in self.categorical_columns_:
+                frequencies[col].update(chunk[col].dropna().astype(str).value_counts().to_dict())
+            self.rows_ += len(chunk)
+
+        if counts is None:
+            raise ValueError("No rows to fit the features on")
+
+        counts = np.maximum(counts, 1)
+        self.means_ = sums / counts
+        variances = np.maximum(squares / counts - self.means_**2, 0)
+        self.stds_ = np.where(variances > 0, np.sqrt(variances), 1.0)
+        self.categories_ = {col: pd.Index(sorted(frequencies[col])) for col in self.categorical_columns_}
+        self.modes_ = {
+            col: frequencies[col].most_common(1)[0][0] if frequencies[col] else ""
+            for col in self.categorical_columns_
+        }
+
+        self.feature_names_ = list(self.numeric_columns_)
+        sizes = [1] * len(self.numeric_columns_)
+        for col in self.categorical_columns_:
+            self.feature_names_ += [f"{col}={value}" for value in self.categories_[col]]
+            sizes.append(len(self.categories_[col]))
+        self.group_starts_ = np.concatenate([[0], np.cumsum(sizes)[:-1]]).astype(np.int64)
+
+        return self
+
+    @property
+    def group_columns(self) -> list:
+        """
+        Column of each feature group, in the order of group_starts_.
+        """
+        return self.numeric_columns_ + self.categorical_columns_
+
+    def _numeric(self, df: pd.DataFrame) -> np.ndarray:
+        return np.column_stack(
+            [pd.to_numeric(df[col], errors="coerce").to_numpy(dtype=np.float64) for col in self.numeric_columns_]
+        ) if self.numeric_columns_ else np.empty((len(df), 0))
+
+    def transform(self, df: pd.DataFrame) -> np.ndarray:
+        """
+        Build the float32 feature matrix of the persons.
+
+        Args:
+            df (pd.DataFrame): Persons with at least the columns seen in fit.
+
+        Returns:
+            np.ndarray: Matrix of shape (len(df), len(feature_names_)).
+        """
+        n = len(df)
+        matrix = np.zeros((n, len(self.feature_names_)), dtype=np.float32)
+
+        numeric = self._numeric(df)
+        numeric = np.where(np.isnan(numeric), self.means_, numeric)
+        matrix[:, : len(self.numeric_columns_)] = (numeric - self.means_) / self.stds_
+
+        rows = np.arange(n)
+        offset = len(self.numeric_columns_)
+        for col in self.categorical_columns_:
+            values = df[col].astype(object).where(df[col].notna(), self.modes_[col]).astype(str)
+            codes = self.categories_[col].get_indexer(values)
+            known = codes >= 0
+            matrix[rows[known], offset + codes[known]] = 1
+            offset += len(self.categories_[col])
+
+        return matrix
+
+
+def build_feature_matrix(
+    persons_path: str, feature_space: FeatureSpace, products: list, work_dir: str, chunk_rows: int
+):
+    """
+    Write the feature matrix and the held products of the persons to .npy files, chunk
+    by chunk, so they can be memory mapped by every training process.
+
+    Returns:
+        tuple: Paths of the features and targets files, and the person ids.
+    """
+    n = feature_space.rows_
+    features_path = os.path.join(work_dir, "features.npy")
+    targets_path = os.path.join(work_dir, "targets.npy")
+    features = np.lib.format.open_memmap(
+        features_path, mode="w+", dtype=np.float32, shape=(n, len(feature_space.feature_names_))
+    )
+    targets = np.lib.format.open_memmap(targets_path, mode="w+", dtype=np.int8, shape=(n, len(products)))
+    person_ids = np.empty(n, dtype=np.int64)
+
+    start = 0
+    for chunk in pd.read_csv(persons_path, chunksize=chunk_rows):
+        end = start + len(chunk)
+        features[start:end] = feature_space.transform(chunk)
+        targets[start:end] = chunk[products].fillna(0).to_numpy() > 0
+        person_ids[start:end] = chunk[ID_COLUMN].to_numpy()
+        start = end
+
+    features.flush()
+    targets.flush()
+    del features, targets
+    return features_path, targets_path, person_ids
+
+
+def explain_block(
+    X: np.ndarray, coefficients: np.ndarray, intercept: float, means: np.ndarray,
+    group_starts: np.ndarray, top: int,
+):
+    """
+    Probability and top drivers/barriers of a block of persons for a logistic model.
+
+    The contribution of a feature is coefficient * (value - mean) in log-odds, added up
+    per column. They are moved to the probability scale with the slope of the secant
+    between the base and the person logits, so the contributions of a person add up to
+    probability - base probability, like SHAP values.
+
+    Returns:
+        tuple: Probabilities, then the indices (-1 when there are less than top) and
+            values of the drivers, sorted from the largest, and of the barriers, sorted
+            from the most negative.
+    """
+    base_logit = intercept + means @ coefficients
+    logits = X @ coefficients + intercept
+    probabilities = expit(logits)
+
+    contributions = np.add.reduceat((X - means) * coefficients, group_starts, axis=1)
+    delta = logits - base_logit
+    base = expit(base_logit)
+    safe_delta = np.where(np.abs(delta) > 1e-9, delta, 1.0)
+    slopes = np.where(np.abs(delta) > 1e-9, (probabilities - base) / safe_delta, base * (1 - base))
+    contributions *= slopes[:, None]
+
+    top = min(top, contributions.shape[1])
+    order = np.argsort(contributions, axis=1)
+    barrier_idx = order[:, :top]
+    driver_idx = order[:, ::-1][:, :top]
+    driver_values = np.take_along_axis(contributions, driver_idx, axis=1)
+    barrier_values = np.take_along_axis(contributions, barrier_idx, axis=1)
+
+    driver_idx = np.where(driver_values > 0, driver_idx, -1)
+    barrier_idx = np.where(barrier_values < 0, barrier_idx, -1)
+    return probabilities, driver_idx, driver_values, barrier_idx, barrier_values
+
+
+def fit_product(
+    product_index: int, features_path: str, targets_path: str, group_starts: np.ndarray,
+    top: int = 5, block_rows: int = 100_000,
+) -> dict:
+    """
+    Fit the propensity model of one product and explain its predictions.
+
+    The feature matrix is memory mapped, the processes fitting the other products share
+    its pages instead of each holding a copy.
+
+    Returns:
+        dict: 'probabilities' of holding the product, '_base_values' (probability of an
+            average person), and the indices and values of the drivers and barriers.
+    """
+    X = np.load(features_path, mmap_mode="r")
+    y = np.asarray(np.load(targets_path, mmap_mode="r")[:, product_index])
+    n, n_groups = len(X), len(group_starts)
+
+    if y.min() == y.max():
+        # Nobody or everybody has the product, there is nothing to learn
+        return {
+            "probabilities": np.full(n, float(y[0]) if n else 0.0),
+            "_base_values": float(y[0]) if n else 0.0,
+            "driver_idx": np.full((n, min(top, n_groups)), -1, dtype=np.int16),
+            "driver_values": np.zeros((n, min(top, n_groups)), dtype=np.float32),
+            "barrier_idx": np.full((n, min(top, n_groups)), -1, dtype=np.int16),
+            "barrier_values": np.zeros((n, min(top, n_groups)), dtype=np.float32),
+        }
+
+    model = LogisticRegression(**HYPERPARAMETERS).fit(X, y)
+    coefficients = model.coef_[0]
+    intercept = float(model.intercept_[0])
+    means = np.asarray(X.mean(axis=0, dtype=np.float64))
+
+    blocks = [
+        explain_block(np.asarray(X[start : start + block_rows], dtype=np.float64),
+                      coefficients, intercept, means, group_starts, top)
+        for start in range(0, n, block_rows)
+    ]
+    probabilities, driver_idx, driver_values, barrier_idx, barrier_values = (
+        np.concatenate(parts) for parts in zip(*blocks)
+    )
+    return {
+        "probabilities": probabilities,
+        "_base_values": float(expit(intercept + means @ coefficients)),
+        "driver_idx": driver_idx.astype(np.int16),
+        "driver_values": driver_values.astype(np.float32),
+        "barrier_idx": barrier_idx.astype(np.int16),
+        "barrier_values": barrier_values.astype(np.float32),
+    }
+
+
+def factor_frame(kind: str, indices: np.ndarray, values: np.ndarray, columns: list) -> pd.DataFrame:
+    """
+    Parallel name and value columns of the top factors of a kind, built with one
+    gather over the whole (rows x top) index array. Missing factors are NaN.
+    """
+    name_columns, value_columns = factor_columns(kind, indices.shape[1])
+    # Index -1 picks the trailing None
+    names = np.append(np.asarray(columns, dtype=object), None)[indices]
+    values = np.where(indices >= 0, values, np.nan)
+    return pd.concat(
+        [
+            pd.DataFrame(names, columns=name_columns),
+            pd.DataFrame(values, columns=value_columns),
+        ],
+        axis=1,
+    )
+
+
+def train_propensity_models(
+    persons_path: str,
+    output_folder: str = data_folder,
+    processes: int = 1,
+    chunk_rows: int = 100_000,
+    top: int = 5,
+    work_dir: str = None,
+) -> list:
+    """
+    Train one propensity model per product and write the files read by the dashboard.
+
+    Every 'Product_<name>' column of the persons file is a product the person already
+    holds, the rest of the columns but sPerson are features. The features are built once
+    into a memory mapped matrix and the products are fitted in parallel, one process per
+    product.
+
+    Writes:
+        - df_premodel_predicted.csv: held products, predictions and
+          'probability_Product_<name>_1.0' of every person.
+        - df_enriched_db_{ProductName}_10/df_enriched_db_Product_<name>_1.0.csv: the
+          drivers and barriers of every person as parallel 'driver_name_<i>',
+          'driver_value_<i>', ... columns, the base value, and the features.
+
+    Args:
+        persons_path (str): CSV file with the persons and their held products.
+        output_folder (str): Folder where the files are written.
+        processes (int): Number of products fitted at once.
+        chunk_rows (int): Persons read and written at once.
+        top (int): Number of drivers and barriers kept per person.
+        work_dir (str): Folder for the temporary feature matrix, the system one if None.
+
+    Returns:
+        list: Names of the products.
+    """
+    header = pd.read_csv(persons_path, nrows=0).columns
+    products = search_string(REGEX_PRODUCT, header)
+    product_names = [re.match(REGEX_PRODUCT, product).group(1) for product in products]
+    features = [col for col in header if col != ID_COLUMN and col not in products]
+
+    feature_space = FeatureSpace(features).fit(
+        pd.read_csv(persons_path, usecols=features, chunksize=chunk_rows)
+    )
+    group_columns = feature_space.group_columns
+
+    with tempfile.TemporaryDirectory(dir=work_dir) as tmp_dir:
+        features_path, targets_path, person_ids = build_feature_matrix(
+            persons_path, feature_space, products, tmp_dir, chunk_rows
+        )
+        fit = partial(
+            fit_product,
+            features_path=features_path,
+            targets_path=targets_path,
+            group_starts=feature_space.group_starts_,
+            top=top,
+        )
+        if processes <= 1:
+            results = list(map(fit, range(len(products))))
+        else:
+            with ProcessPoolExecutor(min(processes, len(products))) as executor:
+                results = list(executor.map(fit, range(len(products))))
+        targets = np.load(targets_path)
+
+    # Held products, predictions and probabilities of every product
+    df_premodel_predicted = pd.DataFrame({ID_COLUMN: person_ids})
+    for i, (product, result) in enumerate(zip(products, results)):
+        df_premodel_predicted[product] = targets[:, i].astype(np.float64)
+        df_premodel_predicted[f"predicted_{product}"] = (result["probabilities"] >= 0.5).astype(np.float64)
+        df_premodel_predicted[f"probability_{product}_0.0"] = 1 - result["probabilities"]
+        df_premodel_predicted[f"probability_{product}_1.0"] = result["probabilities"]
+    os.makedirs(output_folder, exist_ok=True)
+    df_premodel_predicted.to_csv(os.path.join(output_folder, "df_premodel_predicted.csv"), index=False)
+
+    enriched_dir = os.path.join(output_folder, ENRICHED_DIR)
+    os.makedirs(enriched_dir, exist_ok=True)
+    start = 0
+    for chunk in pd.read_csv(persons_path, usecols=[ID_COLUMN] + features, chunksize=chunk_rows):
+        end = start + len(chunk)
+        for name, result in zip(product_names, results):
+            df_enriched = pd.concat(
+                [
+                    pd.DataFrame({ID_COLUMN: chunk[ID_COLUMN].to_numpy()}),
+                    factor_frame(
+                        "driver",
+                        result["driver_idx"][start:end],
+                        result["driver_values"][start:end],
+                        group_columns,
+                    ),
+                    factor_frame(
+                        "barrier",
+                        result["barrier_idx"][start:end],
+                        result["barrier_values"][start:end],
+                        group_columns,
+                    ),
+                ],
+                axis=1,
+            )
+            df_enriched["_base_values"] = result["_base_values"]
+            df_enriched = pd.concat([df_enriched, chunk[features].reset_index(drop=True)], axis=1)
+            df_enriched.to_csv(
+                os.path.join(enriched_dir, f"df_enriched_db_Product_{name}_1.0.csv"),
+                mode="w" if start == 0 else "a",
+                header=start == 0,
+                index=False,
+            )
+        start = end
+
+    return product_names
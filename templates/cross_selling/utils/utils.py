@@ -1,3 +1,4 @@
+import ast
 import re
 import json
 import pandas as pd
@@ -125,110 +126,160 @@ def map_factor_name(factor_name: str) -> str:
     return factor_name
 
 
-def factors_to_string(row: pd.Series, names_col: str, values_col: str) -> str:
+# Factors are stored as parallel columns: 'driver_name_1', 'driver_value_1', ...,
+# 'barrier_name_1', 'barrier_value_1', ..., sorted from the strongest factor
+FACTOR_KINDS = ("driver", "barrier")
+FACTOR_COLUMNS_REGEX = r"^(driver|barrier)_(name|value)_\d+$"
+LEGACY_FACTOR_COLUMNS_REGEX = r"^list_(driver|barrier)_(names|values)$"
+
+
+def factor_columns(kind: str, top: int) -> tuple:
     """
-    Converts encoded factor names and values to a readable string format.
+    Names of the parallel columns of the top factors of a kind.
 
     Parameters:
-        row (pd.Series): The row of the DataFrame containing the factors.
-        names_col (str): The column name containing factor names.
-        values_col (str): The column name containing factor values.
+        kind (str): 'driver' or 'barrier'.
+        top (int): Number of factors.
 
     Returns:
-        str: A string representation of the top factors and their values.
+        tuple: The list of name columns and the list of value columns.
     """
-    factor_list = eval(row[names_col])[:3]
-    factor_value_list = eval(row[values_col])[:3]
+    names = [f"{kind}_name_{i}" for i in range(1, top + 1)]
+    values = [f"{kind}_value_{i}" for i in range(1, top + 1)]
+    return names, values
 
-    filtered_meta_list = []
-    for idx, val in enumerate(factor_value_list):
-        round_val = round(val * 100)
-        if 1 <= round_val or round_val <= -1:
-            filtered_meta_list.append({"idx": idx, "val": round_val})
 
-    filtered_factor_values = [f"{meta['val']}%" for meta in filtered_meta_list]
-    filtered_factor_list = [factor_list[meta["idx"]] for meta in filtered_meta_list]
+def is_factor_column(column: str) -> bool:
+    """
+    Whether a column holds factors, in the parallel or the legacy list layout.
+    """
+    return bool(
+        re.match(FACTOR_COLUMNS_REGEX, column)
+        or re.match(LEGACY_FACTOR_COLUMNS_REGEX, column)
+    )
 
-    def grab_factor_val(row: pd.Series, factor_list: list) -> list:
-        """
-        Retrieves the actual values of factors, not their importance.
 
-        Parameters:
-            row (pd.Series): The row of the DataFrame containing the factors.
-            factor_list (list): A list of factor names.
+def factor_lists_to_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Converts the legacy 'list_driver_names', 'list_driver_values', ... columns, holding
+    stringified Python lists, to the parallel factor columns.
 
-        Returns:
-            list: A list of formatted factor values.
-        """
-        factors_per_val = []
-        for factor in factor_list:
-            val = row[factor]
-            formatted_val = (
-                f"({val})"
-                if not (isinstance(val, type(np.nan)) and np.isnan(val))
-                else "()"
-            )
-            factors_per_val.append(formatted_val)
+    The lists are parsed once, when the file is loaded, so the rest of the
+    transformations work on typed columns.
+
+    Parameters:
+        df (pd.DataFrame): DataFrame with the legacy columns, if any.
 
-        return factors_per_val
+    Returns:
+        pd.DataFrame: The DataFrame with parallel factor columns instead.
+    """
+    for kind in FACTOR_KINDS:
+        names_col, values_col = f"list_{kind}_names", f"list_{kind}_values"
+        if names_col not in df.columns:
+            continue
+
+        names = df[names_col].map(ast.literal_eval).tolist()
+        values = df[values_col].map(ast.literal_eval).tolist()
+        top = max(map(len, names), default=0)
+        name_columns, value_columns = factor_columns(kind, top)
+
+        df = df.drop(columns=[names_col, values_col])
+        df = pd.concat(
+            [
+                df,
+                pd.DataFrame(names, columns=name_columns, index=df.index),
+                pd.DataFrame(values, columns=value_columns, index=df.index, dtype=np.float64),
+            ],
+            axis=1,
+        )
 
-    filtered_factor_per_val = grab_factor_val(row, filtered_factor_list)
+    return df
 
-    filtered_factor_list = list(map(map_factor_name, filtered_factor_list))
 
-    assert len(filtered_factor_list) == len(filtered_factor_values)
+def lookup_factor_values(df: pd.DataFrame, names: pd.Series) -> pd.Series:
+    """
+    Retrieves the actual value of the factor named in each row, not its importance.
 
-    pre_joined = [
-        f"{factor} {filtered_factor_values[idx]} {filtered_factor_per_val[idx]}"
-        for idx, factor in enumerate(filtered_factor_list)
-    ]
+    Parameters:
+        df (pd.DataFrame): DataFrame with a column per factor.
+        names (pd.Series): The factor name of each row, NaN for no factor.
 
-    return ", ".join(pre_joined)
+    Returns:
+        pd.Series: The values, formatted as strings, '' when missing.
+    """
+    result = pd.Series("", index=df.index, dtype=object)
+    for name in names.dropna().unique():
+        mask = (names == name).to_numpy()
+        values = df.loc[mask, name]
+        result[mask] = values.map(str).where(values.notna(), "")
+    return result
 
 
-def factors_to_dict(
-    row: pd.Series, names_col: str, values_col: str, acronym: str
-) -> dict:
+def factors_to_strings(df: pd.DataFrame, kind: str, top: int = 3) -> pd.Series:
     """
-    Converts encoded factor names and values to a dictionary format.
+    Converts the factors of every row to a readable string format, e.g.
+    'Edad 5% (65.0), EstadoCivil 4% (Casado)'.
+
+    Factors whose importance rounds to less than 1% are skipped. Each of the top
+    factors is handled as a whole column, so the cost is linear in rows x top.
 
     Parameters:
-        row (pd.Series): The row of the DataFrame containing the factors.
-        names_col (str): The column name containing factor names.
-        values_col (str): The column name containing factor values.
-        acronym (str): The acronym to use as a prefix in the dictionary keys.
+        df (pd.DataFrame): DataFrame with the factor columns and a column per factor.
+        kind (str): 'driver' or 'barrier'.
+        top (int): Maximum number of factors per row.
 
     Returns:
-        dict: A dictionary representation of the factors and their values.
+        pd.Series: A string representation of the top factors and their values.
     """
-    factor_list = eval(row[names_col])[:3]
+    result = pd.Series("", index=df.index, dtype=object)
+    for names_col, values_col in zip(*factor_columns(kind, top)):
+        if names_col not in df.columns:
+            break
 
-    factor_weight_list = eval(row[values_col])[:3]
+        names = df[names_col]
+        round_vals = np.round(df[values_col].to_numpy(dtype=np.float64) * 100)
+        keep = names.notna().to_numpy() & (np.abs(np.nan_to_num(round_vals)) >= 1)
 
-    filtered_meta_list = []
+        factor_strings = (
+            names.where(keep).map(map_factor_name, na_action="ignore")
+            + " "
+            + pd.Series(np.where(keep, round_vals, 0).astype(np.int64), index=df.index).map(str)
+            + "% ("
+            + lookup_factor_values(df, names.where(keep))
+            + ")"
+        ).fillna("")
 
-    # Only extract those
-    for idx, val in enumerate(factor_weight_list):
-        round_val = round(val * 100)
-        if round_val >= 1 or round_val <= -1:
-            filtered_meta_list.append({"idx": idx, "val": round_val})
+        separator = np.where((result != "") & (factor_strings != ""), ", ", "")
+        result = result + separator + factor_strings
 
-    filtered_factor_weights = [meta["val"] for meta in filtered_meta_list]
+    return result
 
-    filtered_factor_list = [factor_list[meta["idx"]] for meta in filtered_meta_list]
 
-    # Grab actual values
-    filtered_factor_values = []
-    for factor in filtered_factor_list:
-        filtered_factor_values.append(row[factor])
+def factors_to_dict(row: pd.Series, kind: str, acronym: str, top: int = 3) -> dict:
+    """
+    Converts the factors of a row to a dictionary format.
 
-    assert len(filtered_factor_list) == len(filtered_factor_weights)
-    assert len(filtered_factor_values) == len(filtered_factor_list)
+    Parameters:
+        row (pd.Series): The row of the DataFrame containing the factors.
+        kind (str): 'driver' or 'barrier'.
+        acronym (str): The acronym to use as a prefix in the dictionary keys.
+        top (int): Maximum number of factors.
 
+    Returns:
+        dict: A dictionary representation of the factors and their values.
+    """
     factor_dict = {}
-    for i in range(len(filtered_factor_weights)):
-        factor_dict[f"{acronym}_{i}_name"] = filtered_factor_list[i]
-        factor_dict[f"{acronym}_{i}_weight_pct"] = filtered_factor_weights[i]
-        factor_dict[f"{acronym}_{i}_value"] = filtered_factor_values[i]
+    i = 0
+    for names_col, values_col in zip(*factor_columns(kind, top)):
+        if names_col not in row.index or pd.isna(row[names_col]):
+            continue
+
+        # Only extract those with at least 1% of importance
+        round_val = round(row[values_col] * 100)
+        if round_val >= 1 or round_val <= -1:
+            factor_dict[f"{acronym}_{i}_name"] = row[names_col]
+            factor_dict[f"{acronym}_{i}_weight_pct"] = round_val
+            factor_dict[f"{acronym}_{i}_value"] = row[row[names_col]]
+            i += 1
 
     return factor_dict
@@ -1,6 +1,10 @@
+from typing import Optional
 from shimoku_api_python import Client
 from utils.utils import get_data
+from utils.metrics import Metric, Derived, compute_metrics
+from utils.profiling import profile_stage, profiler
 import pandas as pd
+import calendar
 
 class Board:
     """
@@ -12,26 +16,31 @@ class Board:
         shimoku (Client): An instance of a Client class for Shimoku API interactions.
     """
 
-    def __init__(self, shimoku: Client):
+    def __init__(self, shimoku: Client, sketch_error: Optional[float] = None):
         """
         The constructor for the Dashboard class.
 
         Parameters:
             shimoku (Client): An instance of a Client class for Shimoku API interactions.
+            sketch_error (float, optional): Relative error of the approximate distinct
+                customers and orders counts, None to count them exactly.
         """
 
         file_names = ["data/customer_orders_performance.csv"]
         # Name of the dashboard
         self.board_name = "Financial"
         # Get data from CSV files
-        self.dfs = get_data(file_names)
+        self.dfs = profiler.call("load", get_data, file_names)
         # Shimoku client instance
         self.shimoku = shimoku
         # Setting up the board in Shimoku
         self.shimoku.set_board(name=self.board_name)
         # Make the board public
         self.shimoku.boards.update_board(name=self.board_name, is_public=True)
+        # Relative error of the distinct counts sketches, None for exact counts
+        self.sketch_error = sketch_error
 
+    @profile_stage("transform")
     def transform(self) -> bool:
         """
         Perform data transformations.
@@ -40,82 +49,96 @@ class Board:
         required before plotting the data on the dashboard.
         """
 
-        df_customer_orders = self.dfs["customer_orders_performance"]
+        df_customer_orders = self.dfs["customer_orders_performance"].assign(
+            order_profit=lambda df: df["order_spend"] - df["order_cost"]
+        )
+        order_month = df_customer_orders["order_date"].dt.month
+
+        # Main KPIs, evaluated together in a single pass
+        kpi_values = compute_metrics(
+            df_customer_orders,
+            [
+                Metric("Customers", "nunique", column="customer_id"),
+                Metric("Orders", "nunique", column="order_id"),
+                Metric("Revenue", "sum", column="order_spend"),
+                Metric("Expenses", "sum", column="order_cost"),
+                Metric("Net Profit", "sum", column="order_profit"),
+                Derived("Profit Margin", lambda m: m["Net Profit"] * 100 / m["Revenue"]),
+            ],
+            sketch_error=self.sketch_error,
+        )
 
-        # Main KPIs
         main_kpis = [
             # Total Customers
             {
                 "title": "Customers",
-                "value": len(df_customer_orders["customer_id"].unique()),
+                "value": kpi_values["Customers"],
                 "color": "default",
                 "align": "center",
             },
             # Total orders
             {
                 "title": "Orders",
-                "value": len(df_customer_orders["order_id"].unique()),
+                "value": kpi_values["Orders"],
                 "color": "default",
                 "align": "center",
             },
             # Total order revenue
             {
                 "title": "Revenue",
-                "value": f'{sum(df_customer_orders["order_spend"]):,.0f}€',
+                "value": f'{kpi_values["Revenue"]:,.0f}€',
                 "color": "success",
                 "align": "center",
             },
             # Total order expenses
             {
                 "title": "Expenses",
-                "value": f'{sum(df_customer_orders["order_cost"]):,.0f}€',
+                "value": f'{kpi_values["Expenses"]:,.0f}€',
                 "color": "error",
                 "align": "center",
             },
             # Net profit from the order
             {
                 "title": "Net Profit",
-                "value": f'{sum(df_customer_orders["order_spend"] - df_customer_orders["order_cost"]):,.0f}€',
+                "value": f'{kpi_values["Net Profit"]:,.0f}€',
                 "color": "success",
                 "align": "center",
             },
             # The percentage of net profit in relation to revenue
             {
                 "title": "Profit Margin",
-                "value": f'{sum(df_customer_orders["order_spend"] - df_customer_orders["order_cost"]) * 100 / sum(df_customer_orders["order_spend"]):.1f}%',
+                "value": f'{kpi_values["Profit Margin"]:.1f}%',
                 "color": "success",
                 "align": "center",
             },
         ]
 
+        # Monthly metrics, evaluated together in a single grouped pass
+        monthly_values = compute_metrics(
+            df_customer_orders,
+            [
+                Metric("Customer", "nunique", column="customer_id"),
+                Metric("Orders", "nunique", column="order_id"),
+                Metric("Expenses", "sum", column="order_cost"),
+                Metric("Revenues", "sum", column="order_spend"),
+                Metric("Net Profit", "sum", column="order_profit"),
+                Derived("Profit Margin", lambda m: m["Net Profit"] * 100 / m["Revenues"]),
+            ],
+            by=order_month,
+            groups=range(1, 13),
+            sketch_error=self.sketch_error,
+        )
+        monthly_values.insert(
+            0, "Month", [calendar.month_name[month][:3] for month in monthly_values.index]
+        )
+
         # Customers and orders
-        import calendar
-        customers_orders = [
-            {
-                "Month": calendar.month_name[month][:3],
-                "Customer": len(
-                    df_customer_orders["customer_id"][df_customer_orders["order_date"].dt.month == month].unique()
-                ),
-                "Orders": len(
-                    df_customer_orders["order_id"][df_customer_orders["order_date"].dt.month == month].unique()
-                ),
-            }
-        for month in range(1,13)]
+        customers_orders = monthly_values[["Month", "Customer", "Orders"]].to_dict(orient="records")
 
         # Profit Margin
-        profit_margin = [
-            {
-                "Month": calendar.month_name[month][:3],
-                "Expenses": sum(df_customer_orders["order_cost"][df_customer_orders["order_date"].dt.month == month]),
-                "Revenues": sum(df_customer_orders["order_spend"][df_customer_orders["order_date"].dt.month == month]),
-                "Profit Margin": sum(
-                        df_customer_orders["order_spend"][df_customer_orders["order_date"].dt.month == month] -
-                        df_customer_orders["order_cost"][df_customer_orders["order_date"].dt.month == month]
-                    )
-                    * 100 / sum(df_customer_orders["order_spend"][df_customer_orders["order_date"].dt.month == month]
-                ),
-            }
-        for month in range(1,13)]
+        profit_margin = monthly_values[["Month", "Expenses", "Revenues", "Profit Margin"]].to_dict(
+            orient="records"
+        )
 
         # Top 10 customers by number of orders
         orders_by_customers = df_customer_orders.groupby("customer_id").agg({"order_id":"count"})
@@ -144,18 +167,24 @@ class Board:
 
         # Customer Profitability
         top3_customer_by_orders = sorted_orders_by_customers.iloc[:5]
-        customer_profitability = [
-            {
-                "Month": calendar.month_name[month][:3],
-            } |
-            {
-                f"Customer {customer}": sum(
-                    df_customer_orders[
-                        (df_customer_orders["order_date"].dt.month == month) & (df_customer_orders["customer_id"] == customer)
-                    ].apply(lambda row: row["order_spend"] - row["order_cost"], axis=1)
+        customer_profitability = compute_metrics(
+            df_customer_orders,
+            [
+                Metric(
+                    f"Customer {customer}",
+                    "sum",
+                    column="order_profit",
+                    where=[("customer_id", "==", customer)],
                 )
-            for customer in top3_customer_by_orders.index}
-        for month in range(1,13)]
+                for customer in top3_customer_by_orders.index
+            ],
+            by=order_month,
+            groups=range(1, 13),
+        )
+        customer_profitability.insert(
+            0, "Month", [calendar.month_name[month][:3] for month in customer_profitability.index]
+        )
+        customer_profitability = customer_profitability.to_dict(orient="records")
 
         self.df_app = {
             "main_kpis": pd.DataFrame(main_kpis),
@@ -168,6 +197,7 @@ class Board:
 
         return True
 
+    @profile_stage("plot")
     def plot(self):
         """
         A method to plot customer orders performance.
@@ -193,4 +223,5 @@ class Board:
         from paths.customer_orders_performance import CustomerOrdersPerformance
 
         CO = CustomerOrdersPerformance(self)
+        profiler.instrument(CO)
         CO.plot()
@@ -1,9 +1,15 @@
 # DATA
 
-import pandas as pd
-import random
-from datetime import datetime, timedelta
 import numpy as np
+import pandas as pd
+from datetime import datetime
+from functools import partial
+from typing import Optional
+
+try:
+    from synthetic import Chunk, SortedDates, parse_generator_args, uniform_rounded, write_dataset
+except ImportError:  # Imported as data.generate_customer_orders_performance from the template root
+    from data.synthetic import Chunk, SortedDates, parse_generator_args, uniform_rounded, write_dataset
 
 total_data = 1000
 output_file = "customer_orders_performance.csv"
@@ -13,54 +19,49 @@ total_customers = 150
 cost_range = (15.00, 55.00)
 benefit_factor_range = (1.3, 1.5)
 
-def generate_data():
-
-    def random_date(start_date, end_date):
-        return start_date + timedelta(
-            days=random.randint(0, (end_date - start_date).days)
-        )
-
-    n = total_data
 
-    # order_date
-    order_date_list = [random_date(date_ini, date_end) for _ in range(n)]
-    order_date_list = sorted(order_date_list)
-
-    # order_id
-    order_id_list = [i for i in range(1, n+1)]
-
-    # customer_id
-    customer_id = [i for i in range(1, total_customers)]
-    customer_id_list = np.random.choice(customer_id, size=n)
+def make_chunk(chunk: Chunk, dates: SortedDates) -> pd.DataFrame:
+    rng = chunk.rng
+    n = chunk.size
 
     # order_cost
-    order_cost_list = np.round(np.random.uniform(cost_range[0], cost_range[1], size=n), 2)
+    order_cost_list = uniform_rounded(rng, cost_range, n)
 
     # order_spend
-    benefit_factors = np.round(np.random.uniform(benefit_factor_range[0], benefit_factor_range[1], size=n), 2)
+    benefit_factors = uniform_rounded(rng, benefit_factor_range, n)
     order_spend_list = np.round(order_cost_list * benefit_factors, 2)
 
-    # Create the DataFrame
-    data = {
-        "order_date": order_date_list,
-        "order_id": order_id_list,
-        "customer_id": customer_id_list,
-        "order_cost": order_cost_list,
-        "order_spend": order_spend_list,
-    }
-
-    df = pd.DataFrame(data)
+    return pd.DataFrame(
+        {
+            "order_date": dates.take(chunk.start, n),
+            "order_id": chunk.ids(),
+            "customer_id": rng.integers(1, total_customers, size=n),
+            "order_cost": order_cost_list,
+            "order_spend": order_spend_list,
+        }
+    )
+
+
+def generate_data(
+    total_rows: int = total_data,
+    output_file: str = output_file,
+    chunk_rows: int = 1_000_000,
+    processes: int = 1,
+    seed: Optional[int] = None,
+):
+    dates = SortedDates(date_ini, date_end, total_rows, np.random.default_rng(seed))
+    df = write_dataset(
+        partial(make_chunk, dates=dates), total_rows, output_file, chunk_rows, processes, seed
+    )
 
     # Display the DataFrame
-    print("\n### Output CSV: " + output_file + " (" + str(len(df)) + " registers)\n")
-    print(df.head(10))
+    print("\n### Output CSV: " + output_file + " (" + str(total_rows) + " registers)\n")
+    print(df)
     print("\n")
 
-    # Save the dataframe to CSV
-    df.to_csv(output_file, index=False)
-
     return df
 
 
 if __name__ == "__main__":
-    generate_data()
+    args = parse_generator_args(total_data, output_file)
+    generate_data(args.rows, args.output, args.chunk_rows, args.processes, args.seed)
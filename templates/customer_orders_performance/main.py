@@ -3,6 +3,8 @@ from shimoku_api_python import Client
 from dotenv import load_dotenv
 
 from board import Board
+from utils.client_metrics import client_metrics
+from utils.profiling import profiler
 
 
 def main():
@@ -22,16 +24,26 @@ def main():
         async_execution=True,
         verbosity="INFO",
     )
+    # Latency and bytes of every client call, written to CLIENT_METRICS_FILE when it is set
+    shimoku = client_metrics.instrument(shimoku)
+    client_metrics.export(getenv("CLIENT_METRICS_FILE"), getenv("CLIENT_METRICS_INTERVAL"))
     shimoku.set_workspace(getenv("WORKSPACE_ID"))
 
     # Instantiate and set up the dashboard
-    board = Board(shimoku)
+    # Optional relative error to estimate distinct counts with sketches
+    sketch_error = getenv("SKETCH_ERROR")
+    board = Board(shimoku, sketch_error=float(sketch_error) if sketch_error else None)
     # Perform data transformations
     board.transform()
     # Plot the dashboard
     board.plot()
 
-    shimoku.run()
+    with profiler.stage("run"):
+        shimoku.run()
+
+    # Time, CPU and memory of each stage, and the trace of the run when TRACE_DIR is set
+    profiler.report(getenv("TRACE_DIR"))
+    client_metrics.report()
 
 
 if __name__ == "__main__":
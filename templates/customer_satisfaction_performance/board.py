@@ -1,5 +1,7 @@
+from typing import Optional
 from shimoku_api_python import Client
 from utils.utils import get_data, process_sales_data
+from utils.profiling import profile_stage, profiler
 
 
 class Board:
@@ -8,22 +10,26 @@ class Board:
 
     """
 
-    def __init__(self, shimoku: Client):
+    def __init__(self, shimoku: Client, sketch_error: Optional[float] = None):
         """
         Constructor for the Dashboard class.
 
         Parameters:
             shimoku (Client): An instance of a Client class for Shimoku API interactions.
+            sketch_error (float, optional): Relative error of the approximate distinct
+                customers and orders counts, None to count them exactly.
         """
 
         file_names = ["data/customer_satisfaction_performance.csv"]
         self.board_name = "Financial"  # Name of the dashboard
-        self.df = get_data(file_names)
+        self.df = profiler.call("load", get_data, file_names)
         self.shimoku = shimoku  # Shimoku client instance
         self.shimoku.set_board(name=self.board_name)  # Setting up the board in Shimoku
         self.shimoku.boards.update_board(name=self.board_name, is_public=True)
         self.results = None  # Placeholder for storing processed data
+        self.sketch_error = sketch_error
 
+    @profile_stage("transform")
     def transform(self):
         """
         Perform data transformations.
@@ -35,13 +41,14 @@ class Board:
         df = self.df["customer_satisfaction_performance"]
 
         # Process sales data
-        results_dict = process_sales_data(df)
+        results_dict = process_sales_data(df, sketch_error=self.sketch_error)
 
         # Store processed data in results attribute
         self.results = results_dict
 
         return True
 
+    @profile_stage("plot")
     def plot(self):
         """
         Plot the dashboard.
@@ -58,4 +65,5 @@ class Board:
         )
 
         sales_order_performance = CustomerSatisfactionPerformance(self)
+        profiler.instrument(sales_order_performance)
         sales_order_performance.plot()
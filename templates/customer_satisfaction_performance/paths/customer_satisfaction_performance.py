@@ -2,6 +2,7 @@ import shimoku_api_python
 from board import Board
 from utils.components import create_title_name_head
 from utils.utils import get_status, get_column_name_by_value
+from utils.downsampling import downsample
 import pandas as pd
 
 
@@ -187,6 +188,9 @@ class CustomerSatisfactionPerformance(Board):
             list(orders_satisfaction.items()), columns=["date", "Rate"]
         )
 
+        # Keep the shape of the daily rate within a fixed number of points
+        orders_satisfaction = downsample(orders_satisfaction, x="date", y="Rate")
+
         # Plot a segmented line chart to visualize orders satisfaction
         self.shimoku.plt.segmented_line(
             data=orders_satisfaction,
@@ -0,0 +1,166 @@
+from datetime import date
+from typing import List, Union
+
+import numpy as np
+import pandas as pd
+
+# Maximum number of points of a series sent to a chart
+DEFAULT_MAX_POINTS = 500
+
+
+def numeric_axis(values) -> np.ndarray:
+    """
+    Numeric version of an x axis: numbers as they are, datetimes and dates as
+    nanoseconds, and anything else, e.g. category labels, as its position.
+
+    Args:
+        values: The x values, sorted.
+
+    Returns:
+        np.ndarray: float64 x values.
+    """
+    series = pd.Series(values)
+    if pd.api.types.is_bool_dtype(series) or series.empty:
+        return np.arange(len(series), dtype=np.float64)
+    if pd.api.types.is_numeric_dtype(series):
+        return series.to_numpy(dtype=np.float64)
+    if pd.api.types.is_datetime64_any_dtype(series) or isinstance(series.iloc[0], date):
+        return pd.to_datetime(series).to_numpy().astype("datetime64[ns]").astype(np.float64)
+    return np.arange(len(series), dtype=np.float64)
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Indices of the points kept by Largest-Triangle-Three-Buckets.
+
+    The first and last points are always kept. The points in between are split in
+    n_out - 2 buckets and, from each bucket, the point forming the largest triangle
+    with the point kept in the previous bucket and the average of the next bucket is
+    kept. The shape of the line is preserved with far fewer points.
+
+    Args:
+        x (np.ndarray): Sorted x values.
+        y (np.ndarray): y values, NaN count as 0 for the selection.
+        n_out (int): Number of points to keep.
+
+    Returns:
+        np.ndarray: Sorted indices of the kept points.
+    """
+    n = len(y)
+    if n_out >= n:
+        return np.arange(n)
+    if n_out < 3:
+        return np.array([0, n - 1][:n_out])
+
+    y = np.nan_to_num(np.asarray(y, dtype=np.float64))
+    x = np.asarray(x, dtype=np.float64)
+
+    # Bucket i holds the points [edges[i], edges[i + 1]), none is empty as n_out < n
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    counts = np.diff(edges)
+    average_x = np.add.reduceat(x[: n - 1], edges[:-1]) / counts
+    average_y = np.add.reduceat(y[: n - 1], edges[:-1]) / counts
+    # The last bucket looks ahead to the last point
+    next_x = np.append(average_x[1:], x[-1])
+    next_y = np.append(average_y[1:], y[-1])
+
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for i in range(n_out - 2):
+        start, stop = edges[i], edges[i + 1]
+        areas = np.abs(
+            (x[previous] - next_x[i]) * (y[start:stop] - y[previous])
+            - (x[previous] - x[start:stop]) * (next_y[i] - y[previous])
+        )
+        previous = start + int(np.argmax(areas))
+        selected[i + 1] = previous
+
+    return selected
+
+
+def min_max_indices(y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Indices of the minimum and maximum of each of (n_out - 2) // 2 buckets, plus the
+    first and last points. Every peak survives, which suits envelopes and noisy signals.
+
+    The buckets are reduced at once by padding the series to a (buckets, size) array.
+    With n_out below 4 there is no room for a bucket: the first and last points are
+    kept and, with n_out of 3, the point farthest from the mean.
+
+    Args:
+        y (np.ndarray): y values, NaN are ignored.
+        n_out (int): Maximum number of points to keep, at least 2.
+
+    Returns:
+        np.ndarray: Sorted indices of the kept points.
+    """
+    n = len(y)
+    if n_out >= n:
+        return np.arange(n)
+
+    y = np.asarray(y, dtype=np.float64)
+    if n_out < 4:
+        ends = [0, n - 1][:n_out]
+        if n_out < 3 or np.isnan(y).all():
+            return np.array(ends)
+        deviation = np.abs(y - np.nanmean(y))
+        farthest = int(np.argmax(np.where(np.isnan(deviation), -np.inf, deviation)))
+        return np.unique(ends + [farthest])
+
+    size = -(-n // ((n_out - 2) // 2))
+    buckets = -(-n // size)
+    padded = np.full(buckets * size, np.nan)
+    padded[:n] = y
+    padded = padded.reshape(buckets, size)
+
+    offsets = np.arange(buckets) * size
+    minimums = offsets + np.argmin(np.where(np.isnan(padded), np.inf, padded), axis=1)
+    maximums = offsets + np.argmax(np.where(np.isnan(padded), -np.inf, padded), axis=1)
+    selected = np.unique(np.concatenate([[0, n - 1], minimums, maximums]))
+    return selected[selected < n]
+
+
+def downsample(
+    df: pd.DataFrame,
+    x: str,
+    y: Union[str, List[str]],
+    max_points: int = DEFAULT_MAX_POINTS,
+    method: str = "lttb",
+) -> pd.DataFrame:
+    """
+    Reduces the rows of a chart series to a point budget, just before it is plotted,
+    so the payload and the render time do not grow with the length of the history.
+
+    Each y column gets an equal share of the budget and the rows kept for any of them
+    are kept, so every series keeps its shape and they still share the x values.
+
+    Args:
+        df (pd.DataFrame): Series sorted by x.
+        x (str): Column of the x axis.
+        y (str | list): Column or columns plotted.
+        max_points (int): Maximum number of rows returned.
+        method (str): 'lttb' (Largest-Triangle-Three-Buckets) or 'min_max'.
+
+    Returns:
+        pd.DataFrame: The kept rows, in their original order.
+    """
+    if len(df) <= max_points:
+        return df
+
+    y_columns = [y] if isinstance(y, str) else list(y)
+    # Every column keeps the first and last rows, so the union stays within max_points
+    n_out = max(max_points // max(len(y_columns), 1), 2)
+    x_values = numeric_axis(df[x])
+
+    indices = []
+    for column in y_columns:
+        values = df[column].to_numpy(dtype=np.float64)
+        if method == "lttb":
+            indices.append(lttb_indices(x_values, values, n_out))
+        elif method == "min_max":
+            indices.append(min_max_indices(values, n_out))
+        else:
+            raise ValueError(f"Unknown downsampling method: {method}")
+
+    return df.iloc[np.unique(np.concatenate(indices))]
@@ -0,0 +1,269 @@
+import math
+import numpy as np
+import pandas as pd
+from typing import Iterable, List, Optional, Union
+
+
+MIN_PRECISION = 4
+MAX_PRECISION = 18
+
+
+def precision_for_error(error: float) -> int:
+    """
+    Return the HyperLogLog precision whose standard error is at most the given one.
+
+    The relative standard error of a sketch with 2**p registers is 1.04 / sqrt(2**p).
+
+    Args:
+        error (float): Target relative standard error, e.g. 0.01 for 1%.
+
+    Returns:
+        int: Number of bits p used to choose the register, between 4 and 18.
+    """
+    if not 0 < error < 1:
+        raise ValueError(f"The sketch error must be between 0 and 1, got {error}")
+
+    precision = math.ceil(math.log2((1.04 / error) ** 2))
+    return min(max(precision, MIN_PRECISION), MAX_PRECISION)
+
+
+def hash_values(values: Union[pd.Series, np.ndarray, Iterable]) -> np.ndarray:
+    """
+    Hash values to uint64 in a vectorized and deterministic way, nulls are dropped.
+
+    Args:
+        values: Values to hash.
+
+    Returns:
+        np.ndarray: One uint64 hash per non null value.
+    """
+    values = pd.Series(values)
+    values = values[values.notnull()].to_numpy()
+
+    # Same values must hash the same in every chunk, whatever dtype the chunk got:
+    # integer ids read as floats (because of a null) are hashed as integers
+    if values.dtype.kind == "f" and np.all(np.mod(values, 1) == 0):
+        values = values.astype(np.int64)
+    elif values.dtype.kind in "uib":
+        values = values.astype(np.int64)
+    elif values.dtype == object:
+        values = values.astype(str)
+    return pd.util.hash_array(values)
+
+
+def registers_and_ranks(hashes: np.ndarray, precision: int):
+    """
+    Split 64-bit hashes into the register they update and the rank they store.
+
+    The first p bits choose the register and the rank is the position of the first
+    1 bit in the remaining 64 - p bits.
+
+    Args:
+        hashes (np.ndarray): uint64 hashes.
+        precision (int): Number of bits p of the register index.
+
+    Returns:
+        tuple: (register indices as int64, ranks as uint8)
+    """
+    hashes = hashes.astype(np.uint64, copy=False)
+    registers = (hashes >> np.uint64(64 - precision)).astype(np.int64)
+    remaining = hashes << np.uint64(precision)
+
+    # Leading zeros counted on 32-bit halves, which float64 represents exactly
+    high = (remaining >> np.uint64(32)).astype(np.float64)
+    low = (remaining & np.uint64(0xFFFFFFFF)).astype(np.float64)
+    with np.errstate(divide="ignore"):
+        leading_zeros = np.where(
+            high > 0,
+            31 - np.floor(np.log2(high)),
+            63 - np.floor(np.log2(np.where(low > 0, low, 1))),
+        )
+    ranks = np.minimum(leading_zeros + 1, 64 - precision + 1)
+    ranks = np.where((high == 0) & (low == 0), 64 - precision + 1, ranks)
+
+    return registers, ranks.astype(np.uint8)
+
+
+def estimate(registers: np.ndarray) -> np.ndarray:
+    """
+    HyperLogLog cardinality estimate of one or many sketches.
+
+    Args:
+        registers (np.ndarray): Registers of shape (m,) or (n_sketches, m).
+
+    Returns:
+        np.ndarray: Estimated distinct count of each sketch.
+    """
+    registers = np.atleast_2d(registers)
+    m = registers.shape[1]
+    if m == 16:
+        alpha = 0.673
+    elif m == 32:
+        alpha = 0.697
+    elif m == 64:
+        alpha = 0.709
+    else:
+        alpha = 0.7213 / (1 + 1.079 / m)
+
+    raw = alpha * m * m / np.sum(np.exp2(-registers.astype(np.float64)), axis=1)
+
+    # Small range correction: linear counting while there are empty registers
+    zeros = np.count_nonzero(registers == 0, axis=1)
+    with np.errstate(divide="ignore"):
+        linear = m * np.log(m / np.where(zeros > 0, zeros, 1))
+    return np.where((raw <= 2.5 * m) & (zeros > 0), linear, raw)
+
+
+class HyperLogLog:
+    """
+    Mergeable approximate distinct counter.
+
+    Attributes:
+        precision (int): Number of bits of the register index, the sketch has 2**precision registers.
+        registers (np.ndarray): uint8 registers of the sketch.
+    """
+
+    def __init__(self, error: float = 0.01, precision: Optional[int] = None):
+        self.precision = precision if precision is not None else precision_for_error(error)
+        self.registers = np.zeros(2**self.precision, dtype=np.uint8)
+
+    def add(self, values) -> "HyperLogLog":
+        """
+        Add values to the sketch.
+        """
+        registers, ranks = registers_and_ranks(hash_values(values), self.precision)
+        np.maximum.at(self.registers, registers, ranks)
+        return self
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        """
+        Merge another sketch with the same precision into this one.
+        """
+        if other.precision != self.precision:
+            raise ValueError("Only sketches with the same precision can be merged")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def count(self) -> int:
+        """
+        Estimated number of distinct values added.
+        """
+        return int(round(estimate(self.registers)[0]))
+
+
+class SketchTable:
+    """
+    One HyperLogLog sketch per combination of key columns, e.g. per store and day.
+
+    Distinct counts of any coarser grouping (per store for a week, a month or the
+    whole history) are obtained merging the sketches of the rows involved, and two
+    tables built from different chunks of the data are merged with combine.
+
+    Attributes:
+        keys (pd.DataFrame): One row per sketch with the key columns.
+        registers (np.ndarray): uint8 registers of shape (len(keys), 2**precision).
+        precision (int): Number of bits of the register index.
+    """
+
+    def __init__(self, keys: pd.DataFrame, registers: np.ndarray, precision: int):
+        self.keys = keys.reset_index(drop=True)
+        self.registers = registers
+        self.precision = precision
+
+    @classmethod
+    def from_frame(
+        cls,
+        df: pd.DataFrame,
+        key_columns: List[str],
+        value_column: str,
+        error: float = 0.01,
+        precision: Optional[int] = None,
+    ) -> "SketchTable":
+        """
+        Build the sketches of value_column for each combination of key_columns.
+
+        Args:
+            df (pd.DataFrame): Data with the key and value columns.
+            key_columns (list): Columns identifying each sketch.
+            value_column (str): Column whose distinct values are counted.
+            error (float): Target relative standard error of each sketch.
+            precision (int): Explicit precision, overrides error.
+
+        Returns:
+            SketchTable: The sketches of every key combination present in df.
+        """
+        precision = precision if precision is not None else precision_for_error(error)
+        m = 2**precision
+
+        df = df[df[value_column].notnull()]
+        group_codes, keys = pd.MultiIndex.from_frame(df[key_columns]).factorize()
+        registers, ranks = registers_and_ranks(hash_values(df[value_column]), precision)
+
+        # Max rank of each (sketch, register) pair, in a single grouped pass
+        cells = pd.Series(ranks).groupby(group_codes.astype(np.int64) * m + registers).max()
+        table = np.zeros((len(keys), m), dtype=np.uint8)
+        table.reshape(-1)[cells.index.to_numpy()] = cells.to_numpy()
+
+        keys = pd.DataFrame(list(keys), columns=key_columns)
+        return cls(keys, table, precision)
+
+    def combine(self, other: "SketchTable") -> "SketchTable":
+        """
+        Merge with a table built from other rows, sketches with the same keys are merged.
+
+        Args:
+            other (SketchTable): Table with the same key columns and precision.
+
+        Returns:
+            SketchTable: A new table with the union of both.
+        """
+        if other.precision != self.precision:
+            raise ValueError("Only sketches with the same precision can be merged")
+
+        keys = pd.concat([self.keys, other.keys], ignore_index=True)
+        return SketchTable(*self._merge_rows(keys, np.vstack([self.registers, other.registers])))
+
+    def _merge_rows(self, keys: pd.DataFrame, registers: np.ndarray):
+        # Merge the register rows that share the same key, max is the union of sketches
+        codes, unique_keys = pd.MultiIndex.from_frame(keys).factorize()
+        unique_keys = pd.DataFrame(list(unique_keys), columns=keys.columns)
+        if not len(codes):
+            return unique_keys, registers[:0], self.precision
+
+        order = np.argsort(codes, kind="stable")
+        starts = np.flatnonzero(np.diff(codes[order], prepend=-1))
+        merged = np.maximum.reduceat(registers[order], starts, axis=0)
+        return unique_keys, merged, self.precision
+
+    def count_by(
+        self, columns: Union[str, List[str]], mask: Optional[np.ndarray] = None
+    ) -> pd.Series:
+        """
+        Estimated distinct count for each value of columns, merging the matching sketches.
+
+        Args:
+            columns (str or list): Key columns to group by, e.g. "store_id".
+            mask (np.ndarray): Optional boolean mask over keys selecting the sketches
+                to merge, e.g. the days of the current month.
+
+        Returns:
+            pd.Series: Estimated distinct count indexed by the values of columns.
+        """
+        columns = [columns] if isinstance(columns, str) else columns
+        keys, registers = self.keys, self.registers
+        if mask is not None:
+            keys, registers = keys[mask], registers[mask]
+
+        merged_keys, merged, _ = self._merge_rows(keys[columns], registers)
+        counts = np.rint(estimate(merged)).astype(np.int64) if len(merged) else []
+        index = pd.MultiIndex.from_frame(merged_keys) if len(columns) > 1 else merged_keys[columns[0]]
+        return pd.Series(counts, index=pd.Index(index), dtype=np.int64).sort_index()
+
+    def count(self, mask: Optional[np.ndarray] = None) -> int:
+        """
+        Estimated distinct count of the union of the sketches selected by mask.
+        """
+        registers = self.registers if mask is None else self.registers[mask]
+        if not len(registers):
+            return 0
+        return int(round(estimate(registers.max(axis=0))[0]))
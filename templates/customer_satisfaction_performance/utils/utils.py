@@ -1,6 +1,8 @@
 import pandas as pd
 import os
-from typing import List
+from typing import List, Optional
+from utils.metrics import Metric, Derived, compute_metrics
+from utils.profiling import profile_stage
 
 
 def get_data(file_names: List[str]):
@@ -21,13 +23,16 @@ def get_data(file_names: List[str]):
     return dict_dfs
 
 
-def process_sales_data(df: pd.DataFrame):
+@profile_stage()
+def process_sales_data(df: pd.DataFrame, sketch_error: Optional[float] = None):
     """
     Process sales orders performance data.
 
     Args:
         df (DataFrame): DataFrame with columns 'customer_id', 'order_returned',
             'order_id', 'order_spend', 'order_rate', and 'order_date'.
+        sketch_error (float, optional): When given, distinct customers and orders are
+            estimated with HyperLogLog sketches of this relative standard error.
 
     Returns:
         dict: A dictionary containing the following metrics:
@@ -43,21 +48,36 @@ def process_sales_data(df: pd.DataFrame):
             - 'Monthly Metrics'
     """
 
+    df["order_date"] = pd.to_datetime(df["order_date"])
+    returned = [("order_returned", "==", 1)]
+
+    # Totals, evaluated together in a single pass
+    totals = compute_metrics(
+        df,
+        [
+            Metric("Total Customers", "nunique", column="customer_id"),
+            Metric("Returning Customers", "nunique", column="customer_id", where=returned),
+            Metric("Total Orders", "nunique", column="order_id"),
+            Metric("Returned Orders", "nunique", column="order_id", where=returned),
+            Metric("Total Revenue", "sum", column="order_spend"),
+            Metric("Revenue Lost", "sum", column="order_spend", where=returned),
+        ],
+        sketch_error=sketch_error,
+    )
+
     # Total customers
-    total_customers = df["customer_id"].nunique()
+    total_customers = totals["Total Customers"]
 
     # Customers with returns
     customers_with_returns = round(
-        (df[df["order_returned"] == 1]["customer_id"].nunique() / total_customers) * 100
+        (totals["Returning Customers"] / total_customers) * 100
     )
 
     # Total orders
-    total_orders = df["order_id"].nunique()
+    total_orders = totals["Total Orders"]
 
     # Orders with returns
-    orders_with_returns = round(
-        (df[df["order_returned"] == 1]["order_id"].nunique() / total_orders) * 100
-    )
+    orders_with_returns = round((totals["Returned Orders"] / total_orders) * 100)
 
     # Customer Satisfaction
     customer_satisfaction = df.groupby("customer_id")["order_rate"].mean()
@@ -79,44 +99,37 @@ def process_sales_data(df: pd.DataFrame):
     customer_satisfaction_counts = satisfaction_categories.value_counts().to_dict()
 
     # Order Satisfaction
-    df["order_date"] = pd.to_datetime(df["order_date"])
     daily_order_satisfaction = df.groupby(df["order_date"].dt.date)["order_rate"].mean()
 
     # Total Revenue
-    total_revenue = df["order_spend"].sum()
+    total_revenue = totals["Total Revenue"]
 
     # Revenue Lost
-    revenue_lost = df[df["order_returned"] == 1]["order_spend"].sum()
+    revenue_lost = totals["Revenue Lost"]
 
     # Real Revenue
     real_revenue = total_revenue - revenue_lost
 
-    # Monthly Revenue Lost
-    monthly_revenue_lost = (
-        df[df["order_returned"] == 1]
-        .groupby(df["order_date"].dt.strftime("%b"))["order_spend"]
-        .sum()
-    )
-
-    # Monthly Total Revenue
-    monthly_total_revenue = df.groupby(df["order_date"].dt.strftime("%b"))[
-        "order_spend"
-    ].sum()
-
-    # Monthly Real Revenue
-    monthly_real_revenue = monthly_total_revenue - monthly_revenue_lost
-
-    # Monthly Orders
-    monthly_orders = df.groupby(df["order_date"].dt.strftime("%b"))[
-        "order_id"
-    ].nunique()
-
-    # Monthly Orders with Returns
-    monthly_orders_with_returns = (
-        df[df["order_returned"] == 1]
-        .groupby(df["order_date"].dt.strftime("%b"))["order_id"]
-        .nunique()
+    # Monthly metrics, evaluated together in a single grouped pass
+    monthly = compute_metrics(
+        df,
+        [
+            Metric("Monthly Orders", "nunique", column="order_id"),
+            Metric("Monthly Orders with Returns", "nunique", column="order_id", where=returned),
+            Metric("Monthly Revenue Lost", "sum", column="order_spend", where=returned),
+            Metric("Monthly Total Revenue", "sum", column="order_spend"),
+            Derived(
+                "Monthly Real Revenue",
+                lambda m: m["Monthly Total Revenue"] - m["Monthly Revenue Lost"],
+            ),
+        ],
+        by=df["order_date"].dt.strftime("%b"),
+        sketch_error=sketch_error,
     )
+    monthly_orders = monthly["Monthly Orders"]
+    monthly_orders_with_returns = monthly["Monthly Orders with Returns"]
+    monthly_revenue_lost = monthly["Monthly Revenue Lost"]
+    monthly_real_revenue = monthly["Monthly Real Revenue"]
 
     # Create a dictionary with the metrics
     results = {
@@ -1,3 +1,4 @@
+from functools import lru_cache
 from os import getenv
 from dotenv import load_dotenv
 import shimoku_api_python as shimoku
@@ -6,12 +7,18 @@ import shimoku_api_python as shimoku
 def init_sdk() -> shimoku.Client:
     # Load environment variables
     load_dotenv()
-    
+
     api_key: str = getenv('API_TOKEN')
     universe_id: str = getenv('UNIVERSE_ID')
     workspace_id: str = getenv('WORKSPACE_ID')
     async_exec: bool = getenv('ASYNC_EXECUTION') == 'TRUE'
 
+    return get_client(api_key, universe_id, workspace_id, async_exec)
+
+
+@lru_cache(maxsize=None)
+def get_client(api_key: str, universe_id: str, workspace_id: str, async_exec: bool) -> shimoku.Client:
+    # One client per set of credentials and workspace, reused by every call to init_sdk
     shimoku_client = shimoku.Client(
         access_token=api_key,
         universe_id=universe_id,
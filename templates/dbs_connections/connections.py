@@ -0,0 +1,170 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Union
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+from sqlalchemy.sql import Select
+
+from extract import DEFAULT_CHUNK_ROWS, aggregate_query, measures, stream_query
+
+# Seconds a cached result is served before the query runs again
+DEFAULT_TTL = 15 * 60
+
+# Parquet metadata of the cached results that had Arrow backed dtypes
+ARROW_BACKED = b'arrow_backed'
+
+_engines: Dict[str, Engine] = {}
+_engines_lock = threading.Lock()
+
+
+def dsn_string(dsn) -> str:
+    """ Connection string of a DSN, a string or a sqlalchemy URL, password included """
+    return dsn.render_as_string(hide_password=False) if hasattr(dsn, 'render_as_string') else str(dsn)
+
+
+def get_engine(dsn, **engine_kwargs) -> Engine:
+    """
+    Engine of a DSN, created once per process. The engine keeps a pool of open
+    connections, so the scripts and refreshes that share a DSN reuse them
+    instead of connecting again. Connections are checked before being reused.
+    """
+    key = dsn_string(dsn)
+    with _engines_lock:
+        if key not in _engines:
+            _engines[key] = create_engine(dsn, pool_pre_ping=True, **engine_kwargs)
+        return _engines[key]
+
+
+def dispose_engines():
+    """ Closes the pooled connections of every engine """
+    with _engines_lock:
+        for engine in _engines.values():
+            engine.dispose()
+        _engines.clear()
+
+
+def normalize_query(query: str) -> str:
+    """ Query with the whitespace outside string literals collapsed and no trailing ';' """
+    parts = re.split(r"('(?:[^']|'')*')", query.strip().rstrip(';').strip())
+    return ''.join(
+        part if part.startswith("'") else re.sub(r'\s+', ' ', part)
+        for part in parts
+    )
+
+
+class ResultCache:
+    """
+    On-disk cache of query results.
+
+    A result is stored in a Parquet file named after the hash of the database,
+    the normalized query and its parameters, and is served until it is older
+    than ttl seconds. Dashboard refreshes within the ttl do not reach the database.
+    Results with Arrow backed columns are read back with Arrow backed dtypes,
+    so a cached result has the dtypes of the query it stores.
+
+    Attributes:
+        directory (str): Directory of the .parquet files.
+        ttl (float): Seconds a result is valid.
+    """
+
+    def __init__(self, directory: str = '.query_cache', ttl: float = DEFAULT_TTL):
+        self.directory = directory
+        self.ttl = ttl
+
+    def key(self, database: str, query: str, params: Optional[dict] = None) -> str:
+        content = json.dumps(
+            [database, normalize_query(query), params or {}], sort_keys=True, default=str
+        )
+        return hashlib.sha256(content.encode()).hexdigest()[:32]
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, f'{key}.parquet')
+
+    def load(self, key: str) -> Optional[pd.DataFrame]:
+        """ Cached result, None if it is not stored or it expired """
+        path = self.path(key)
+        try:
+            if time.time() - os.path.getmtime(path) > self.ttl:
+                return None
+            table = pq.read_table(path)
+        except (OSError, ValueError):
+            return None
+        if (table.schema.metadata or {}).get(ARROW_BACKED) == b'1':
+            return table.to_pandas(types_mapper=pd.ArrowDtype)
+        return table.to_pandas()
+
+    def save(self, key: str, df: pd.DataFrame) -> str:
+        """ Stores a result, written with a temporary name and renamed """
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(key)
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        if any(isinstance(dtype, pd.ArrowDtype) for dtype in df.dtypes):
+            table = table.replace_schema_metadata({**(table.schema.metadata or {}), ARROW_BACKED: b'1'})
+        pq.write_table(table, path + '.tmp')
+        os.replace(path + '.tmp', path)
+        return path
+
+    def fetch(self, database: str, query: str, params: Optional[dict], run: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+        """ Cached result of a query, run and stored if missing or expired """
+        key = self.key(database, query, params)
+        df = self.load(key)
+        if df is None:
+            df = run()
+            self.save(key, df)
+        return df
+
+
+def query_frame(
+    dsn,
+    query: Union[str, Select],
+    params: Optional[dict] = None,
+    cache: Optional[ResultCache] = None,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    arrow: bool = True,
+) -> pd.DataFrame:
+    """
+    Result of a query on the pooled engine of a DSN, streamed in chunks and
+    served from the cache while it is fresh.
+    """
+    engine = get_engine(dsn)
+
+    def run() -> pd.DataFrame:
+        chunks = list(stream_query(engine, query, params, chunk_rows, arrow))
+        return pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame()
+
+    if cache is None:
+        return run()
+
+    # The cache is keyed by the database without the credentials and the SQL sent to it
+    text, key_params = query, params
+    if isinstance(query, Select):
+        compiled = query.compile(engine)
+        text, key_params = str(compiled), {**compiled.params, **(params or {})}
+    return cache.fetch(engine.url.render_as_string(hide_password=True), text, key_params, run)
+
+
+def chart_frame(
+    dsn,
+    table_name: str,
+    x: str,
+    y: Union[List[str], Dict[str, str]],
+    agg: str = 'sum',
+    where: Optional[str] = None,
+    schema: Optional[str] = None,
+    cache: Optional[ResultCache] = None,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    arrow: bool = True,
+) -> pd.DataFrame:
+    """ extract.read_chart_frame on the pooled engine of a DSN, served from the cache while it is fresh """
+    query = aggregate_query(table_name, x, y, agg, where, schema)
+    df = query_frame(dsn, query, cache=cache, chunk_rows=chunk_rows, arrow=arrow)
+    # An empty result has no columns
+    return df if len(df.columns) else pd.DataFrame(columns=[x] + list(measures(y)))
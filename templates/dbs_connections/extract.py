@@ -0,0 +1,179 @@
+from typing import Dict, Iterable, Iterator, List, Optional, Union
+
+import pandas as pd
+from sqlalchemy import column, func, select, table, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.sql import Select
+
+# Rows fetched from the server cursor at a time
+DEFAULT_CHUNK_ROWS = 50_000
+
+# How partial aggregates of the chunks are combined, mean is kept as sum and count
+COMBINE = {'sum': 'sum', 'count': 'sum', 'min': 'min', 'max': 'max'}
+
+
+def measures(y: Union[List[str], Dict[str, str]]) -> Dict[str, str]:
+    """ Chart column -> table column, a list keeps the names """
+    return dict(y) if isinstance(y, dict) else {name: name for name in y}
+
+
+def aggregate_query(
+    table_name: str,
+    x: str,
+    y: Union[List[str], Dict[str, str]],
+    agg: str = 'sum',
+    where: Optional[str] = None,
+    schema: Optional[str] = None,
+) -> Select:
+    """
+    SELECT x, AGG(column) AS name, ... FROM table [WHERE ...] GROUP BY x ORDER BY x
+
+    Only the x and y columns are read and the rows are grouped by the database,
+    so just one row per x value travels to Python.
+
+    Args:
+        table_name: Table to read.
+        x: Column of the x axis, the rows are grouped by it.
+        y: Columns to aggregate, or {chart column: table column}.
+        agg: 'sum', 'count', 'min', 'max' or 'avg'.
+        where: Optional SQL filter, e.g. "status != 'cancelled'".
+        schema: Optional schema, by default the one of the connection.
+    """
+    source = table(table_name, column(x), *[column(name) for name in measures(y).values()], schema=schema)
+    query = (
+        select(
+            source.c[x],
+            *[getattr(func, agg)(source.c[name]).label(label) for label, name in measures(y).items()],
+        )
+        .group_by(source.c[x])
+        .order_by(source.c[x])
+    )
+    if where is not None:
+        query = query.where(text(where))
+    return query
+
+
+def supports_arrow(connection: Connection) -> bool:
+    """
+    Whether the driver cursors return Arrow batches: DuckDB and ADBC
+    (fetch_record_batch) or Snowflake (fetch_arrow_batches)
+    """
+    cursor = connection.connection.cursor()
+    try:
+        return any(hasattr(cursor, name) for name in ('fetch_record_batch', 'fetch_arrow_batches'))
+    finally:
+        cursor.close()
+
+
+def arrow_batches(cursor, chunk_rows: int) -> Optional[Iterator]:
+    """ Arrow record batches or tables of an executed driver cursor, None if it cannot return them """
+    if hasattr(cursor, 'fetch_record_batch'):
+        try:
+            return iter(cursor.fetch_record_batch(chunk_rows))
+        except TypeError:  # ADBC readers take no batch size
+            return iter(cursor.fetch_record_batch())
+    try:
+        return cursor.fetch_arrow_batches()
+    except Exception:  # Snowflake results that are not in Arrow format
+        return None
+
+
+def arrow_frame(batch) -> pd.DataFrame:
+    """ DataFrame with Arrow backed columns, the buffers of the batch are not copied to Python objects """
+    return batch.to_pandas(types_mapper=pd.ArrowDtype)
+
+
+def stream_query(
+    connectable: Union[Engine, Connection],
+    query: Union[str, Select],
+    params: Optional[dict] = None,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    arrow: bool = True,
+) -> Iterator[pd.DataFrame]:
+    """
+    Runs a query and yields its result in DataFrames of about chunk_rows rows,
+    the whole result is never held in memory.
+
+    When arrow is set and the driver returns Arrow batches, the chunks are built
+    from them with Arrow backed dtypes and no Python object per value. Otherwise
+    the rows are read with a server side cursor, drivers without server side
+    cursors fetch chunk_rows rows at a time.
+    """
+    if isinstance(query, str):
+        query = text(query)
+
+    def chunks(connection: Connection) -> Iterator[pd.DataFrame]:
+        if arrow and supports_arrow(connection):
+            result = connection.execute(query, params or {})
+            batches = arrow_batches(result.cursor, chunk_rows)
+            if batches is not None:
+                with result:
+                    for batch in batches:
+                        yield arrow_frame(batch)
+                return
+        else:
+            result = connection.execution_options(stream_results=True).execute(query, params or {})
+
+        columns = list(result.keys())
+        for rows in result.partitions(chunk_rows):
+            yield pd.DataFrame.from_records(rows, columns=columns)
+
+    if isinstance(connectable, Engine):
+        with connectable.connect() as connection:
+            yield from chunks(connection)
+    else:
+        yield from chunks(connectable)
+
+
+def combine_chunks(
+    chunks: Iterable[pd.DataFrame],
+    x: str,
+    y: List[str],
+    agg: Optional[str] = None,
+) -> pd.DataFrame:
+    """
+    Builds the chart frame from the chunks as they arrive.
+
+    Without agg the chunks are just concatenated, for results already grouped by
+    the database. With agg ('sum', 'count', 'min', 'max' or 'mean') each chunk is
+    grouped by x and folded into the running partial aggregates, so only one row
+    per x value is kept whatever the number of rows read.
+    """
+    if agg is None:
+        frames = list(chunks)
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=[x] + y)
+
+    partial_aggs = ['sum', 'count'] if agg == 'mean' else [agg]
+    partial = None
+    for chunk in chunks:
+        grouped = chunk.groupby(x)[y].agg(partial_aggs)
+        if partial is not None:
+            grouped = pd.concat([partial, grouped])
+            grouped = grouped.groupby(level=0).agg(
+                {name: COMBINE[name[1]] for name in grouped.columns}
+            )
+        partial = grouped
+
+    if partial is None:
+        return pd.DataFrame(columns=[x] + y)
+    if agg == 'mean':
+        result = pd.DataFrame({name: partial[(name, 'sum')] / partial[(name, 'count')] for name in y})
+    else:
+        result = partial.droplevel(1, axis=1)
+    return result.sort_index().rename_axis(x).reset_index()
+
+
+def read_chart_frame(
+    connectable: Union[Engine, Connection],
+    table_name: str,
+    x: str,
+    y: Union[List[str], Dict[str, str]],
+    agg: str = 'sum',
+    where: Optional[str] = None,
+    schema: Optional[str] = None,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    arrow: bool = True,
+) -> pd.DataFrame:
+    """ Chart frame of a table, grouped and projected by the database and streamed in chunks """
+    query = aggregate_query(table_name, x, y, agg, where, schema)
+    return combine_chunks(stream_query(connectable, query, chunk_rows=chunk_rows, arrow=arrow), x, list(measures(y)))
@@ -0,0 +1,136 @@
+import io
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List, Optional
+
+import pandas as pd
+
+# Bytes of each ranged request
+DEFAULT_PART_SIZE = 8 * 1024 * 1024
+# Ranged requests in flight at once
+DEFAULT_WORKERS = 8
+# Rows parsed at a time
+DEFAULT_CHUNK_ROWS = 500_000
+
+
+class S3Backend:
+    """
+    Objects of a S3 bucket. Any S3 compatible store works by creating the client
+    with its endpoint, e.g. boto3.client('s3', endpoint_url='http://localhost:9000')
+
+    Attributes:
+        client: boto3 S3 client, they are thread safe.
+        bucket (str): Bucket of the objects.
+    """
+
+    def __init__(self, client, bucket: str):
+        self.client = client
+        self.bucket = bucket
+
+    def size(self, key: str) -> int:
+        return self.client.head_object(Bucket=self.bucket, Key=key)['ContentLength']
+
+    def read_range(self, key: str, start: int, end: int) -> bytes:
+        """ Bytes [start, end) of an object """
+        response = self.client.get_object(Bucket=self.bucket, Key=key, Range=f'bytes={start}-{end - 1}')
+        return response['Body'].read()
+
+
+class FileBackend:
+    """
+    Files of a local directory, as a stand-in for a bucket
+
+    Attributes:
+        root (str): Directory the keys are relative to.
+    """
+
+    def __init__(self, root: str = '.'):
+        self.root = root
+
+    def size(self, key: str) -> int:
+        return os.path.getsize(os.path.join(self.root, key))
+
+    def read_range(self, key: str, start: int, end: int) -> bytes:
+        """ Bytes [start, end) of a file """
+        with open(os.path.join(self.root, key), 'rb') as file:
+            file.seek(start)
+            return file.read(end - start)
+
+
+def iter_parts(
+    backend, key: str, part_size: int = DEFAULT_PART_SIZE, workers: int = DEFAULT_WORKERS
+) -> Iterator[bytes]:
+    """
+    Parts of an object in order, fetched with parallel byte range requests.
+
+    At most 2 * workers parts are requested ahead of the one being consumed, so
+    memory stays bounded whatever the size of the object.
+    """
+    size = backend.size(key)
+    ranges = iter([(start, min(start + part_size, size)) for start in range(0, size, part_size)])
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for start, end in ranges:
+            pending.append(executor.submit(backend.read_range, key, start, end))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+class PartsReader(io.RawIOBase):
+    """ Read only file object over a stream of parts, for parsers that take a file """
+
+    def __init__(self, parts: Iterator[bytes]):
+        self.parts = parts
+        self.buffer = memoryview(b'')
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, target) -> int:
+        while not self.buffer:
+            part = next(self.parts, None)
+            if part is None:
+                return 0
+            self.buffer = memoryview(part)
+        n = min(len(target), len(self.buffer))
+        target[:n] = self.buffer[:n]
+        self.buffer = self.buffer[n:]
+        return n
+
+
+def read_csv_chunks(
+    backend,
+    key: str,
+    usecols: Optional[List[str]] = None,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    part_size: int = DEFAULT_PART_SIZE,
+    workers: int = DEFAULT_WORKERS,
+    **read_csv_kwargs,
+) -> Iterator[pd.DataFrame]:
+    """
+    Parses a CSV object while it is downloaded, yielding chunks of chunk_rows rows.
+
+    Args:
+        backend: S3Backend, FileBackend or any object with size and read_range.
+        key: Key of the object.
+        usecols: Columns to keep, the rest are skipped by the parser.
+        chunk_rows: Rows of each chunk.
+        part_size: Bytes of each ranged request.
+        workers: Ranged requests in flight at once.
+        **read_csv_kwargs: Other pd.read_csv parameters, e.g. header or delimiter.
+    """
+    # An empty object has no header for the parser, it has no chunks
+    if backend.size(key) == 0:
+        return
+    stream = io.BufferedReader(PartsReader(iter_parts(backend, key, part_size, workers)), buffer_size=part_size)
+    with stream, pd.read_csv(stream, usecols=usecols, chunksize=chunk_rows, **read_csv_kwargs) as reader:
+        yield from reader
+
+
+def read_csv(backend, key: str, usecols: Optional[List[str]] = None, **kwargs) -> pd.DataFrame:
+    """ Whole CSV object, downloaded in parallel and parsed in chunks, see read_csv_chunks """
+    chunks = list(read_csv_chunks(backend, key, usecols, **kwargs))
+    return pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame(columns=usecols)
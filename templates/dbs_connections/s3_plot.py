@@ -1,19 +1,18 @@
 from os import getenv, environ
 
 import boto3
-import pandas as pd
 from app_shimoku import init_sdk
+from object_store import S3Backend, read_csv
 
 environ["AWS_ACCESS_KEY_ID"] = getenv('AWS_ACCESS_KEY_ID')
 environ["AWS_SECRET_ACCESS_KEY"] = getenv('AWS_SECRET_ACCESS_KEY')
 bucket = 'my_bucket'
 filename = 'filename.csv'
 
-# Extract from S3
+# Extract from S3, downloaded with parallel ranged requests and parsed in chunks,
+# keeping only the columns of the chart
 s3_client = boto3.client('s3')
-response = s3_client.get_object(Bucket=bucket, Key=filename)
-file = response["Body"]
-df = pd.read_csv(file, header=14, delimiter="\t", low_memory=False)
+df = read_csv(S3Backend(s3_client, bucket), filename, usecols=['status', 'total'], header=14, delimiter="\t")
 
 
 # Load data to Shimoku
@@ -1,7 +1,6 @@
-import pandas as pd
-from sqlalchemy import create_engine
 from snowflake.sqlalchemy import URL
 from app_shimoku import init_sdk
+from connections import ResultCache, chart_frame
 
 # TODO set your snowflake connection
 url = URL(
@@ -14,11 +13,11 @@ url = URL(
     role='xxxxx',
     authenticator='https://xxxxx.okta.com',
 )
-engine = create_engine(url)
-connection = engine.connect()
 
-query = 'select * from MYDB.MYSCHEMA.MYTABLE LIMIT 10;'
-df = pd.read_sql(query, connection)
+# Only the chart columns of MYTABLE, in the database and schema of the url, are read,
+# grouped by Snowflake and streamed in chunks on a pooled connection,
+# refreshes within the cache ttl do not reach the warehouse
+df = chart_frame(url, 'mytable', x='status', y=['total'], agg='sum', cache=ResultCache())
 
 # Load data to Shimoku
 s = init_sdk()
@@ -1,5 +1,6 @@
 from shimoku_api_python import Client
 from utils import get_data, groupby_sum
+from profiling import profile_stage, profiler
 import pandas as pd
 import calendar
 import numpy as np
@@ -21,13 +22,14 @@ class Board:
         file_names = ["data/facebook_ads.csv"]
         # Name of the dashboard
         self.board_name = "Facebook Ads"
-        self.dfs = get_data(file_names)
+        self.dfs = profiler.call("load", get_data, file_names)
 
         # Shimoku client instance
         self.shimoku = shimoku
         self.shimoku.set_board(name=self.board_name)
         self.shimoku.boards.update_board(name=self.board_name, is_public=True)
 
+    @profile_stage("transform")
     def transform(self):
         """
         Perform data transformations.
@@ -76,6 +78,7 @@ class Board:
 
         return True
 
+    @profile_stage("plot")
     def plot(self):
         """
         A method to plot overview.
@@ -101,4 +104,5 @@ class Board:
         from paths.overview import Overview
 
         overview_path = Overview(self)
+        profiler.instrument(overview_path)
         overview_path.plot()
@@ -1,9 +1,15 @@
 # DATA
 
-import pandas as pd
-import random
-from datetime import datetime, timedelta
 import numpy as np
+import pandas as pd
+from datetime import datetime
+from functools import partial
+from typing import Optional
+
+try:
+    from synthetic import Chunk, SortedDates, parse_generator_args, uniform_rounded, write_dataset
+except ImportError:  # Imported as data.generate_facebook_ads from the template root
+    from data.synthetic import Chunk, SortedDates, parse_generator_args, uniform_rounded, write_dataset
 
 total_data = 1000
 output_file = "facebook_ads.csv"
@@ -14,62 +20,60 @@ click_ratio = 80
 cost_range = (0.05, 0.20)
 
 
-def generate_data():
-    def random_date(start_date: datetime, end_date: datetime):
-        """
-        Generates a random date within a specified date range.
-
-        Parameters:
-        start_date (datetime): The starting date of the range.
-        end_date (datetime): The ending date of the range.
-
-        Returns:
-        datetime: A random date between start_date and end_date.
-        """
+def make_chunk(chunk: Chunk, dates: SortedDates) -> pd.DataFrame:
+    """
+    Generates the impressions of one chunk of the dataset.
 
-        return start_date + timedelta(
-            days=random.randint(0, (end_date - start_date).days)
-        )
+    Parameters:
+    chunk (Chunk): Rows to generate and their random generator.
+    dates (SortedDates): Impression dates of the whole dataset.
 
-    n = total_data
-
-    # impression_date
-    impression_date_list = [random_date(date_ini, date_end) for _ in range(n)]
-    impression_date_list = sorted(impression_date_list)
+    Returns:
+    pd.DataFrame: The impressions of the chunk, sorted by impression_date.
+    """
+    rng = chunk.rng
+    n = chunk.size
 
     # ad_name
     ad_name = [f"Advertising-{i}" for i in range(1, total_ads + 1)]
-    ad_name_list = np.random.choice(ad_name, size=n)
+    ad_name_list = rng.choice(ad_name, size=n)
 
     # click
-    click_list = np.random.choice(
-        [0, 1], size=n, p=[click_ratio / 100, (100 - click_ratio) / 100]
-    )
+    click_list = rng.choice([0, 1], size=n, p=[click_ratio / 100, (100 - click_ratio) / 100])
 
     # ad_cost
-    ad_cost_list = np.round(np.random.uniform(cost_range[0], cost_range[1], size=n), 2)
+    ad_cost_list = uniform_rounded(rng, cost_range, n)
+
+    return pd.DataFrame(
+        {
+            "impression_date": dates.take(chunk.start, n),
+            "ad_name": ad_name_list,
+            "click": click_list,
+            "ad_cost": ad_cost_list,
+        }
+    )
 
-    # Create the DataFrame
-    data = {
-        "impression_date": impression_date_list,
-        "ad_name": ad_name_list,
-        "click": click_list,
-        "ad_cost": ad_cost_list,
-    }
 
-    df = pd.DataFrame(data)
-    df.sort_values(by="impression_date", inplace=True)
+def generate_data(
+    total_rows: int = total_data,
+    output_file: str = output_file,
+    chunk_rows: int = 1_000_000,
+    processes: int = 1,
+    seed: Optional[int] = None,
+):
+    dates = SortedDates(date_ini, date_end, total_rows, np.random.default_rng(seed))
+    df = write_dataset(
+        partial(make_chunk, dates=dates), total_rows, output_file, chunk_rows, processes, seed
+    )
 
     # Display the DataFrame
-    print("\n### Output CSV: " + output_file + " (" + str(len(df)) + " registers)\n")
-    print(df.head(10))
+    print("\n### Output CSV: " + output_file + " (" + str(total_rows) + " registers)\n")
+    print(df)
     print("\n")
 
-    # Save the dataframe to CSV
-    df.to_csv(output_file, index=False)
-
     return df
 
 
 if __name__ == "__main__":
-    generate_data()
+    args = parse_generator_args(total_data, output_file)
+    generate_data(args.rows, args.output, args.chunk_rows, args.processes, args.seed)
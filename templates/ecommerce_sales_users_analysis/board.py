@@ -1,5 +1,6 @@
 from shimoku_api_python import Client
 import pandas as pd
+from profiling import profile_stage, profiler
 
 
 class Board:
@@ -21,15 +22,18 @@ class Board:
         """
 
         self.board_name = "Ecommerce Analysis"
-        self.df = pd.read_csv("data/data.csv")
+        self.df = profiler.call("load", pd.read_csv, "data/data.csv")
         self.shimoku = shimoku  # Shimoku client instance
         self.shimoku.set_board(name=self.board_name)
         self.shimoku.boards.update_board(name=self.board_name, is_public=True)
 
+    @profile_stage("transform")
     def transform(self):
         pass
 
+    @profile_stage("plot")
     def plot(self):
         from paths.ecomerce_analysis import EcommerceAnalysis
         EA = EcommerceAnalysis(self)
+        profiler.instrument(EA)
         EA.plot()
@@ -3,6 +3,8 @@ from shimoku_api_python import Client
 from dotenv import load_dotenv
 
 from board import Board
+from client_metrics import client_metrics
+from profiling import profiler
 
 from freezegun import freeze_time
 from settings import date
@@ -26,13 +28,21 @@ def main():
         verbosity="INFO",
         async_execution=True,
     )
+    # Latency and bytes of every client call, written to CLIENT_METRICS_FILE when it is set
+    shimoku = client_metrics.instrument(shimoku)
+    client_metrics.export(getenv("CLIENT_METRICS_FILE"), getenv("CLIENT_METRICS_INTERVAL"))
     shimoku.set_workspace(getenv("WORKSPACE_ID"))
 
     # Instantiate and set up the dashboard
     board = Board(shimoku)
     board.transform()  # Perform data transformations
     board.plot()  # Plot the dashboard
-    shimoku.run()
+    with profiler.stage("run"):
+        shimoku.run()
+
+    # Time, CPU and memory of each stage, and the trace of the run when TRACE_DIR is set
+    profiler.report(getenv("TRACE_DIR"))
+    client_metrics.report()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,110 @@
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+from typing import Dict, List, Sequence
+
+
+class LeadPreprocessor:
+    """
+    Columnar feature pipeline for the leads data.
+
+    Numeric columns are passed through with missing values replaced by the training
+    mean, and categorical columns are one-hot encoded into a sparse matrix with missing
+    values replaced by the training mode. Feature names follow the DictVectorizer
+    convention: the column name for numerics and 'column=value' for categories.
+
+    Everything works on whole columns, no per-row dicts are built, so the memory used
+    grows with the number of non-zero features instead of rows x features.
+    Categories not seen during fit are ignored at transform time, so the fitted
+    preprocessor can be reused to score new leads.
+
+    Attributes:
+        exclude (list): Columns never used as features, e.g. the target and the ids.
+        numeric_columns_ (list): Numeric columns found in fit.
+        categorical_columns_ (list): Categorical columns found in fit.
+        fill_values_ (dict): Value used to fill the missing values of each column.
+        categories_ (dict): Sorted categories of each categorical column.
+        feature_names_ (list): Name of each column of the transformed matrix.
+        means_ (np.ndarray): Mean of each column of the transformed training matrix, the
+            baseline of the impact factors.
+    """
+
+    def __init__(self, exclude: Sequence[str] = ('Converted', 'Prospect ID', 'Lead Number')):
+        self.exclude = list(exclude)
+
+    def fit(self, df: pd.DataFrame) -> 'LeadPreprocessor':
+        """
+        Learn the columns, fill values and categories from the training leads.
+        """
+        features = df.drop(columns=[c for c in self.exclude if c in df.columns])
+
+        numeric = [c for c in features.columns if pd.api.types.is_numeric_dtype(features[c])
+                   and not pd.api.types.is_bool_dtype(features[c])]
+        categorical = [c for c in features.columns if c not in numeric]
+
+        fill_values: Dict = features[numeric].mean().to_dict()
+        for col in categorical:
+            mode = features[col].mode()
+            fill_values[col] = mode.iloc[0] if len(mode) else ''
+
+        filled = features[categorical].fillna(fill_values).astype(str)
+        self.numeric_columns_ = numeric
+        self.categorical_columns_ = categorical
+        self.fill_values_ = fill_values
+        self.categories_ = {col: pd.Index(np.sort(filled[col].unique())) for col in categorical}
+        self.feature_names_ = numeric + [
+            f'{col}={value}' for col in categorical for value in self.categories_[col]
+        ]
+        # Imputing the mean keeps the mean of the numerics, the mean of a one-hot column
+        # is the share of its category
+        self.means_ = np.concatenate([
+            np.asarray([fill_values[col] for col in numeric], dtype=np.float64),
+            *[
+                filled[col].value_counts(normalize=True)
+                .reindex(self.categories_[col], fill_value=0).to_numpy(dtype=np.float64)
+                for col in categorical
+            ],
+        ])
+
+        return self
+
+    def transform(self, df: pd.DataFrame) -> sp.csr_matrix:
+        """
+        Build the sparse feature matrix of the leads.
+
+        Args:
+            df (pd.DataFrame): Leads with at least the columns seen in fit.
+
+        Returns:
+            sp.csr_matrix: Matrix of shape (len(df), len(feature_names_)).
+        """
+        n = len(df)
+        filled = df[self.numeric_columns_ + self.categorical_columns_].fillna(self.fill_values_)
+
+        # Numerics: a dense block of passthrough values, zeros are dropped by the sparse format
+        numeric = sp.csr_matrix(filled[self.numeric_columns_].to_numpy(dtype=np.float64))
+
+        # Categoricals: one (row, column) entry per lead and column, unseen values are skipped
+        rows: List[np.ndarray] = []
+        cols: List[np.ndarray] = []
+        offset = 0
+        for col in self.categorical_columns_:
+            codes = self.categories_[col].get_indexer(filled[col].astype(str))
+            known = codes >= 0
+            rows.append(np.flatnonzero(known))
+            cols.append(codes[known] + offset)
+            offset += len(self.categories_[col])
+
+        rows = np.concatenate(rows) if rows else np.empty(0, dtype=np.int64)
+        cols = np.concatenate(cols) if cols else np.empty(0, dtype=np.int64)
+        categorical = sp.csr_matrix((np.ones(len(rows)), (rows, cols)), shape=(n, offset))
+
+        return sp.hstack([numeric, categorical], format='csr')
+
+    def fit_transform(self, df: pd.DataFrame) -> sp.csr_matrix:
+        return self.fit(df).transform(df)
+
+    def get_feature_names_out(self) -> np.ndarray:
+        return np.asarray(self.feature_names_, dtype=object)
+
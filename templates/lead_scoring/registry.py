@@ -0,0 +1,177 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+
+import joblib
+import pandas as pd
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+class ModelRegistry:
+    """
+    Local registry of fitted (preprocessor, model) pairs.
+
+    Each entry is stored in its own directory named after a fingerprint of the
+    training data and the hyperparameters, so a run with the same data and settings
+    loads the artifacts instead of training again. The registry keeps at most
+    max_versions entries, the least recently used are evicted first, and drops the
+    entries created more than max_age_days ago.
+
+    Attributes:
+        directory (str): Directory of the registry.
+        max_versions (int): Maximum number of entries kept, None for no limit.
+        max_age_days (float): Maximum age of an entry in days, None for no limit.
+    """
+
+    ARTIFACTS_FILE = 'artifacts.joblib'
+    METADATA_FILE = 'metadata.json'
+
+    def __init__(self, directory: str = 'models', max_versions: Optional[int] = 5,
+                 max_age_days: Optional[float] = 30):
+        self.directory = directory
+        self.max_versions = max_versions
+        self.max_age_days = max_age_days
+
+    @staticmethod
+    def fingerprint(df: pd.DataFrame, hyperparameters: Dict[str, Any]) -> str:
+        """
+        Hash of the training data (values, columns and dtypes) and of the hyperparameters.
+        """
+        digest = hashlib.sha256()
+        digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+        digest.update(json.dumps([list(map(str, df.columns)), list(map(str, df.dtypes))]).encode())
+        digest.update(json.dumps(hyperparameters, sort_keys=True, default=str).encode())
+        return digest.hexdigest()[:32]
+
+    def _path(self, fingerprint: str, file_name: str = '') -> str:
+        return os.path.join(self.directory, fingerprint, file_name)
+
+    def _read_metadata(self, fingerprint: str) -> Optional[Dict]:
+        try:
+            with open(self._path(fingerprint, self.METADATA_FILE)) as metadata_file:
+                return json.load(metadata_file)
+        except (OSError, ValueError):
+            return None
+
+    def _write_metadata(self, fingerprint: str, metadata: Dict):
+        path = self._path(fingerprint, self.METADATA_FILE)
+        with open(path + '.tmp', 'w') as metadata_file:
+            json.dump(metadata, metadata_file, indent=2)
+        os.replace(path + '.tmp', path)
+
+    def entries(self) -> List[Dict]:
+        """
+        Metadata of every complete entry, the most recently used first.
+        """
+        if not os.path.isdir(self.directory):
+            return []
+
+        entries = []
+        for fingerprint in os.listdir(self.directory):
+            # Entries being written are hidden temporary directories
+            if fingerprint.startswith('.'):
+                continue
+            metadata = self._read_metadata(fingerprint)
+            if metadata is not None:
+                entries.append(metadata)
+        return sorted(entries, key=lambda entry: entry['last_used_at'], reverse=True)
+
+    def load(self, fingerprint: str) -> Optional[Tuple[Any, Any]]:
+        """
+        Load the (preprocessor, model) of a fingerprint, None if it is not registered.
+        """
+        metadata = self._read_metadata(fingerprint)
+        if metadata is None:
+            return None
+
+        artifacts = joblib.load(self._path(fingerprint, self.ARTIFACTS_FILE))
+        metadata['last_used_at'] = time.time()
+        self._write_metadata(fingerprint, metadata)
+        return artifacts['preprocessor'], artifacts['model']
+
+    def latest(self) -> Optional[Tuple[Any, Any]]:
+        """
+        Load the most recently used (preprocessor, model), None if the registry is empty.
+        """
+        entries = self.entries()
+        return self.load(entries[0]['fingerprint']) if entries else None
+
+    def save(self, fingerprint: str, preprocessor: Any, model: Any,
+             metadata: Optional[Dict] = None) -> str:
+        """
+        Register a fitted preprocessor and model, then evict the old entries.
+
+        The entry is written to a temporary directory and renamed, so an interrupted
+        run never leaves a half written entry behind.
+
+        Returns:
+            str: Path of the entry.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = self._path(f'.{fingerprint}.tmp')
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+
+        joblib.dump({'preprocessor': preprocessor, 'model': model},
+                    os.path.join(tmp_path, self.ARTIFACTS_FILE))
+        now = time.time()
+        with open(os.path.join(tmp_path, self.METADATA_FILE), 'w') as metadata_file:
+            json.dump({
+                'fingerprint': fingerprint,
+                'created_at': now,
+                'last_used_at': now,
+                **(metadata or {}),
+            }, metadata_file, indent=2, default=str)
+
+        shutil.rmtree(self._path(fingerprint), ignore_errors=True)
+        os.replace(tmp_path, self._path(fingerprint))
+
+        self.evict()
+        return self._path(fingerprint)
+
+    def evict(self) -> List[str]:
+        """
+        Remove the entries older than max_age_days and the least recently used ones
+        beyond max_versions.
+
+        Returns:
+            list: Fingerprints of the removed entries.
+        """
+        entries = self.entries()
+        expired = []
+        if self.max_age_days is not None:
+            oldest = time.time() - self.max_age_days * 86_400
+            expired = [entry for entry in entries if entry['created_at'] < oldest]
+            entries = [entry for entry in entries if entry['created_at'] >= oldest]
+        if self.max_versions is not None:
+            expired += entries[self.max_versions:]
+
+        for entry in expired:
+            shutil.rmtree(self._path(entry['fingerprint']), ignore_errors=True)
+        return [entry['fingerprint'] for entry in expired]
+
+    def get_or_fit(self, df_train: pd.DataFrame, hyperparameters: Dict[str, Any],
+                   fit: Callable[[], Tuple[Any, Any]]) -> Tuple[Any, Any]:
+        """
+        Load the artifacts trained on the same data and hyperparameters, or fit and register them.
+
+        Args:
+            df_train (pd.DataFrame): Training data, target included.
+            hyperparameters (dict): Everything that changes the fitted artifacts.
+            fit (Callable): Function returning the fitted (preprocessor, model).
+
+        Returns:
+            tuple: The (preprocessor, model).
+        """
+        fingerprint = self.fingerprint(df_train, hyperparameters)
+        artifacts = self.load(fingerprint)
+        if artifacts is None:
+            artifacts = fit()
+            self.save(fingerprint, *artifacts, metadata={
+                'hyperparameters': hyperparameters,
+                'rows': len(df_train),
+            })
+        return artifacts
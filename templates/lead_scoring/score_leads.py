@@ -0,0 +1,165 @@
+import argparse
+import sys
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Iterator, Optional
+
+from registry import ModelRegistry
+from utils import HYPERPARAMETERS, impact_factors, lead_scoring_buckets, split_leads
+
+
+# Fitted artifacts of each worker process, set once by init_worker
+_artifacts = {}
+
+
+def score_chunk(leads: pd.DataFrame, preprocessor: Any, model: Any) -> pd.DataFrame:
+    """
+    Score a chunk of leads.
+
+    Args:
+        leads (pd.DataFrame): Leads with the columns the preprocessor was fitted on.
+        preprocessor: Fitted LeadPreprocessor.
+        model: Fitted classifier with predict_proba.
+
+    Returns:
+        pd.DataFrame: 'Lead ID', 'Probability' (%), 'Lead Scoring' and impact factors of each lead.
+    """
+    X = preprocessor.transform(leads)
+    probabilities = model.predict_proba(X)[:, 1]
+    positive_factors, negative_factors = impact_factors(
+        X, model.coef_[0], preprocessor.means_, preprocessor.feature_names_
+    )
+    return pd.DataFrame({
+        'Lead ID': leads['Lead Number'].values,
+        'Probability': np.round(100 * probabilities, 2),
+        'Lead Scoring': lead_scoring_buckets(probabilities),
+        'Positive Impact Factors': positive_factors,
+        'Negative Impact Factors': negative_factors,
+    })
+
+
+def init_worker(preprocessor: Any, model: Any):
+    _artifacts['preprocessor'] = preprocessor
+    _artifacts['model'] = model
+
+
+def score_chunk_in_worker(leads: pd.DataFrame) -> pd.DataFrame:
+    return score_chunk(leads, _artifacts['preprocessor'], _artifacts['model'])
+
+
+def iter_scores(leads_path: str, preprocessor: Any, model: Any, chunk_rows: int = 100_000,
+                processes: int = 1) -> Iterator[pd.DataFrame]:
+    """
+    Score a leads CSV chunk by chunk, in file order.
+
+    At most 2 * processes chunks are in flight, so memory stays bounded whatever the
+    size of the file.
+    """
+    chunks = pd.read_csv(leads_path, chunksize=chunk_rows)
+    if processes <= 1:
+        for leads in chunks:
+            yield score_chunk(leads, preprocessor, model)
+        return
+
+    with ProcessPoolExecutor(processes, initializer=init_worker,
+                             initargs=(preprocessor, model)) as executor:
+        pending = deque()
+        for leads in chunks:
+            pending.append(executor.submit(score_chunk_in_worker, leads))
+            if len(pending) >= 2 * processes:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def score_leads(leads_path: str, output_path: str, registry_dir: str = 'models',
+                chunk_rows: int = 100_000, processes: int = 1,
+                training_path: str = 'data/Leads.csv', latest: bool = False) -> int:
+    """
+    Score a leads file of any size with a registered model and write the
+    probabilities and 'Lead Scoring' buckets to Parquet, one row group per chunk.
+
+    The model is the one get_data trains on training_path with the current
+    HYPERPARAMETERS, looked up by the same fingerprint. With latest, the most recently
+    used model of the registry is taken instead, whatever it was trained with. The
+    fingerprint of the model is stored as 'model_fingerprint' in the Parquet metadata.
+
+    Args:
+        leads_path (str): CSV file with the leads to score.
+        output_path (str): Parquet file to write.
+        registry_dir (str): Directory of the model registry.
+        chunk_rows (int): Number of leads read and scored at once.
+        processes (int): Number of worker processes.
+        training_path (str): Leads the model was trained on.
+        latest (bool): Use the most recently used model of the registry.
+
+    Returns:
+        int: Number of leads scored.
+    """
+    registry = ModelRegistry(registry_dir)
+    if latest:
+        entries = registry.entries()
+        fingerprint = entries[0]['fingerprint'] if entries else None
+    else:
+        df_train, _ = split_leads(pd.read_csv(training_path))
+        fingerprint = registry.fingerprint(df_train, HYPERPARAMETERS)
+
+    artifacts = registry.load(fingerprint) if fingerprint else None
+    if artifacts is None:
+        if latest:
+            raise FileNotFoundError(
+                f"No model registered in '{registry_dir}', run lead_scoring.py to train one first"
+            )
+        raise FileNotFoundError(
+            f"No model registered in '{registry_dir}' for '{training_path}' and the current "
+            f"HYPERPARAMETERS, run lead_scoring.py to train it or pass --latest"
+        )
+
+    writer: Optional[pq.ParquetWriter] = None
+    scored = 0
+    try:
+        for scores in iter_scores(leads_path, *artifacts, chunk_rows=chunk_rows, processes=processes):
+            table = pa.Table.from_pandas(scores, preserve_index=False)
+            if writer is None:
+                schema = table.schema.with_metadata(
+                    {**(table.schema.metadata or {}), b'model_fingerprint': fingerprint.encode()}
+                )
+                writer = pq.ParquetWriter(output_path, schema)
+            writer.write_table(table)
+            scored += len(scores)
+    finally:
+        if writer is not None:
+            writer.close()
+
+    return scored
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Score a leads file with a registered model')
+    parser.add_argument('leads_path', help='CSV file with the leads to score')
+    parser.add_argument('--output', default='data/lead_scores.parquet', help='Parquet output file')
+    parser.add_argument('--registry-dir', default='models', help='Directory of the model registry')
+    parser.add_argument('--chunk-rows', type=int, default=100_000, help='Leads scored at once')
+    parser.add_argument('--processes', type=int, default=1, help='Number of worker processes')
+    parser.add_argument('--training-data', default='data/Leads.csv',
+                        help='Leads the model was trained on, to find it in the registry')
+    parser.add_argument('--latest', action='store_true',
+                        help='Use the most recently used model of the registry, whatever it was trained with')
+    args = parser.parse_args()
+
+    try:
+        scored = score_leads(args.leads_path, args.output, args.registry_dir,
+                             args.chunk_rows, args.processes, args.training_data, args.latest)
+    except FileNotFoundError as error:
+        sys.exit(str(error))
+    print(f'{scored} leads scored into {args.output}')
+
+
+if __name__ == '__main__':
+    main()
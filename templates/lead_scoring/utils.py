@@ -2,63 +2,147 @@ import pandas as pd
 import numpy as np
 import random
 
-from typing import Dict
+import scipy.sparse as sp
+
+from typing import Dict, List, Optional, Tuple
 
 # for splitting the data
 from sklearn.model_selection import train_test_split
 
 # for model building
 from sklearn.linear_model import LogisticRegression
-from sklearn.feature_extraction import DictVectorizer
 
+from preprocessing import LeadPreprocessor
+from registry import ModelRegistry
 
-def get_data(leads_data_path: str) -> Dict:
-    # This data has been extracted from https://www.kaggle.com/datasets/ashydv/leads-dataset?resource=download
-    leads = pd.read_csv(leads_data_path)
 
-    # The data is just for demo purposes, so it hasn't been cleaned nor preprocessed much
-    for col in leads.columns:
-        if leads[col].dtype in ['object', 'datetime64[ns]']:
-            leads[col] = leads[col].fillna(leads[col].mode()[0])
-        elif leads[col].dtype in ['int64', 'float64', 'int32', 'float32']:
-            leads[col] = leads[col].fillna(leads[col].mean())
+# Everything that changes the fitted preprocessor and model, part of the registry key
+HYPERPARAMETERS = {
+    'model': 'LogisticRegression',
+    'solver': 'liblinear',
+    'test_size': 0.2,
+    'random_state': 42,
+    # Version of the fitted LeadPreprocessor, v2 stores the training means
+    'preprocessor_version': 2,
+}
+
+
+def lead_scoring_buckets(probabilities: np.ndarray) -> np.ndarray:
+    """
+    'High' above 0.75, 'Medium' above 0.5 and 'Low' otherwise.
+    """
+    return np.select([probabilities > 0.75, probabilities > 0.5], ['High', 'Medium'], 'Low')
+
+
+def impact_factors(X: sp.spmatrix, coefficients: np.ndarray, means: np.ndarray,
+                   feature_names: List[str], top: int = 2,
+                   block_rows: int = 50_000) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Names of the features that push each lead's prediction up and down the most.
+
+    The contribution of a feature to a lead is its coefficient times the distance of
+    the transformed value to the training mean, so a lead at the mean of a feature,
+    e.g. an imputed missing value, gets no contribution from it. coefficient * value
+    is computed for the whole batch as one sparse product and coefficient * mean is
+    subtracted block by block. The top contributions of each lead are then selected
+    with argpartition, so only a block is dense at a time.
+
+    Args:
+        X (sp.spmatrix): Transformed leads, one row per lead.
+        coefficients (np.ndarray): Coefficients of the linear model, one per feature.
+        means (np.ndarray): Mean of each feature in the training data.
+        feature_names (list): Name of each feature.
+        top (int): Number of factors of each sign.
+        block_rows (int): Rows made dense at once.
+
+    Returns:
+        tuple: (positive, negative) arrays with the ', ' joined names of each lead, the
+            strongest first. Leads without contributions of a sign get an empty string.
+    """
+    coefficients = np.asarray(coefficients, dtype=np.float64).reshape(-1)
+    contributions = sp.csr_matrix(X).multiply(coefficients.reshape(1, -1)).tocsr()
+    baseline = coefficients * np.asarray(means, dtype=np.float64).reshape(-1)
+    names = np.asarray(feature_names, dtype=object)
+    top = min(top, len(names))
+
+    def strongest(values: np.ndarray) -> np.ndarray:
+        # Top features by value, descending, with '' where the value is not positive
+        index = np.argpartition(-values, top - 1, axis=1)[:, :top]
+        top_values = np.take_along_axis(values, index, axis=1)
+        order = np.argsort(-top_values, axis=1)
+        index = np.take_along_axis(index, order, axis=1)
+        top_values = np.take_along_axis(top_values, order, axis=1)
+
+        # Few distinct combinations repeat over many leads: join the names once per
+        # combination, len(names) stands for "no factor"
+        codes = np.where(top_values > 0, index, len(names))
+        combinations, inverse = np.unique(codes, axis=0, return_inverse=True)
+        labels = np.array([
+            ', '.join(names[code] for code in combination if code < len(names))
+            for combination in combinations
+        ], dtype=object)
+        return labels[inverse.reshape(-1)]
+
+    positive, negative = [], []
+    for start in range(0, contributions.shape[0], block_rows):
+        block = contributions[start:start + block_rows].toarray() - baseline
+        positive.append(strongest(block))
+        negative.append(strongest(-block))
+
+    if not positive:
+        return np.empty(0, dtype=object), np.empty(0, dtype=object)
+    return np.concatenate(positive), np.concatenate(negative)
 
-    df_train, df_test = train_test_split(leads, test_size=0.2)
 
-    y_train = df_train.Converted.values
+def split_leads(leads: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Fixed (train, test) split of the leads, so an unchanged Leads.csv gives the same
+    training data and the same registry fingerprint.
+    """
+    return train_test_split(
+        leads, test_size=HYPERPARAMETERS['test_size'], random_state=HYPERPARAMETERS['random_state']
+    )
+
+
+def get_data(leads_data_path: str, registry_dir: Optional[str] = 'models') -> Dict:
+    # This data has been extracted from https://www.kaggle.com/datasets/ashydv/leads-dataset?resource=download
+    leads = pd.read_csv(leads_data_path)
 
-    del df_train['Converted']
-    del df_test['Converted']
+    df_train, df_test = split_leads(leads)
+    df_test = df_test.drop(columns='Converted')
 
-    train_dic = df_train.to_dict(orient='records')
-    dv = DictVectorizer(sparse=False)
-    dv.fit(train_dic)
+    def fit():
+        # Missing values are imputed and categoricals one-hot encoded column-wise into a
+        # sparse matrix, the fitted preprocessor is reused to transform the test leads
+        preprocessor = LeadPreprocessor()
+        X_train = preprocessor.fit_transform(df_train)
+        model = LogisticRegression(solver=HYPERPARAMETERS['solver'])
+        model.fit(X_train, df_train.Converted.values)
+        return preprocessor, model
 
-    X_train = dv.transform(train_dic)
-    model = LogisticRegression(solver='liblinear')
-    model.fit(X_train, y_train)
+    if registry_dir is None:
+        preprocessor, model = fit()
+    else:
+        preprocessor, model = ModelRegistry(registry_dir).get_or_fit(df_train, HYPERPARAMETERS, fit)
 
-    test_dic = df_test.to_dict(orient='records')
-    X_test = dv.transform(test_dic)
+    X_test = preprocessor.transform(df_test)
     test_prediction = model.predict_proba(X_test)[:, 1]
+    positive_factors, negative_factors = impact_factors(
+        X_test, model.coef_[0], preprocessor.means_, preprocessor.feature_names_
+    )
 
     #------------------ PREDICTION TABLE ------------------#
     binary_prediction_table = pd.DataFrame({
         'Lead ID': df_test['Lead Number'].values,
         'Probability': [round(100 * p, 2) for p in test_prediction],
-        'Lead Scoring': ['High' if v > 0.75 else 'Medium' if v > 0.5 else 'Low' for v in test_prediction],
-        # Get random set of two column names
-        'Positive Impact Factors': [df_test.columns[np.random.randint(0, len(df_test.columns))] + ', ' +
-                                    df_test.columns[np.random.randint(0, len(df_test.columns))]
-                                    for i in range(len(test_prediction))],
-        'Negative Impact Factors': [df_test.columns[np.random.randint(0, len(df_test.columns))] + ', ' +
-                                    df_test.columns[np.random.randint(0, len(df_test.columns))]
-                                    for i in range(len(test_prediction))],
+        'Lead Scoring': lead_scoring_buckets(test_prediction),
+        'Positive Impact Factors': positive_factors,
+        'Negative Impact Factors': negative_factors,
     })
 
     #---------------- FEATURE IMPORTANCE -----------------#
     feature_importance = pd.DataFrame({
-        'Feature': dv.feature_names_,
+        'Feature': preprocessor.feature_names_,
         'Importance (%)': model.coef_[0]
     })
 
@@ -1,5 +1,6 @@
 from shimoku_api_python import Client
 from utils.utils import get_data, compute_percent, cohort_analysis, generate_category, generate_life_time
+from utils.profiling import profile_stage, profiler
 import pandas as pd
 import datetime as dt
 import numpy as np
@@ -26,7 +27,7 @@ class Board:
         # Name of the dashboard
         self.board_name = "Mobile App Template"
         # Get data from CSV files
-        self.dfs = get_data(file_names)
+        self.dfs = profiler.call("load", get_data, file_names)
         # Shimoku client instance
         self.shimoku = shimoku
         # Setting up the board in Shimoku
@@ -34,6 +35,7 @@ class Board:
         # Make the board public
         self.shimoku.boards.update_board(name=self.board_name, is_public=True)
 
+    @profile_stage("transform")
     def transform(self) -> bool:
         """
         Perform data transformations.
@@ -222,6 +224,7 @@ class Board:
 
         return True
 
+    @profile_stage("plot")
     def plot(self):
         """
         A method to plot Cohort Analysis.
@@ -247,4 +250,5 @@ class Board:
         from paths.cohort_analysis import CohortAnalysis
 
         CA = CohortAnalysis(self)
+        profiler.instrument(CA)
         CA.plot()
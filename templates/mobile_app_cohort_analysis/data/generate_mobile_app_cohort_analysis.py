@@ -1,114 +1,95 @@
 # DATA
 
 import pandas as pd
-import random
-from datetime import datetime, timedelta
+from datetime import datetime
+from functools import partial
+from typing import Optional
+
+try:
+    from lifecycle import LifecycleSimulator, ParetoChurn, random_strings
+    from synthetic import Chunk, parse_generator_args, shuffled_proportions, write_dataset
+except ImportError:  # Imported as data.generate_mobile_app_cohort_analysis from the template root
+    from data.lifecycle import LifecycleSimulator, ParetoChurn, random_strings
+    from data.synthetic import Chunk, parse_generator_args, shuffled_proportions, write_dataset
 
 total_data = 1000
 output_file = "active_users.csv"
 date_ini = datetime(2023, 1, 1)
 date_end = datetime(2023, 4, 30)
 
-def generate_data() -> pd.DataFrame:
-    """Generate a CSV file with a data fake
+def make_chunk(chunk: Chunk, simulator: LifecycleSimulator) -> pd.DataFrame:
+    """Generate the users of one chunk of the dataset.
+
+    Args:
+        chunk (Chunk): rows to generate and their random generator
+        simulator (LifecycleSimulator): simulator of the user dates
+
+    Returns:
+        pd.DataFrame: users of the chunk
     """
-    def random_date(start_date: datetime, end_date: datetime) -> datetime:
-        """Generate a random date between two dates using a uniform distribution.
-
-        Args:
-            start_date (datetime): start date
-            end_date (datetime): end date
-
-        Returns:
-            datetime: random date
-        """
-        return start_date + timedelta(
-            days=random.randint(0, (end_date - start_date).days)
-        )
-
-    def random_pareto(start_date: datetime, end_date: datetime) -> datetime:
-        """Generate a random date between two dates using a pareto distribution.
-
-        Args:
-            start_date (datetime): start date
-            end_date (datetime): end date
-
-        Returns:
-            datetime: random date
-        """
-        max_timedelta = end_date - start_date
-        return start_date + timedelta(
-            days=min((random.paretovariate(1) - 1) * 7, max_timedelta.days)
-        )
-    n = total_data
-
-    user_ids = [
-        "".join(random.choices("ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789", k=8))
-        for _ in range(n)
-    ]
-
-    gender_set = (
-        ["Male"] * int(n * 0.4)
-        + ["Female"] * int(n * 0.6)
+    rng = chunk.rng
+    n = chunk.size
+
+    df = simulator.simulate(rng, n)
+    df.insert(0, "user_id", random_strings(rng, "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789", 8, n))
+    df["gender"] = shuffled_proportions(rng, ["Male", "Female"], [0.4, 0.6], n)
+    df["age"] = rng.integers(18, 75, size=n)
+    df["acquisition_source"] = shuffled_proportions(
+        rng, ["Organic", "Google-Ads", "Facebook"], [0.3, 0.5, 0.2], n
     )
-    random.shuffle(gender_set)
 
-    age_set = [random.randint(18, 74) for _ in range(n)]
+    return df
+
 
-    acquisition_source = (
-        ["Organic"] * int(n * 0.3)
-        + ["Google-Ads"] * int(n * 0.5)
-        + ["Facebook"] * int(n * 0.2)
+def generate_data(
+    total_rows: int = total_data,
+    output_file: str = output_file,
+    chunk_rows: int = 1_000_000,
+    processes: int = 1,
+    seed: Optional[int] = None,
+    churn=ParetoChurn(shape=1.0, scale_days=7.0),
+) -> pd.DataFrame:
+    """Generate a CSV or Parquet file with a data fake, chunk by chunk
+
+    Args:
+        total_rows (int): number of users
+        output_file (str): output path, '.csv' or '.parquet'
+        chunk_rows (int): rows generated at once
+        processes (int): number of worker processes
+        seed (int): seed for a reproducible dataset
+        churn: distribution of the days from register to unregister, see data/lifecycle.py
+
+    Returns:
+        pd.DataFrame: first rows of the generated data
+    """
+    # 80% of the users unregister, half of the others logged in within the last 60 days
+    simulator = LifecycleSimulator(
+        start_date=date_ini,
+        end_date=date_end,
+        unregister_rate=0.8,
+        churn=churn,
+        recent_login_rate=0.5,
+        recent_login_days=60,
+    )
+
+    df = write_dataset(
+        partial(make_chunk, simulator=simulator),
+        total_rows,
+        output_file,
+        chunk_rows,
+        processes,
+        seed,
     )
-    random.shuffle(acquisition_source)
-
-    register_dates = [random_date(date_ini, date_end) for _ in range(n)]
-
-    unregister_dates = [
-        random_pareto(register_dates[i], date_end) if random.random() < 0.8 else None
-        for i in range(n)
-    ]
-
-    last_login_dates = []
-    for i in range(n):
-        if unregister_dates[i] is not None:
-            # If unregister_dates[i] is not None, choose a date between register_dates[i] and unregister_dates[i]
-            last_login_dates.append(random_date(register_dates[i], unregister_dates[i]))
-        else:
-            # If unregister_dates[i] is None
-            if random.random() < 0.5:
-                # Generate a date within a window of X days backward from date_end
-                days_to_past = timedelta(days=60)
-                start_window = date_end - days_to_past
-                last_login_dates.append(random_date(max(register_dates[i], start_window), date_end))
-            else:
-                # Choose a date between register_dates[i] and date_end, generate a date within the window of register_dates[i] to date_end
-                last_login_dates.append(random_date(register_dates[i], date_end))
-
-    # Create the DataFrame
-    data = {
-        "user_id": user_ids,
-        "register_date": register_dates,
-        "unregister_date": unregister_dates,
-        "last_login_date": last_login_dates,
-        "gender": gender_set,
-        "age": age_set,
-        "acquisition_source": acquisition_source,
-    }
-
-    df = pd.DataFrame(data)
 
     # Display the DataFrame
-    print("\n### Total registers generated: " + str(len(df)))
+    print("\n### Total registers generated: " + str(total_rows))
     print("\n")
-    print(df.head(10))
+    print(df)
     print("\n\n")
 
-    # Save the dataframe to CSV
-    df.to_csv(output_file, index=False)
-
     return df
 
 
 if __name__ == "__main__":
-    generate_data()
+    args = parse_generator_args(total_data, output_file)
+    generate_data(args.rows, args.output, args.chunk_rows, args.processes, args.seed)
@@ -0,0 +1,253 @@
+import argparse
+import os
+import numpy as np
+import pandas as pd
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Callable, Iterator, Optional, Sequence
+
+
+DEFAULT_CHUNK_ROWS = 1_000_000
+
+
+class Chunk:
+    """
+    Rows [start, start + size) of a synthetic dataset and the random stream that generates them.
+
+    Every chunk gets its own child of the dataset SeedSequence, so a seeded dataset is the
+    same whatever the number of processes used to generate it.
+
+    Attributes:
+        index (int): Position of the chunk in the dataset.
+        start (int): Offset of the first row of the chunk.
+        size (int): Number of rows of the chunk.
+        rng (np.random.Generator): Random generator of the chunk.
+    """
+
+    def __init__(self, index: int, start: int, size: int, seed: np.random.SeedSequence):
+        self.index = index
+        self.start = start
+        self.size = size
+        self.rng = np.random.default_rng(seed)
+
+    def ids(self) -> np.ndarray:
+        """
+        Sequential 1-based ids of the rows of the chunk.
+        """
+        return np.arange(self.start + 1, self.start + self.size + 1)
+
+
+class SortedDates:
+    """
+    Random days between two dates, uniformly distributed and sorted over the whole dataset.
+
+    The number of rows of each day is drawn once with a multinomial, so any chunk takes
+    its slice of the sorted dates from its row offsets and the chunks written one after
+    the other are sorted without a global sort.
+
+    Attributes:
+        days (np.ndarray): Every day of the range, as datetime64.
+        ends (np.ndarray): Cumulative number of rows up to each day, included.
+    """
+
+    def __init__(
+        self, start_date: datetime, end_date: datetime, total_rows: int, rng: np.random.Generator
+    ):
+        self.days = random_days_range(start_date, end_date)
+        counts = rng.multinomial(total_rows, np.full(len(self.days), 1 / len(self.days)))
+        self.ends = np.cumsum(counts)
+
+    def take(self, start: int, size: int) -> np.ndarray:
+        """
+        Dates of the rows [start, start + size) of the dataset.
+        """
+        rows = np.arange(start, start + size)
+        return self.days[np.searchsorted(self.ends, rows, side="right")]
+
+
+def random_days_range(start_date: datetime, end_date: datetime) -> np.ndarray:
+    """
+    Every day from start_date to start_date + (end_date - start_date).days, both included,
+    keeping the time of day of start_date.
+    """
+    start = np.datetime64(pd.Timestamp(start_date), "ns")
+    return start + np.arange((end_date - start_date).days + 1) * np.timedelta64(1, "D")
+
+
+def random_days(
+    rng: np.random.Generator, start_date: datetime, end_date: datetime, size: int
+) -> np.ndarray:
+    """
+    Random dates between two dates with a whole number of days from start_date, the
+    vectorized equivalent of start_date + timedelta(days=random.randint(0, days)).
+
+    Args:
+        rng (np.random.Generator): Random generator.
+        start_date (datetime): First possible date.
+        end_date (datetime): Last possible date.
+        size (int): Number of dates.
+
+    Returns:
+        np.ndarray: datetime64 array of dates.
+    """
+    days = random_days_range(start_date, end_date)
+    return days[rng.integers(0, len(days), size=size)]
+
+
+def uniform_rounded(
+    rng: np.random.Generator, value_range: Sequence[float], size: int, decimals: int = 2
+) -> np.ndarray:
+    """
+    Uniform random values in value_range rounded to decimals.
+    """
+    return np.round(rng.uniform(value_range[0], value_range[1], size=size), decimals)
+
+
+def shuffled_proportions(
+    rng: np.random.Generator, values: Sequence, proportions: Sequence[float], size: int
+) -> np.ndarray:
+    """
+    Shuffled array with each value repeated int(size * proportion) times, the rows left
+    by the rounding are drawn with the same proportions.
+
+    Args:
+        rng (np.random.Generator): Random generator.
+        values (Sequence): Possible values.
+        proportions (Sequence): Proportion of each value, adding up to 1.
+        size (int): Number of values.
+
+    Returns:
+        np.ndarray: The shuffled values.
+    """
+    values = np.asarray(values)
+    proportions = np.asarray(proportions, dtype=np.float64)
+    counts = (size * proportions).astype(np.int64)
+
+    repeated = np.repeat(values, counts)
+    remaining = rng.choice(values, size=size - len(repeated), p=proportions / proportions.sum())
+    return rng.permutation(np.concatenate([repeated, remaining]))
+
+
+def iter_chunks(
+    make_chunk: Callable[[Chunk], pd.DataFrame],
+    total_rows: int,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    processes: int = 1,
+    seed: Optional[int] = None,
+) -> Iterator[pd.DataFrame]:
+    """
+    Generate a dataset chunk by chunk, in order.
+
+    Args:
+        make_chunk (Callable): Function building the DataFrame of a Chunk. It must be
+            defined at module level to be sent to the worker processes.
+        total_rows (int): Number of rows of the dataset.
+        chunk_rows (int): Maximum number of rows of each chunk.
+        processes (int): Number of worker processes, 1 generates in this process.
+        seed (int): Seed of the dataset, None for a random one.
+
+    Yields:
+        pd.DataFrame: The chunks of the dataset.
+    """
+    starts = range(0, total_rows, chunk_rows)
+    seeds = np.random.SeedSequence(seed).spawn(len(starts))
+    chunks = (
+        Chunk(index, start, min(chunk_rows, total_rows - start), seeds[index])
+        for index, start in enumerate(starts)
+    )
+
+    if processes <= 1:
+        yield from map(make_chunk, chunks)
+        return
+
+    # Keep a bounded number of chunks in flight so memory does not grow with the dataset
+    with ProcessPoolExecutor(processes) as executor:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(make_chunk, chunk))
+            if len(pending) >= 2 * processes:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def write_dataset(
+    make_chunk: Callable[[Chunk], pd.DataFrame],
+    total_rows: int,
+    output_file: str,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    processes: int = 1,
+    seed: Optional[int] = None,
+) -> pd.DataFrame:
+    """
+    Generate a dataset chunk by chunk and write it to a CSV or Parquet file, only a
+    few chunks are in memory at any time.
+
+    Args:
+        make_chunk (Callable): Function building the DataFrame of a Chunk.
+        total_rows (int): Number of rows of the dataset.
+        output_file (str): Path of the output, '.parquet' writes one row group per
+            chunk (requires pyarrow), anything else is written as CSV.
+        chunk_rows (int): Maximum number of rows of each chunk.
+        processes (int): Number of worker processes.
+        seed (int): Seed of the dataset, None for a random one.
+
+    Returns:
+        pd.DataFrame: The first rows of the dataset, as a preview.
+    """
+    parquet = os.path.splitext(output_file)[1] == ".parquet"
+    if parquet:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+    writer = None
+    preview = None
+    try:
+        for chunk in iter_chunks(make_chunk, total_rows, chunk_rows, processes, seed):
+            if parquet:
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(output_file, table.schema)
+                writer.write_table(table)
+            else:
+                # The first chunk creates the file with the header, the rest are appended
+                chunk.to_csv(
+                    output_file,
+                    mode="w" if preview is None else "a",
+                    header=preview is None,
+                    index=False,
+                )
+
+            if preview is None:
+                preview = chunk.head(10)
+    finally:
+        if writer is not None:
+            writer.close()
+
+    return preview if preview is not None else pd.DataFrame()
+
+
+def parse_generator_args(total_rows: int, output_file: str, description: Optional[str] = None) -> argparse.Namespace:
+    """
+    Parse the command line options shared by the data generators.
+
+    Args:
+        total_rows (int): Default number of rows.
+        output_file (str): Default output path.
+        description (str): Description shown in --help.
+
+    Returns:
+        argparse.Namespace: rows, output, chunk_rows, processes and seed.
+    """
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--rows", type=int, default=total_rows, help="Number of rows to generate")
+    parser.add_argument(
+        "--output", default=output_file, help="Output file, '.parquet' or '.csv'"
+    )
+    parser.add_argument(
+        "--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS, help="Rows generated at once"
+    )
+    parser.add_argument("--processes", type=int, default=1, help="Number of worker processes")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for a reproducible dataset")
+    return parser.parse_args()
@@ -3,6 +3,7 @@ import os
 from re import sub
 import datetime as dt
 from shimoku_api_python import ShimokuPalette
+from utils.profiling import profile_stage
 
 
 def get_data(file_names: list):
@@ -199,6 +200,7 @@ def generate_life_time(
             }
         for week in range(0,int(sum(activity_weeks) / df_users.shape[0]) + 3)]
 
+@profile_stage()
 def cohort_analysis(
     df_users: pd.DataFrame,
     activity_weeks: pd.DataFrame,
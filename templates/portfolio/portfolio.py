@@ -21,6 +21,7 @@ from utils import (
     data_html_boxbutton, data_html_revenue_prediction,
     data_html_panel, data_html_beautiful_indicator_stock_suite,
 )
+from downsampling import downsample
 
 # Load environment variables
 load_dotenv()
@@ -143,6 +144,8 @@ s.plt.html(
 
 df = pd.read_csv('data/portfolio_predictive_line.csv')
 df['date'] = pd.to_datetime(df['date']).dt.date
+# Keep the shape of the weekly history within a fixed number of points
+df = downsample(df, x='date', y='billing')
 min_date: str = '2022-06-12'
 s.plt.predictive_line(
     # title='Revenue prediction',
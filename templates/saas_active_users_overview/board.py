@@ -1,5 +1,8 @@
 from shimoku_api_python import Client
 from utils.utils import get_data
+from utils.activity import build_user_activity_index, activity_trends
+from utils.streaming import apply_login_checkpoint
+from utils.profiling import profile_stage, profiler
 import pandas as pd
 from datetime import datetime, timedelta
 
@@ -24,11 +27,16 @@ class Board:
 
         file_names = ["data/active_users.csv"]
         self.board_name = "SaaS Template"  # Name of the dashboard
-        self.dfs = get_data(file_names)
+        self.dfs = profiler.call("load", get_data, file_names)
+        # Last logins streamed with ingest_logins.py, if any, are newer than the snapshot
+        self.dfs["active_users"] = apply_login_checkpoint(
+            self.dfs["active_users"], "data/login_checkpoint"
+        )
         self.shimoku = shimoku  # Shimoku client instance
         self.shimoku.set_board(name=self.board_name)  # Setting up the board in Shimoku
         self.shimoku.boards.update_board(name=self.board_name, is_public=True) # Make the board public
         
+    @profile_stage("transform")
     def transform(self):
         """
         Perform data transformations.
@@ -42,61 +50,67 @@ class Board:
         # Note: The DataFrame only contains data for 2023; there are no data for the year 2024 or beyond, for updates modify generate_data.py.
         date_reference = datetime(2023, 11, 30) #datetime.now()
 
+        # Sorted timestamps of the users, every count below is a binary search
+        activity_index = build_user_activity_index(df)
+
         main_kpis = [
             {
                 "title": "Registered Users",
                 "description": "Total of registered users",
-                "value": len(df[df["unregister_date"].isnull()]),
+                "value": activity_index.count_active("registered"),
                 "color": "success",
                 "align": "center",
             },
             {
                 "title": "Active Users 24h",
                 "description": "Active Users on last 24h",
-                "value": len(df[df["last_login_date"] >= (date_reference - timedelta(days=1))]),
+                "value": activity_index.count_since("last_login", date_reference - timedelta(days=1)),
                 "color": "success",
                 "align": "center",
             },
             {
                 "title": "WAU",
                 "description": "Weekly Active Users",
-                "value": len(df[df["last_login_date"] >= (date_reference - timedelta(days=7))]),
+                "value": activity_index.count_since("last_login", date_reference - timedelta(days=7)),
                 "color": "success",
                 "align": "center",
             },
             {
                 "title": "MAU",
                 "description": "Monthly Active Users",
-                "value": len(df[df["last_login_date"] >= (date_reference - timedelta(days=30))]),
+                "value": activity_index.count_since("last_login", date_reference - timedelta(days=30)),
                 "color": "success",
                 "align": "center",
             },
             {
                 "title": "New Users",
                 "description": "New Users in the last 30 days",
-                "value": len(df[df["register_date"] >= (date_reference - timedelta(days=30))]),
+                "value": activity_index.count_since("register", date_reference - timedelta(days=30)),
                 "color": "success",
                 "align": "center",
             },
             {
                 "title": "Subscribers",
                 "description": "Total active newsletter subscribers",
-                "value": len(
-                    df[
-                        (df["subscription_date"].notnull())
-                        & (df["unsubscription_date"].isnull())
-                        & (df["unregister_date"].isnull())
-                    ]
-                ),
+                "value": activity_index.count_active("subscribed"),
                 "color": "success",
                 "align": "center",
             },
         ]
 
-        self.df_app = {"main_kpis": pd.DataFrame(main_kpis)}
+        # Daily trends of the last 90 days, computed for all the days at once
+        activity_trends_df = activity_trends(
+            activity_index, date_reference - timedelta(days=90), date_reference
+        )
+
+        self.df_app = {
+            "main_kpis": pd.DataFrame(main_kpis),
+            "activity_trends": activity_trends_df,
+        }
 
         return True
 
+    @profile_stage("plot")
     def plot(self):
         """
         A method to plot user overview.
@@ -122,4 +136,5 @@ class Board:
         from paths.user_overview import UserOverview
 
         UO = UserOverview(self)
+        profiler.instrument(UO)
         UO.plot()
@@ -0,0 +1,201 @@
+import numpy as np
+import pandas as pd
+from datetime import datetime
+
+
+NANOSECONDS_PER_DAY = 86_400 * 10**9
+NAT = np.datetime64("NaT", "ns")
+
+
+class UniformChurn:
+    """
+    Whole number of days uniformly distributed between 0 and the maximum offset, the
+    vectorized equivalent of timedelta(days=random.randint(0, max_days)).
+    """
+
+    def offsets(self, rng: np.random.Generator, max_days: np.ndarray) -> np.ndarray:
+        return rng.integers(0, np.floor(max_days).astype(np.int64) + 1).astype(np.float64)
+
+
+class ParetoChurn:
+    """
+    Heavy tailed offsets, most users churn in the first days and a few stay for long.
+
+    The offset is (Pareto(shape) - 1) * scale_days days, capped to the maximum offset.
+
+    Attributes:
+        shape (float): Shape of the Pareto distribution, the lower the heavier the tail.
+        scale_days (float): Days the Pareto variate is scaled by.
+    """
+
+    def __init__(self, shape: float = 1.0, scale_days: float = 7.0):
+        self.shape = shape
+        self.scale_days = scale_days
+
+    def offsets(self, rng: np.random.Generator, max_days: np.ndarray) -> np.ndarray:
+        # Generator.pareto draws the Lomax distribution, that is Pareto - 1
+        days = rng.pareto(self.shape, size=len(max_days)) * self.scale_days
+        return np.minimum(days, np.floor(max_days))
+
+
+class ExponentialChurn:
+    """
+    Memoryless offsets, a constant daily probability of churning.
+
+    Attributes:
+        mean_days (float): Mean offset in days.
+    """
+
+    def __init__(self, mean_days: float = 30.0):
+        self.mean_days = mean_days
+
+    def offsets(self, rng: np.random.Generator, max_days: np.ndarray) -> np.ndarray:
+        return np.minimum(rng.exponential(self.mean_days, size=len(max_days)), np.floor(max_days))
+
+
+class WeibullChurn:
+    """
+    Offsets with a churn rate that decreases (shape < 1) or increases (shape > 1) with time.
+
+    Attributes:
+        shape (float): Shape of the Weibull distribution.
+        scale_days (float): Scale of the distribution in days.
+    """
+
+    def __init__(self, shape: float = 0.7, scale_days: float = 30.0):
+        self.shape = shape
+        self.scale_days = scale_days
+
+    def offsets(self, rng: np.random.Generator, max_days: np.ndarray) -> np.ndarray:
+        days = rng.weibull(self.shape, size=len(max_days)) * self.scale_days
+        return np.minimum(days, np.floor(max_days))
+
+
+def random_dates_between(
+    rng: np.random.Generator, starts: np.ndarray, ends: np.ndarray, churn=UniformChurn()
+) -> np.ndarray:
+    """
+    One random date per row between starts and ends.
+
+    Args:
+        rng (np.random.Generator): Random generator.
+        starts (np.ndarray): datetime64[ns] first possible dates.
+        ends (np.ndarray): datetime64[ns] last possible dates, not before starts.
+        churn: Distribution of the offset from starts, with an offsets(rng, max_days) method.
+
+    Returns:
+        np.ndarray: datetime64[ns] dates.
+    """
+    max_days = (ends - starts).astype(np.int64) / NANOSECONDS_PER_DAY
+    offsets = churn.offsets(rng, np.maximum(max_days, 0))
+    return starts + (offsets * NANOSECONDS_PER_DAY).astype(np.int64).astype("timedelta64[ns]")
+
+
+def random_strings(rng: np.random.Generator, alphabet: str, length: int, size: int) -> np.ndarray:
+    """
+    Random strings of the given length drawn from alphabet, e.g. user ids.
+    """
+    characters = np.frombuffer(alphabet.encode(), dtype=np.uint8)
+    codes = characters[rng.integers(0, len(characters), size=(size, length))]
+    return codes.view(f"S{length}").ravel().astype(str)
+
+
+class LifecycleSimulator:
+    """
+    Vectorized simulation of the register, unregister, last login, subscription and
+    unsubscription dates of users.
+
+    Every date is drawn for all the users at once and the conditional rules (only
+    unregistered users have an unregister date, the last login is before it, ...)
+    are applied with boolean masks, so millions of users take a fraction of a second.
+
+    Attributes:
+        start_date (datetime): First possible register date.
+        end_date (datetime): Date of the snapshot, no event happens after it.
+        unregister_rate (float): Fraction of users that unregister.
+        churn: Distribution of the days from register to unregister.
+        recent_login_rate (float): Fraction of the registered users whose last login is
+            within the last recent_login_days days.
+        recent_login_days (int): Length of that recent window.
+        subscription_rate (float): Fraction of users that subscribe.
+        unsubscription_rate (float): Fraction of the subscribers that unsubscribe.
+        unsubscription_churn: Distribution of the days from subscription to unsubscription.
+    """
+
+    def __init__(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        unregister_rate: float,
+        churn=UniformChurn(),
+        recent_login_rate: float = 0.5,
+        recent_login_days: int = 60,
+        subscription_rate: float = 0.0,
+        unsubscription_rate: float = 0.0,
+        unsubscription_churn=UniformChurn(),
+    ):
+        self.start_date = start_date
+        self.end_date = end_date
+        self.unregister_rate = unregister_rate
+        self.churn = churn
+        self.recent_login_rate = recent_login_rate
+        self.recent_login_days = recent_login_days
+        self.subscription_rate = subscription_rate
+        self.unsubscription_rate = unsubscription_rate
+        self.unsubscription_churn = unsubscription_churn
+
+    def simulate(self, rng: np.random.Generator, size: int) -> pd.DataFrame:
+        """
+        Simulate the lifecycle of size users.
+
+        Args:
+            rng (np.random.Generator): Random generator.
+            size (int): Number of users.
+
+        Returns:
+            pd.DataFrame: Columns 'register_date', 'unregister_date', 'last_login_date',
+                and 'subscription_date' and 'unsubscription_date' when users subscribe.
+        """
+        start = np.full(size, np.datetime64(pd.Timestamp(self.start_date), "ns"))
+        end = np.full(size, np.datetime64(pd.Timestamp(self.end_date), "ns"))
+
+        register = random_dates_between(rng, start, end)
+
+        unregistered = rng.random(size) < self.unregister_rate
+        unregister = np.where(
+            unregistered, random_dates_between(rng, register, end, self.churn), NAT
+        )
+
+        # Nothing happens after the user unregisters
+        horizon = np.where(unregistered, unregister, end)
+
+        # Part of the registered users logged in recently, never before they registered
+        recent = ~unregistered & (rng.random(size) < self.recent_login_rate)
+        recent_start = end - np.timedelta64(self.recent_login_days, "D")
+        login_start = np.where(recent, np.maximum(register, recent_start), register)
+        last_login = random_dates_between(rng, login_start, horizon)
+
+        lifecycles = {
+            "register_date": register,
+            "unregister_date": unregister,
+            "last_login_date": last_login,
+        }
+        if self.subscription_rate > 0:
+            subscribed = rng.random(size) < self.subscription_rate
+            subscription = np.where(subscribed, random_dates_between(rng, register, horizon), NAT)
+
+            unsubscribed = subscribed & (rng.random(size) < self.unsubscription_rate)
+            unsubscription = np.where(
+                unsubscribed,
+                random_dates_between(
+                    rng,
+                    np.where(subscribed, subscription, register),
+                    horizon,
+                    self.unsubscription_churn,
+                ),
+                NAT,
+            )
+            lifecycles["subscription_date"] = subscription
+            lifecycles["unsubscription_date"] = unsubscription
+
+        return pd.DataFrame(lifecycles)
@@ -0,0 +1,39 @@
+import argparse
+
+from utils.streaming import LoginEventAggregator
+
+
+def main():
+    """
+    Ingest the login events appended since the previous run.
+
+    This script reads the new lines of the given JSONL/CSV event files, updates the
+    last login of each user and checkpoints the state, which is then picked up by
+    the Board the next time the dashboard is plotted.
+    """
+    parser = argparse.ArgumentParser(description="Ingest new login events")
+    parser.add_argument("files", nargs="+", help="JSONL or CSV files with login events")
+    parser.add_argument(
+        "--checkpoint-dir",
+        default="data/login_checkpoint",
+        help="Directory where the aggregated state is stored",
+    )
+    parser.add_argument("--user-column", default="user_id")
+    parser.add_argument("--timestamp-column", default="login_date")
+    args = parser.parse_args()
+
+    aggregator = LoginEventAggregator(
+        args.checkpoint_dir,
+        user_column=args.user_column,
+        timestamp_column=args.timestamp_column,
+    )
+    changed = aggregator.ingest(args.files)
+
+    print(f"Users with a new login: {changed}")
+    print(f"DAU: {aggregator.active_users(1)}")
+    print(f"WAU: {aggregator.active_users(7)}")
+    print(f"MAU: {aggregator.active_users(30)}")
+
+
+if __name__ == "__main__":
+    main()
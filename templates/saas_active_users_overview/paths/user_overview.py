@@ -38,6 +38,7 @@ class UserOverview(Board):
         self.plot_active_users_weekly()
         self.plot_newsletter_subscribers()
         self.plot_new_users_weekly()
+        self.plot_activity_trends()
 
     def plot_header(self):
         title = "Users overview"
@@ -238,3 +239,22 @@ class UserOverview(Board):
         self.order += 1
 
         return True
+
+    def plot_activity_trends(self):
+        df = self.df_app["activity_trends"]
+
+        # LINE
+        self.shimoku.plt.line(
+            title="Active Users trends (last 90 days)",
+            data=df[["date", "DAU", "WAU", "MAU", "New Users"]].to_dict(orient="records"),
+            x="date",
+            y=["DAU", "WAU", "MAU", "New Users"],
+            x_axis_name="Date",
+            y_axis_name="Users",
+            order=self.order,
+            rows_size=2,
+            cols_size=12,
+        )
+        self.order += 1
+
+        return True
@@ -0,0 +1,306 @@
+import io
+import json
+import os
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set
+from utils.profiling import profile_stage
+
+
+NANOSECONDS_PER_DAY = 86_400 * 10**9
+# Fixed timestamp format of the journal, so that every row parses the same way
+JOURNAL_DATE_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+
+
+class LoginEventAggregator:
+    """
+    Incremental aggregator of an append-only stream of login events.
+
+    The events are read from JSONL or CSV files that only grow, each call to ingest
+    reads the bytes appended since the previous call. The aggregator keeps:
+        - last_seen: the last login of each user, in nanoseconds since epoch.
+        - day_counts: how many users have their last login on each day, so the
+          active users of any window are a sum over its days.
+    Ingesting a batch costs O(batch) and counting the active users of a window
+    costs O(days in the window), whatever the number of users.
+
+    The state, including the read offset of every file, is checkpointed to a
+    directory so the dashboard can refresh often and only pay for the new events:
+    the last logins that changed are appended to a journal, which is compacted
+    once it grows past twice the number of users.
+
+    Attributes:
+        checkpoint_dir (str): Directory where the state is stored.
+        user_column (str): Name of the user id field of the events.
+        timestamp_column (str): Name of the timestamp field of the events.
+    """
+
+    def __init__(
+        self,
+        checkpoint_dir: str,
+        user_column: str = "user_id",
+        timestamp_column: str = "login_date",
+    ):
+        self.checkpoint_dir = checkpoint_dir
+        self.user_column = user_column
+        self.timestamp_column = timestamp_column
+
+        self.last_seen: Dict[str, int] = {}
+        self.day_counts: Dict[int, int] = {}
+        self.offsets: Dict[str, int] = {}
+        self.headers: Dict[str, str] = {}
+
+        # Users changed since the last checkpoint and rows in the journal
+        self.changed_users: Set[str] = set()
+        self.journal_rows = 0
+
+        self.load()
+
+    @property
+    def state_path(self) -> str:
+        return os.path.join(self.checkpoint_dir, "state.json")
+
+    @property
+    def last_seen_path(self) -> str:
+        return os.path.join(self.checkpoint_dir, "last_seen.csv")
+
+    def load(self) -> bool:
+        """
+        Restore the state from the checkpoint directory, if there is one.
+
+        Returns:
+            bool: True if a checkpoint was found.
+        """
+        if not os.path.exists(self.state_path):
+            return False
+
+        with open(self.state_path) as state_file:
+            state = json.load(state_file)
+        self.offsets = state["offsets"]
+        self.headers = state["headers"]
+
+        # A journal row half written by an interrupted checkpoint is skipped, its
+        # events are read again because the offsets were not saved
+        journal = pd.read_csv(self.last_seen_path, dtype={"user_id": str}, on_bad_lines="skip")
+        journal["last_login_date"] = pd.to_datetime(
+            journal["last_login_date"], format=JOURNAL_DATE_FORMAT, errors="coerce"
+        )
+        journal = journal.dropna()
+        self.journal_rows = len(journal)
+
+        last_seen = journal.groupby("user_id")["last_login_date"].max()
+        timestamps = last_seen.to_numpy(dtype="datetime64[ns]").astype(np.int64)
+        self.last_seen = dict(zip(last_seen.index, timestamps.tolist()))
+
+        days, counts = np.unique(
+            np.fromiter(self.last_seen.values(), dtype=np.int64, count=len(self.last_seen))
+            // NANOSECONDS_PER_DAY,
+            return_counts=True,
+        )
+        self.day_counts = dict(zip(days.tolist(), counts.tolist()))
+
+        return True
+
+    def checkpoint(self) -> bool:
+        """
+        Write the state to the checkpoint directory.
+
+        Files are written to a temporary name and renamed, so a refresh that dies
+        half way never leaves a corrupted checkpoint behind.
+
+        Returns:
+            bool: True if the operation is successful.
+        """
+        os.makedirs(self.checkpoint_dir, exist_ok=True)
+
+        appended_rows = self.journal_rows + len(self.changed_users)
+        if os.path.exists(self.last_seen_path) and appended_rows <= 2 * len(self.last_seen):
+            # Append only the users that changed, O(batch)
+            self.to_frame(self.changed_users).to_csv(
+                self.last_seen_path,
+                mode="a",
+                header=False,
+                index=False,
+                date_format=JOURNAL_DATE_FORMAT,
+            )
+            self.journal_rows = appended_rows
+        else:
+            # Compact the journal to one row per user
+            self.to_frame().to_csv(
+                self.last_seen_path + ".tmp", index=False, date_format=JOURNAL_DATE_FORMAT
+            )
+            os.replace(self.last_seen_path + ".tmp", self.last_seen_path)
+            self.journal_rows = len(self.last_seen)
+        self.changed_users = set()
+
+        # The offsets go last: if the process dies before, the events are re-read
+        # and, as taking the max login is idempotent, the state stays correct
+        with open(self.state_path + ".tmp", "w") as state_file:
+            json.dump({"offsets": self.offsets, "headers": self.headers}, state_file)
+        os.replace(self.state_path + ".tmp", self.state_path)
+
+        return True
+
+    def read_new_events(self, file_name: str) -> pd.DataFrame:
+        """
+        Read the complete lines appended to a JSONL or CSV file since the last read.
+
+        A trailing line without its line break is left for the next read, and a file
+        smaller than the stored offset is considered rotated and read from the start.
+
+        Args:
+            file_name (str): Path of the events file, '.jsonl' or '.csv'.
+
+        Returns:
+            pd.DataFrame: The new events with the user and timestamp columns.
+        """
+        offset = self.offsets.get(file_name, 0)
+        if os.path.getsize(file_name) < offset:
+            offset = 0
+
+        with open(file_name, "rb") as events_file:
+            events_file.seek(offset)
+            chunk = events_file.read()
+
+        complete = chunk.rfind(b"\n") + 1
+        chunk = chunk[:complete]
+        self.offsets[file_name] = offset + complete
+
+        columns = [self.user_column, self.timestamp_column]
+        if file_name.endswith(".jsonl"):
+            lines = [json.loads(line) for line in chunk.splitlines() if line.strip()]
+            return pd.DataFrame(lines, columns=columns)
+
+        # CSV: the header is only in the first read, keep it for the next ones
+        if offset == 0 and chunk:
+            header_end = chunk.find(b"\n") + 1
+            self.headers[file_name] = chunk[:header_end].decode()
+            chunk = chunk[header_end:]
+        if not chunk:
+            return pd.DataFrame(columns=columns)
+
+        events = pd.read_csv(
+            io.BytesIO(self.headers[file_name].encode() + chunk),
+            dtype={self.user_column: str},
+        )
+        return events[columns]
+
+    def update(self, events: pd.DataFrame) -> int:
+        """
+        Merge a batch of login events into the state in O(batch).
+
+        Args:
+            events (pd.DataFrame): Events with the user and timestamp columns.
+
+        Returns:
+            int: Number of users whose last login changed.
+        """
+        if events.empty:
+            return 0
+
+        # Exports mix timestamps with and without fractional seconds
+        timestamps = pd.to_datetime(events[self.timestamp_column], format="ISO8601")
+        latest = (
+            pd.Series(timestamps.to_numpy(dtype="datetime64[ns]").astype(np.int64))
+            .groupby(events[self.user_column].astype(str).to_numpy())
+            .max()
+        )
+
+        changed = 0
+        for user_id, timestamp in zip(latest.index, latest.tolist()):
+            previous = self.last_seen.get(user_id)
+            if previous is not None and previous >= timestamp:
+                continue
+            if previous is not None:
+                previous_day = previous // NANOSECONDS_PER_DAY
+                self.day_counts[previous_day] -= 1
+                if not self.day_counts[previous_day]:
+                    del self.day_counts[previous_day]
+            day = timestamp // NANOSECONDS_PER_DAY
+            self.day_counts[day] = self.day_counts.get(day, 0) + 1
+            self.last_seen[user_id] = timestamp
+            self.changed_users.add(user_id)
+            changed += 1
+
+        return changed
+
+    def ingest(self, file_names: List[str], checkpoint: bool = True) -> int:
+        """
+        Read the new events of every file, update the state and checkpoint it.
+
+        Args:
+            file_names (list): Paths of the JSONL or CSV event files.
+            checkpoint (bool): Write the checkpoint after the update.
+
+        Returns:
+            int: Number of users whose last login changed.
+        """
+        changed = sum(self.update(self.read_new_events(file_name)) for file_name in file_names)
+        if checkpoint:
+            self.checkpoint()
+
+        return changed
+
+    def active_users(self, days: int, reference_date: Optional[datetime] = None) -> int:
+        """
+        Count the users whose last login is within the `days` calendar days ending on
+        the reference date, both included.
+
+        Args:
+            days (int): Length of the window in days, 1 for DAU, 7 for WAU, 30 for MAU.
+            reference_date (datetime): Last day of the window, defaults to the day of
+                the latest login seen.
+
+        Returns:
+            int: Number of active users in the window.
+        """
+        if not self.day_counts:
+            return 0
+        if reference_date is None:
+            last_day = max(self.day_counts)
+        else:
+            last_day = pd.Timestamp(reference_date).value // NANOSECONDS_PER_DAY
+
+        return sum(self.day_counts.get(day, 0) for day in range(last_day - days + 1, last_day + 1))
+
+    def to_frame(self, user_ids: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        """
+        Return the last login of the users.
+
+        Args:
+            user_ids (Iterable): Users to return, all of them by default.
+
+        Returns:
+            pd.DataFrame: Columns 'user_id' and 'last_login_date'.
+        """
+        user_ids = list(self.last_seen.keys() if user_ids is None else user_ids)
+        timestamps = np.fromiter(
+            (self.last_seen[user_id] for user_id in user_ids), dtype=np.int64, count=len(user_ids)
+        )
+        return pd.DataFrame(
+            {"user_id": user_ids, "last_login_date": pd.to_datetime(timestamps)}
+        )
+
+
+@profile_stage()
+def apply_login_checkpoint(df: pd.DataFrame, checkpoint_dir: str) -> pd.DataFrame:
+    """
+    Update the 'last_login_date' of the users snapshot with the streamed logins.
+
+    Args:
+        df (pd.DataFrame): Users snapshot with 'user_id' and 'last_login_date' columns.
+        checkpoint_dir (str): Checkpoint directory of a LoginEventAggregator.
+
+    Returns:
+        pd.DataFrame: The snapshot with the latest login of each user.
+    """
+    if not os.path.exists(os.path.join(checkpoint_dir, "state.json")):
+        return df
+
+    streamed = LoginEventAggregator(checkpoint_dir).to_frame()
+    streamed_login = df["user_id"].astype(str).map(streamed.set_index("user_id")["last_login_date"])
+
+    df = df.copy()
+    df["last_login_date"] = pd.concat([df["last_login_date"], streamed_login], axis=1).max(axis=1)
+    return df
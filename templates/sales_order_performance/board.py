@@ -1,5 +1,6 @@
 from shimoku_api_python import Client
 from utils.utils import get_data, process_sales_data
+from utils.profiling import profile_stage, profiler
 
 
 class Board:
@@ -18,11 +19,12 @@ class Board:
 
         file_names = ["data/sales_orders_performance.csv"]
         self.board_name = "FP-Sales Order Performance"  # Name of the dashboard
-        self.df = get_data(file_names)
+        self.df = profiler.call("load", get_data, file_names)
         self.shimoku = shimoku  # Shimoku client instance
         self.shimoku.set_board(name=self.board_name)  # Setting up the board in Shimoku
         self.results = None  # Placeholder for storing processed data
 
+    @profile_stage("transform")
     def transform(self):
         """
         Perform data transformations.
@@ -53,6 +55,7 @@ class Board:
 
         return True
 
+    @profile_stage("plot")
     def plot(self):
         """
         Plot the dashboard.
@@ -67,4 +70,5 @@ class Board:
         from paths.sales_order_perfomance import SalesOrderPerformance
 
         sales_order_performance = SalesOrderPerformance(self)
+        profiler.instrument(sales_order_performance)
         sales_order_performance.plot()
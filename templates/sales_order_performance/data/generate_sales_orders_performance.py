@@ -1,7 +1,13 @@
-import pandas as pd
-import random
-from datetime import datetime, timedelta
 import numpy as np
+import pandas as pd
+from datetime import datetime
+from functools import partial
+from typing import Optional
+
+try:
+    from synthetic import Chunk, SortedDates, parse_generator_args, uniform_rounded, write_dataset
+except ImportError:  # Imported as data.generate_sales_orders_performance from the template root
+    from data.synthetic import Chunk, SortedDates, parse_generator_args, uniform_rounded, write_dataset
 
 # Total number of data points to generate
 total_data = 1000
@@ -20,70 +26,71 @@ cost_range = (15.00, 55.00)
 benefit_factor_range = (1.3, 1.5)
 
 
-def generate_data():
+def make_chunk(chunk: Chunk, dates: SortedDates) -> pd.DataFrame:
     """
-    Generates synthetic sales order performance data and saves it to a CSV file.
+    Generates the orders of one chunk of the dataset.
+
+    Args:
+    chunk (Chunk): Rows to generate and their random generator.
+    dates (SortedDates): Order dates of the whole dataset.
 
     Returns:
-    pd.DataFrame: A DataFrame containing the generated data.
+    pd.DataFrame: The orders of the chunk, sorted by order_date.
     """
+    rng = chunk.rng
+    n = chunk.size
 
-    def random_date(start_date, end_date):
-        """
-        Generates a random date between start_date and end_date.
+    # Generate random order costs within the specified range
+    order_cost_list = uniform_rounded(rng, cost_range, n)
 
-        Args:
-        start_date (datetime): The start date.
-        end_date (datetime): The end date.
+    # Generate random benefit factors and calculate order spend
+    benefit_factors = uniform_rounded(rng, benefit_factor_range, n)
+    order_spend_list = np.round(order_cost_list * benefit_factors, 2)
 
-        Returns:
-        datetime: A random date between start_date and end_date.
-        """
-        return start_date + timedelta(
-            days=random.randint(0, (end_date - start_date).days)
-        )
+    return pd.DataFrame(
+        {
+            "order_date": dates.take(chunk.start, n),
+            "order_id": chunk.ids(),
+            "order_cost": order_cost_list,
+            "order_spend": order_spend_list,
+        }
+    )
 
-    n = total_data
 
-    # Generate random order dates
-    order_date_list = [random_date(date_ini, date_end) for _ in range(n)]
-    order_date_list = sorted(order_date_list)
+def generate_data(
+    total_rows: int = total_data,
+    output_file: str = output_file,
+    chunk_rows: int = 1_000_000,
+    processes: int = 1,
+    seed: Optional[int] = None,
+):
+    """
+    Generates synthetic sales order performance data and saves it to a CSV or Parquet
+    file, chunk by chunk.
 
-    # Generate sequential order IDs
-    order_id_list = [i for i in range(1, n + 1)]
+    Args:
+    total_rows (int): Number of orders to generate.
+    output_file (str): Output path, '.csv' or '.parquet'.
+    chunk_rows (int): Rows generated at once.
+    processes (int): Number of worker processes.
+    seed (int): Seed for a reproducible dataset.
 
-    # Generate random order costs within the specified range
-    order_cost_list = np.round(
-        np.random.uniform(cost_range[0], cost_range[1], size=n), 2
+    Returns:
+    pd.DataFrame: The first rows of the generated data.
+    """
+    dates = SortedDates(date_ini, date_end, total_rows, np.random.default_rng(seed))
+    df = write_dataset(
+        partial(make_chunk, dates=dates), total_rows, output_file, chunk_rows, processes, seed
     )
 
-    # Generate random benefit factors and calculate order spend
-    benefit_factors = np.round(
-        np.random.uniform(benefit_factor_range[0], benefit_factor_range[1], size=n), 2
-    )
-    order_spend_list = np.round(order_cost_list * benefit_factors, 2)
-
-    # Create the DataFrame
-    data = {
-        "order_date": order_date_list,
-        "order_id": order_id_list,
-        "order_cost": order_cost_list,
-        "order_spend": order_spend_list,
-    }
-
-    df = pd.DataFrame(data)
-    df.sort_values(by="order_date", inplace=True)
-
     # Display the DataFrame
-    print("\n### Output CSV: " + output_file + " (" + str(len(df)) + " records)\n")
-    print(df.head(10))
+    print("\n### Output CSV: " + output_file + " (" + str(total_rows) + " records)\n")
+    print(df)
     print("\n")
 
-    # Save the dataframe to CSV
-    df.to_csv(output_file, index=False)
-
     return df
 
 
 if __name__ == "__main__":
-    generate_data()
+    args = parse_generator_args(total_data, output_file)
+    generate_data(args.rows, args.output, args.chunk_rows, args.processes, args.seed)
@@ -5,6 +5,8 @@ from shimoku_api_python import Client
 from dotenv import load_dotenv
 
 from board import Board
+from utils.client_metrics import client_metrics
+from utils.profiling import profiler
 
 
 def main():
@@ -23,6 +25,9 @@ def main():
         universe_id=getenv("UNIVERSE_ID"),
         verbosity="INFO",
     )
+    # Latency and bytes of every client call, written to CLIENT_METRICS_FILE when it is set
+    shimoku = client_metrics.instrument(shimoku)
+    client_metrics.export(getenv("CLIENT_METRICS_FILE"), getenv("CLIENT_METRICS_INTERVAL"))
     shimoku.set_workspace(getenv("WORKSPACE_ID"))
 
     # Instantiate and set up the dashboard
@@ -30,6 +35,10 @@ def main():
     board.transform()  # Perform data transformations
     board.plot()  # Plot the dashboard
 
+    # Time, CPU and memory of each stage, and the trace of the run when TRACE_DIR is set
+    profiler.report(getenv("TRACE_DIR"))
+    client_metrics.report()
+
 
 if __name__ == "__main__":
     main()
@@ -1,6 +1,7 @@
 import pandas as pd
 import calendar
 import os
+from utils.profiling import profile_stage
 
 
 def get_data(file_names):
@@ -21,6 +22,7 @@ def get_data(file_names):
     return dict_dfs
 
 
+@profile_stage()
 def process_sales_data(df):
     """
     Process sales orders performance data from a CSV file.
@@ -1,5 +1,6 @@
 from shimoku_api_python import Client
 from utils.utils import get_data, process_sales_data
+from utils.profiling import profile_stage, profiler
 
 
 class Board:
@@ -18,12 +19,13 @@ class Board:
 
         file_names = ["data/sales_orders.csv"]
         self.board_name = "Ecommerce"  # Name of the dashboard
-        self.df = get_data(file_names)
+        self.df = profiler.call("load", get_data, file_names)
         self.shimoku = shimoku  # Shimoku client instance
         self.shimoku.set_board(name=self.board_name)  # Setting up the board in Shimoku
         self.shimoku.boards.update_board(name=self.board_name, is_public=True)
         self.results = None  # Placeholder for storing processed data
 
+    @profile_stage("transform")
     def transform(self):
         """
         Perform data transformations.
@@ -42,6 +44,7 @@ class Board:
 
         return True
 
+    @profile_stage("plot")
     def plot(self):
         """
         Plot the dashboard.
@@ -64,4 +67,5 @@ class Board:
         )
 
         sales_order_performance = SalesOrdersDashboard(self)
+        profiler.instrument(sales_order_performance)
         sales_order_performance.plot()
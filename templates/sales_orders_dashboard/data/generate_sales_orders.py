@@ -1,9 +1,29 @@
 # DATA
 
-import pandas as pd
-import random
-from datetime import datetime, timedelta
 import numpy as np
+import pandas as pd
+from datetime import datetime
+from functools import partial
+from typing import Optional
+
+try:
+    from synthetic import (
+        Chunk,
+        SortedDates,
+        parse_generator_args,
+        shuffled_proportions,
+        uniform_rounded,
+        write_dataset,
+    )
+except ImportError:  # Imported as data.generate_sales_orders from the template root
+    from data.synthetic import (
+        Chunk,
+        SortedDates,
+        parse_generator_args,
+        shuffled_proportions,
+        uniform_rounded,
+        write_dataset,
+    )
 
 total_data = 1000
 output_file = "sales_orders.csv"
@@ -12,71 +32,50 @@ date_end = datetime.now()
 total_customers = 150
 spend_range = (20.00, 200.00)
 
-def generate_data()-> pd.DataFrame:
-
-    def random_date(start_date, end_date):
-        return start_date + timedelta(
-            days=random.randint(0, (end_date - start_date).days)
-        )
-
-
-    n = total_data
-
-    # order_date
-    order_date_list = [random_date(date_ini, date_end) for _ in range(n)]
-    order_date_list = sorted(order_date_list)
-    
-    # order_id
-    order_id_list = [i for i in range(1, n+1)]
-
-    # customer_id
-    customer_id = [i for i in range(1, total_customers)]
-    customer_id_list = np.random.choice(customer_id, size=n)
-    
-    # order_spend
-    order_spend_list = np.round(np.random.uniform(spend_range[0], spend_range[1], size=n), 2)
+def make_chunk(chunk: Chunk, dates: SortedDates) -> pd.DataFrame:
+    rng = chunk.rng
+    n = chunk.size
 
     # market_segment
-    market_segment_list = (
-        ["Electronics"] * int(n * 0.58)
-        + ["Household items"] * int(n * 0.15)
-        + ["Food and nutrition"] * int(n * 0.27)
+    market_segment_list = shuffled_proportions(
+        rng, ["Electronics", "Household items", "Food and nutrition"], [0.58, 0.15, 0.27], n
     )
-    random.shuffle(market_segment_list)
 
     # geo_segment
-    geo_segment_list = (
-        ["National"] * int(n * 0.72)
-        + ["International"] * int(n * 0.28)
+    geo_segment_list = shuffled_proportions(rng, ["National", "International"], [0.72, 0.28], n)
+
+    return pd.DataFrame(
+        {
+            "order_date": dates.take(chunk.start, n),
+            "order_id": chunk.ids(),
+            "customer_id": rng.integers(1, total_customers, size=n),
+            "order_spend": uniform_rounded(rng, spend_range, n),
+            "market_segment": market_segment_list,
+            "geo_segment": geo_segment_list
+        }
     )
-    random.shuffle(geo_segment_list)
 
 
-    
-    # Create the DataFrame
-    data = {
-        "order_date": order_date_list,
-        "order_id": order_id_list,
-        "customer_id": customer_id_list,
-        "order_spend": order_spend_list,
-        "market_segment": market_segment_list,
-        "geo_segment": geo_segment_list
-    }
-
-    df = pd.DataFrame(data)
-    df.sort_values(by='order_date', inplace=True)
+def generate_data(
+    total_rows: int = total_data,
+    output_file: str = output_file,
+    chunk_rows: int = 1_000_000,
+    processes: int = 1,
+    seed: Optional[int] = None,
+) -> pd.DataFrame:
+    dates = SortedDates(date_ini, date_end, total_rows, np.random.default_rng(seed))
+    df = write_dataset(
+        partial(make_chunk, dates=dates), total_rows, output_file, chunk_rows, processes, seed
+    )
 
     # Display the DataFrame
-    print("\n### Output CSV: " + output_file + " (" + str(len(df)) + " registers)\n")    
-    print(df.head(10))
+    print("\n### Output CSV: " + output_file + " (" + str(total_rows) + " registers)\n")    
+    print(df)
     print("\n")
 
-    # Save the dataframe to CSV
-    df.to_csv(output_file, index=False)
-
-    
     return df
 
 
 if __name__ == "__main__":
-    generate_data()
+    args = parse_generator_args(total_data, output_file)
+    generate_data(args.rows, args.output, args.chunk_rows, args.processes, args.seed)
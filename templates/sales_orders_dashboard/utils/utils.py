@@ -1,6 +1,7 @@
 import pandas as pd
 import os
 from typing import List
+from utils.profiling import profile_stage
 
 
 def get_data(file_names: List[str]):
@@ -21,6 +22,7 @@ def get_data(file_names: List[str]):
     return dict_dfs
 
 
+@profile_stage()
 def process_sales_data(df: pd.DataFrame):
     """
     Process sales orders performance data.
@@ -1,5 +1,6 @@
 from shimoku_api_python import Client
 from utils import get_data, groupby_sum
+from profiling import profile_stage, profiler
 import pandas as pd
 import calendar
 import numpy as np
@@ -25,13 +26,14 @@ class Board:
         file_names = ["data/sales_product_performance.csv"]
         # Name of the dashboard
         self.board_name = "Sales Product Performance"  
-        self.dfs = get_data(file_names)
+        self.dfs = profiler.call("load", get_data, file_names)
 
         # Shimoku client instance
         self.shimoku = shimoku  
         self.shimoku.set_board(name=self.board_name)
         self.shimoku.boards.update_board(name=self.board_name, is_public=True)
 
+    @profile_stage("transform")
     def transform(self):
         """
         Perform data transformations.
@@ -142,6 +144,7 @@ class Board:
 
         return True
 
+    @profile_stage("plot")
     def plot(self):
         """
         A method to plot overview.
@@ -167,4 +170,5 @@ class Board:
         from paths.overview import Overview
 
         overview_path = Overview(self)
+        profiler.instrument(overview_path)
         overview_path.plot()
@@ -1,9 +1,29 @@
 # DATA
 
-import pandas as pd
-import random
-from datetime import datetime, timedelta
 import numpy as np
+import pandas as pd
+from datetime import datetime
+from functools import partial
+from typing import Optional
+
+try:
+    from synthetic import (
+        Chunk,
+        SortedDates,
+        parse_generator_args,
+        shuffled_proportions,
+        uniform_rounded,
+        write_dataset,
+    )
+except ImportError:  # Imported as data.generate_sales_product_performance from the template root
+    from data.synthetic import (
+        Chunk,
+        SortedDates,
+        parse_generator_args,
+        shuffled_proportions,
+        uniform_rounded,
+        write_dataset,
+    )
 
 total_data = 1000
 output_file = "sales_product_performance.csv"
@@ -14,85 +34,67 @@ cost_range = (15.00, 55.00)
 benefit_factor_range = (1.3, 1.5)
 
 
-def generate_data():
-    def random_date(start_date: datetime, end_date: datetime):
-        return start_date + timedelta(
-            days=random.randint(0, (end_date - start_date).days)
-        )
-
-    n = total_data
-
-    # sale_date
-    sale_date_list = [random_date(date_ini, date_end) for _ in range(n)]
-
-    # product_name
-    product_names = [f"Product_{i}" for i in range(1, total_products + 1)]
-    costs = np.round(
-        np.random.uniform(cost_range[0], cost_range[1], size=total_products), 2
-    )
-    benefit_factors = np.round(
-        np.random.uniform(
-            benefit_factor_range[0],
-            benefit_factor_range[1],
-            size=total_products,
-        ),
-        2,
-    )
-    benefits = np.round(costs * benefit_factors, 2)
-
-    products = {}
-    for i, product_name in enumerate(product_names):
-        products[product_name] = {
-            "cost": costs[i],
-            "benefit": benefits[i],
-        }
+def make_chunk(
+    chunk: Chunk, dates: SortedDates, costs: np.ndarray, benefits: np.ndarray
+) -> pd.DataFrame:
+    rng = chunk.rng
+    n = chunk.size
 
-    product_name_list = np.random.choice(product_names, size=n)
+    # product_name, cost and revenue looked up by product position
+    products = rng.integers(0, total_products, size=n)
+    product_names = np.array([f"Product_{i}" for i in range(1, total_products + 1)])
 
     # origin_campaign
-    origin_campaign_list = (
-        ["Organic"] * int(n * 0.25)
-        + ["Email"] * int(n * 0.55)
-        + ["Google-Ads"] * int(n * 0.05)
-        + ["Facebook"] * int(n * 0.15)
+    origin_campaign_list = shuffled_proportions(
+        rng, ["Organic", "Email", "Google-Ads", "Facebook"], [0.25, 0.55, 0.05, 0.15], n
     )
-    random.shuffle(origin_campaign_list)
 
     # sale_type
-    sale_type_list = ["Online"] * int(n * 0.4) + ["In-Store"] * int(n * 0.6)
-    random.shuffle(sale_type_list)
-
-    # revenue
-    revenue_list = np.array(
-        [products[product]["benefit"] for product in product_name_list]
+    sale_type_list = shuffled_proportions(rng, ["Online", "In-Store"], [0.4, 0.6], n)
+
+    return pd.DataFrame(
+        {
+            "sale_date": dates.take(chunk.start, n),
+            "product_name": product_names[products],
+            "origin_campaign": origin_campaign_list,
+            "sale_type": sale_type_list,
+            "cost": costs[products],
+            "revenue": benefits[products],
+        }
     )
 
-    # cost
-    cost_list = np.array([products[product]["cost"] for product in product_name_list])
 
-    # Create the DataFrame
-    data = {
-        "sale_date": sale_date_list,
-        "product_name": product_name_list,
-        "origin_campaign": origin_campaign_list,
-        "sale_type": sale_type_list,
-        "cost": cost_list,
-        "revenue": revenue_list,
-    }
-
-    df = pd.DataFrame(data)
-    df.sort_values(by="sale_date", inplace=True)
+def generate_data(
+    total_rows: int = total_data,
+    output_file: str = output_file,
+    chunk_rows: int = 1_000_000,
+    processes: int = 1,
+    seed: Optional[int] = None,
+):
+    # The products, with their cost and benefit, are shared by every chunk
+    rng = np.random.default_rng(seed)
+    costs = uniform_rounded(rng, cost_range, total_products)
+    benefit_factors = uniform_rounded(rng, benefit_factor_range, total_products)
+    benefits = np.round(costs * benefit_factors, 2)
+    dates = SortedDates(date_ini, date_end, total_rows, rng)
+
+    df = write_dataset(
+        partial(make_chunk, dates=dates, costs=costs, benefits=benefits),
+        total_rows,
+        output_file,
+        chunk_rows,
+        processes,
+        seed,
+    )
 
     # Display the DataFrame
-    print("\n### Output CSV: " + output_file + " (" + str(len(df)) + " registers)\n")
-    print(df.head(10))
+    print("\n### Output CSV: " + output_file + " (" + str(total_rows) + " registers)\n")
+    print(df)
     print("\n")
 
-    # Save the dataframe to CSV
-    df.to_csv(output_file, index=False)
-
     return df
 
 
 if __name__ == "__main__":
-    generate_data()
+    args = parse_generator_args(total_data, output_file)
+    generate_data(args.rows, args.output, args.chunk_rows, args.processes, args.seed)
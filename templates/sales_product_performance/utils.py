@@ -1,6 +1,7 @@
 import pandas as pd
 import os
 from typing import List
+from profiling import profile_stage
 
 
 def get_data(file_names: List[str]):
@@ -67,6 +68,7 @@ def beautiful_indicator(title: str):
     )
 
 
+@profile_stage()
 def groupby_sum(df: pd.DataFrame, groupby_col: str, sum_col: str):
     """
     Group a DataFrame and sum a specific column.
@@ -0,0 +1,321 @@
+import atexit
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from functools import wraps
+from inspect import isclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import pandas as pd
+
+# Upper bounds in milliseconds of the latency histogram buckets, the last bucket has no bound
+LATENCY_BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+# Attributes of shimoku_api_python.Client that group the API calls
+CLIENT_APIS = (
+    "plt", "boards", "menu_paths", "components", "data", "io",
+    "activities", "workspaces", "universes", "ping", "ai",
+)
+
+
+def json_size(value: Any) -> int:
+    """
+    Bytes of value as JSON, 0 for None.
+    """
+    if value is None:
+        return 0
+    if isinstance(value, (str, bytes)):
+        return len(value.encode() if isinstance(value, str) else value)
+    return len(json.dumps(value, default=str).encode())
+
+
+def api_resource(url: str) -> str:
+    """
+    Last resource of an API url without its id,
+    e.g. report for .../business/<id>/app/<id>/report/<id>.
+    """
+    path = urlsplit(url).path.split("/v1/", 1)[-1].strip("/")
+    return path.split("/")[0::2][-1] if path else ""
+
+
+class LatencyHistogram:
+    """
+    Latency histogram of one kind of call, with the bytes sent and received.
+
+    Attributes:
+        buckets (List[int]): Calls per bucket of LATENCY_BUCKETS_MS, the last one for slower calls.
+        count (int): Number of calls.
+        errors (int): Calls that raised.
+        total_ms (float): Sum of the latencies.
+        max_ms (float): Slowest call.
+        request_bytes (int): Bytes sent.
+        response_bytes (int): Bytes received.
+    """
+
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.count = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.min_ms = None
+        self.max_ms = 0.0
+        self.request_bytes = 0
+        self.response_bytes = 0
+
+    def record(self, ms: float, request_bytes: int = 0, response_bytes: int = 0, error: bool = False):
+        bucket = 0
+        while bucket < len(LATENCY_BUCKETS_MS) and ms > LATENCY_BUCKETS_MS[bucket]:
+            bucket += 1
+        self.buckets[bucket] += 1
+        self.count += 1
+        self.errors += error
+        self.total_ms += ms
+        self.min_ms = ms if self.min_ms is None else min(self.min_ms, ms)
+        self.max_ms = max(self.max_ms, ms)
+        self.request_bytes += request_bytes
+        self.response_bytes += response_bytes
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Upper bound of the bucket of the q quantile, the slowest call when it is in the last bucket.
+        """
+        if not self.count:
+            return None
+        seen = 0
+        for bucket, calls in enumerate(self.buckets):
+            seen += calls
+            if seen >= q * self.count:
+                break
+        bound = LATENCY_BUCKETS_MS[bucket] if bucket < len(LATENCY_BUCKETS_MS) else self.max_ms
+        return round(min(bound, self.max_ms), 3)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "total_ms": round(self.total_ms, 3),
+            "mean_ms": round(self.total_ms / self.count, 3) if self.count else None,
+            "min_ms": None if self.min_ms is None else round(self.min_ms, 3),
+            "p50_ms": self.quantile(0.5),
+            "p95_ms": self.quantile(0.95),
+            "max_ms": round(self.max_ms, 3),
+            "request_bytes": self.request_bytes,
+            "response_bytes": self.response_bytes,
+            "buckets": list(self.buckets),
+        }
+
+
+class InstrumentedApi:
+    """
+    Proxy of a Client or one of its APIs (plt, boards, menu_paths...) that times
+    every public method call in ClientMetrics. Attributes are read from the
+    wrapped object at each access, so APIs replaced by set_workspace or
+    set_menu_path are instrumented too.
+    """
+
+    def __init__(self, target: Any, metrics: "ClientMetrics", prefix: str = ""):
+        object.__setattr__(self, "_target", target)
+        object.__setattr__(self, "_metrics", metrics)
+        object.__setattr__(self, "_prefix", prefix)
+
+    def __getattr__(self, attribute: str) -> Any:
+        value = getattr(self._target, attribute)
+        if attribute.startswith("_") or isclass(value):
+            return value
+        if not self._prefix and attribute in CLIENT_APIS:
+            return InstrumentedApi(value, self._metrics, f"{attribute}.")
+        if callable(value):
+            return self._metrics.timed(f"{self._prefix}{attribute}", value)
+        return value
+
+    def __setattr__(self, attribute: str, value: Any):
+        setattr(self._target, attribute, value)
+
+
+class ClientMetrics:
+    """
+    Latency histograms of the calls made to a shimoku_api_python.Client, to see
+    which calls dominate the publishing time.
+
+    Two series are kept:
+        calls: one histogram per Client method, e.g. plt.bar, plt.indicator,
+            menu_paths.delete_all_menu_path_components or run. The bytes are
+            those of the HTTP requests made during the call, with
+            async_execution they are made, and counted, in run().
+        requests: one histogram per HTTP method, API resource and component
+            type (reportType of the report sent or received), e.g.
+            POST report ECHARTS2. The bytes are the JSON sizes of the request
+            body and of the response.
+
+    Works the same with the local server of the SDK (universe_id='local'
+    without access_token), so it can be run against a fake server on local_port.
+    """
+
+    def __init__(self):
+        self.calls: Dict[str, LatencyHistogram] = {}
+        self.requests: Dict[Tuple[str, str, str], LatencyHistogram] = {}
+        self.created = datetime.now()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._stop = None
+
+    def _open_calls(self) -> List[List[int]]:
+        if not hasattr(self._local, "open_calls"):
+            self._local.open_calls = []
+        return self._local.open_calls
+
+    def timed(self, name: str, function: Callable) -> Callable:
+        """
+        function recording each of its calls in the calls series as name.
+        """
+
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            sizes = [0, 0]
+            open_calls = self._open_calls()
+            open_calls.append(sizes)
+            error = True
+            start = time.perf_counter()
+            try:
+                result = function(*args, **kwargs)
+                error = False
+                return result
+            finally:
+                ms = (time.perf_counter() - start) * 1000
+                open_calls.remove(sizes)
+                with self._lock:
+                    histogram = self.calls.setdefault(name, LatencyHistogram())
+                    histogram.record(ms, sizes[0], sizes[1], error)
+
+        return wrapper
+
+    def record_request(self, method: str, url: str, body: Any, response: Any, ms: float, error: bool):
+        """
+        Records a HTTP request in the requests series and adds its bytes to the open calls.
+        """
+        component = ""
+        for payload in (body, response):
+            if isinstance(payload, dict) and payload.get("reportType"):
+                component = payload["reportType"]
+                break
+        request_bytes, response_bytes = json_size(body), json_size(response)
+        for sizes in self._open_calls():
+            sizes[0] += request_bytes
+            sizes[1] += response_bytes
+        with self._lock:
+            histogram = self.requests.setdefault((method, api_resource(url), component), LatencyHistogram())
+            histogram.record(ms, request_bytes, response_bytes, error)
+
+    def _instrument_requests(self, api_client: Any):
+        request = api_client.request
+        if getattr(request, "client_metrics", None) is self:
+            return
+
+        @wraps(request)
+        async def instrumented_request(method, url, *args, **kwargs):
+            body = kwargs.get("body", args[2] if len(args) > 2 else None)
+            response = None
+            error = True
+            start = time.perf_counter()
+            try:
+                response = await request(method, url, *args, **kwargs)
+                error = False
+                return response
+            finally:
+                ms = (time.perf_counter() - start) * 1000
+                self.record_request(method, url, body, response, ms, error)
+
+        instrumented_request.client_metrics = self
+        api_client.request = instrumented_request
+
+    def instrument(self, client: Any) -> InstrumentedApi:
+        """
+        Proxy of client, used in its place, that records its calls and their HTTP requests.
+        """
+        api_client = getattr(client, "_api_client", None)
+        if api_client is not None and hasattr(api_client, "request"):
+            self._instrument_requests(api_client)
+        return InstrumentedApi(client, self)
+
+    def summary(self) -> pd.DataFrame:
+        """
+        One row per kind of call and of request, the slowest in total first.
+        """
+        with self._lock:
+            rows = [{"series": "call", "name": name, **histogram.to_dict()} for name, histogram in self.calls.items()]
+            rows += [
+                {"series": "request", "name": " ".join(part for part in key if part), **histogram.to_dict()}
+                for key, histogram in self.requests.items()
+            ]
+        columns = [
+            "series", "name", "count", "errors", "total_ms", "mean_ms",
+            "p50_ms", "p95_ms", "max_ms", "request_bytes", "response_bytes",
+        ]
+        summary = pd.DataFrame(rows, columns=columns)
+        return summary.sort_values(["series", "total_ms"], ascending=[True, False], ignore_index=True)
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "started": self.created.isoformat(),
+                "exported": datetime.now().isoformat(),
+                "bucket_bounds_ms": list(LATENCY_BUCKETS_MS),
+                "calls": [
+                    {"method": name, **histogram.to_dict()}
+                    for name, histogram in sorted(self.calls.items())
+                ],
+                "requests": [
+                    {"method": method, "resource": resource, "component": component, **histogram.to_dict()}
+                    for (method, resource, component), histogram in sorted(self.requests.items())
+                ],
+            }
+
+    def write(self, path: str) -> str:
+        """
+        Writes the metrics as JSON, with a temporary name and renamed.
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path + ".tmp", "w") as file:
+            json.dump(self.to_dict(), file, indent=1)
+        os.replace(path + ".tmp", path)
+        return path
+
+    def export(self, path: Optional[str], interval: Optional[float] = None):
+        """
+        Writes the metrics file at exit and, when interval is given, every
+        interval seconds meanwhile. Nothing is done without a path.
+
+        Args:
+            path: Path of the JSON file.
+            interval: Seconds between writes, a number or a string as read from the environment.
+        """
+        if not path:
+            return
+        atexit.register(self.write, path)
+        interval = float(interval) if interval else 0
+        if interval > 0 and self._stop is None:
+            self._stop = threading.Event()
+            atexit.register(self._stop.set)
+
+            def write_periodically():
+                while not self._stop.wait(interval):
+                    self.write(path)
+
+            threading.Thread(target=write_periodically, name="client-metrics", daemon=True).start()
+
+    def report(self):
+        """
+        Prints the summary of the calls and requests.
+        """
+        summary = self.summary()
+        if len(summary):
+            print(summary.to_string(index=False))
+
+
+# Metrics of the Shimoku client of the run
+client_metrics = ClientMetrics()
@@ -0,0 +1,74 @@
+import argparse
+import os
+import sys
+
+# Modules kept here and copied into the templates that use them
+MODULES = ('profiling.py', 'client_metrics.py')
+
+# Template -> directory of its modules, relative to the template
+TEMPLATES = {
+    'backoffice': '',
+    'customer_orders_performance': 'utils',
+    'customer_satisfaction_performance': 'utils',
+    'ecommerce_facebook_ads': '',
+    'ecommerce_sales_users_analysis': '',
+    'mobile_app_cohort_analysis': 'utils',
+    'saas_active_users_overview': 'utils',
+    'sales_order_performance': 'utils',
+    'sales_orders_dashboard': 'utils',
+    'sales_product_performance': '',
+    'social_media_shares_performance': 'utils',
+    'store_overview': 'utils',
+    'store_product_performance': 'utils',
+}
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+TEMPLATES_DIR = os.path.dirname(HERE)
+
+
+def vendored(module: str) -> str:
+    """
+    Content of the copy of a shared module, marked as generated.
+    """
+    with open(os.path.join(HERE, module)) as file:
+        source = file.read()
+    header = f"# Copied from templates/shared/{module}, edit it there and run templates/shared/vendor.py\n"
+    return header + source
+
+
+def copies():
+    """
+    Path of every copy and the content it should have.
+    """
+    for module in MODULES:
+        content = vendored(module)
+        for template, directory in TEMPLATES.items():
+            yield os.path.join(TEMPLATES_DIR, template, directory, module), content
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Copies the shared modules into the templates')
+    parser.add_argument('--check', action='store_true', help='Only list the copies that are out of date')
+    args = parser.parse_args()
+
+    outdated = []
+    for path, content in copies():
+        current = None
+        if os.path.exists(path):
+            with open(path) as file:
+                current = file.read()
+        if current == content:
+            continue
+        outdated.append(path)
+        if not args.check:
+            with open(path, 'w', newline='\n') as file:
+                file.write(content)
+
+    for path in outdated:
+        print(os.path.relpath(path, TEMPLATES_DIR))
+    if args.check and outdated:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
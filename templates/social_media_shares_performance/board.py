@@ -1,5 +1,7 @@
 from shimoku_api_python import Client
 from utils.utils import get_data
+from utils.metrics import Metric, compute_metrics
+from utils.profiling import profile_stage, profiler
 import pandas as pd
 import calendar
 
@@ -25,7 +27,7 @@ class Board:
         # Name of the dashboard
         self.board_name = "eCommerce"
         # Get the data from CSV file
-        self.dfs = get_data(file_names)
+        self.dfs = profiler.call("load", get_data, file_names)
         # Shimoku client instance
         self.shimoku = shimoku
         # Setting up the board in Shimoku
@@ -33,6 +35,7 @@ class Board:
         # Make the board public
         self.shimoku.boards.update_board(name=self.board_name, is_public=True)
 
+    @profile_stage("transform")
     def transform(self) -> bool:
         """
         Perform data transformations.
@@ -43,74 +46,74 @@ class Board:
 
         df_social_media = self.dfs["social_media_shares"]
 
-        # Main KPIs
+        networks = ["Facebook", "Twitter", "YouTube"]
+        post_month = df_social_media["post_date"].dt.month
+
+        # Main KPIs, evaluated together in a single pass
+        kpi_values = compute_metrics(
+            df_social_media,
+            [
+                Metric(
+                    title,
+                    "sum",
+                    column="post_shares",
+                    where=[("post_social_media", "==", network)],
+                )
+                for title, network in [
+                    ("Facebook Shares", "Facebook"),
+                    ("Twitter Retweets", "Twitter"),
+                    ("Youtube Shares", "YouTube"),
+                ]
+            ],
+        )
+
         main_kpis = [
-            # Total Facebook Shares
-            {
-                "title": "Facebook Shares",
-                "value": df_social_media[
-                    df_social_media["post_social_media"] == "Facebook"
-                ]["post_shares"].sum(),
-                "color": "default",
-                "align": "center",
-            },
-            # Total Twitter Retweets
-            {
-                "title": "Twitter Retweets",
-                "value": df_social_media[
-                    df_social_media["post_social_media"] == "Twitter"
-                ]["post_shares"].sum(),
-                "color": "default",
-                "align": "center",
-            },
-            # Total Youtube Shares
             {
-                "title": "Youtube Shares",
-                "value": df_social_media[
-                    df_social_media["post_social_media"] == "YouTube"
-                ]["post_shares"].sum(),
+                "title": title,
+                "value": value,
                 "color": "default",
                 "align": "center",
-            },
+            }
+            for title, value in kpi_values.items()
         ]
 
+        # Monthly posts and shares by social media, evaluated in a single grouped pass
+        monthly_values = compute_metrics(
+            df_social_media,
+            [
+                Metric(
+                    f"{network} posts",
+                    where=[("post_social_media", "==", network)],
+                )
+                for network in networks
+            ]
+            + [
+                Metric(
+                    network,
+                    "sum",
+                    column="post_shares",
+                    where=[("post_social_media", "==", network)],
+                )
+                for network in networks
+            ],
+            by=post_month,
+            groups=range(1, 13),
+        )
+        monthly_values.insert(
+            0, "Month", [calendar.month_name[month][:3] for month in monthly_values.index]
+        )
+
         # Social Media Post
-        social_media_posts = [
-            {
-                "Month": calendar.month_name[month][:3],
-                "Facebook": df_social_media[
-                    (df_social_media["post_date"].dt.month == month) &
-                    (df_social_media["post_social_media"] == "Facebook")
-                ].shape[0],
-                "Twitter": df_social_media[
-                    (df_social_media["post_date"].dt.month == month) &
-                    (df_social_media["post_social_media"] == "Twitter")
-                ].shape[0],
-                "YouTube": df_social_media[
-                    (df_social_media["post_date"].dt.month == month) &
-                    (df_social_media["post_social_media"] == "YouTube")
-                ].shape[0],
-            }
-        for month in range(10,13)]
+        social_media_posts = (
+            monthly_values.loc[10:12, ["Month"] + [f"{network} posts" for network in networks]]
+            .rename(columns={f"{network} posts": network for network in networks})
+            .to_dict(orient="records")
+        )
 
         # Shares by Social Media
-        share_by_social_media = [
-            {
-                "Month": calendar.month_name[month][:3],
-                "Facebook": df_social_media[
-                    (df_social_media["post_date"].dt.month == month) &
-                    (df_social_media["post_social_media"] == "Facebook")
-                ]["post_shares"].sum(),
-                "Twitter": df_social_media[
-                    (df_social_media["post_date"].dt.month == month) &
-                    (df_social_media["post_social_media"] == "Twitter")
-                ]["post_shares"].sum(),
-                "YouTube": df_social_media[
-                    (df_social_media["post_date"].dt.month == month) &
-                    (df_social_media["post_social_media"] == "YouTube")
-                ]["post_shares"].sum(),
-            }
-        for month in range(1,13)]
+        share_by_social_media = monthly_values[["Month"] + networks].to_dict(
+            orient="records"
+        )
 
         # Dictionary of the dataframes
         self.df_app = {
@@ -121,6 +124,7 @@ class Board:
 
         return True
 
+    @profile_stage("plot")
     def plot(self):
         """
         A method to plot Social Media Shares Performance.
@@ -146,4 +150,5 @@ class Board:
         from paths.social_media_shares_performance import SocialMediaSharesPerformance
 
         SM = SocialMediaSharesPerformance(self)
+        profiler.instrument(SM)
         SM.plot()
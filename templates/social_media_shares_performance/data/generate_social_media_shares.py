@@ -1,9 +1,15 @@
 # DATA
 
-import pandas as pd
-import random
-from datetime import datetime, timedelta
 import numpy as np
+import pandas as pd
+from datetime import datetime
+from functools import partial
+from typing import Optional
+
+try:
+    from synthetic import Chunk, SortedDates, parse_generator_args, shuffled_proportions, write_dataset
+except ImportError:  # Imported as data.generate_social_media_shares from the template root
+    from data.synthetic import Chunk, SortedDates, parse_generator_args, shuffled_proportions, write_dataset
 
 total_data = 1000
 output_file = "social_media_shares.csv"
@@ -11,54 +17,47 @@ date_ini = datetime(2023, 1, 1)
 date_end = datetime.now()
 share_range = (0, 1000)
 
-def generate_data():
-
-    def random_date(start_date, end_date):
-        return start_date + timedelta(
-            days=random.randint(0, (end_date - start_date).days)
-        )
-
-    n = total_data
-
-    # post_date
-    post_date_list = [random_date(date_ini, date_end) for _ in range(n)]
-    post_date_list = sorted(post_date_list)
-
-
-    # post_id
-    post_id_list = [i for i in range(1, n+1)]
-
+def make_chunk(chunk: Chunk, dates: SortedDates) -> pd.DataFrame:
+    rng = chunk.rng
+    n = chunk.size
 
     # post_social_media
-    post_social_media_list = (
-        ["Facebook"] * int(n * 0.55)
-        + ["Twitter"] * int(n * 0.25)
-        + ["YouTube"] * int(n * 0.20)
+    post_social_media_list = shuffled_proportions(
+        rng, ["Facebook", "Twitter", "YouTube"], [0.55, 0.25, 0.20], n
     )
-    random.shuffle(post_social_media_list)
 
     # post_shares
-    post_shares_list = np.random.randint(share_range[0], share_range[1], size=n)
+    post_shares_list = rng.integers(share_range[0], share_range[1], size=n)
+
+    return pd.DataFrame(
+        {
+            "post_date": dates.take(chunk.start, n),
+            "post_id": chunk.ids(),
+            "post_social_media": post_social_media_list,
+            "post_shares": post_shares_list
+        }
+    )
 
-    # Create the DataFrame
-    data = {
-        "post_date": post_date_list,
-        "post_id": post_id_list,
-        "post_social_media": post_social_media_list,
-        "post_shares": post_shares_list
-    }
 
-    df = pd.DataFrame(data)
+def generate_data(
+    total_rows: int = total_data,
+    output_file: str = output_file,
+    chunk_rows: int = 1_000_000,
+    processes: int = 1,
+    seed: Optional[int] = None,
+):
+    dates = SortedDates(date_ini, date_end, total_rows, np.random.default_rng(seed))
+    df = write_dataset(
+        partial(make_chunk, dates=dates), total_rows, output_file, chunk_rows, processes, seed
+    )
 
     # Display the DataFrame
-    print("\n### Output CSV: " + output_file + " (" + str(len(df)) + " registers)\n")
-    print(df.head(10))
+    print("\n### Output CSV: " + output_file + " (" + str(total_rows) + " registers)\n")
+    print(df)
     print("\n")
 
-    # Save the dataframe to CSV
-    df.to_csv(output_file, index=False)
-
     return df
 
 if __name__ == "__main__":
-    generate_data()
+    args = parse_generator_args(total_data, output_file)
+    generate_data(args.rows, args.output, args.chunk_rows, args.processes, args.seed)
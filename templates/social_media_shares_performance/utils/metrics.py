@@ -0,0 +1,258 @@
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple, Union
+from utils.profiling import profile_stage
+
+
+# Supported filter operators, each one returns a boolean mask for a column
+OPERATORS = {
+    "==": lambda column, value: column == value,
+    "!=": lambda column, value: column != value,
+    ">": lambda column, value: column > value,
+    ">=": lambda column, value: column >= value,
+    "<": lambda column, value: column < value,
+    "<=": lambda column, value: column <= value,
+    "isin": lambda column, value: column.isin(value),
+    "isnull": lambda column, value: column.isnull(),
+    "notnull": lambda column, value: column.notnull(),
+}
+
+MEASURES = ("count", "sum", "mean", "nunique")
+
+
+class Metric:
+    """
+    Declarative definition of a KPI measured over the rows matching its filters.
+
+    Attributes:
+        name (str): Name of the metric, used as key of the computed results.
+        measure (str): One of "count", "sum", "mean" or "nunique".
+        column (str): Column the measure is applied to, not needed for "count".
+        where (list): Filters as (column, operator, value) tuples, all of them must hold.
+            The value can be omitted for the "isnull" and "notnull" operators.
+        window (tuple): (date column, timedelta) keeping only the rows on or after
+            reference_date - timedelta.
+        description (str): Optional description of the metric.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        measure: str = "count",
+        column: Optional[str] = None,
+        where: Optional[List[Tuple]] = None,
+        window: Optional[Tuple[str, timedelta]] = None,
+        description: Optional[str] = None,
+    ):
+        if measure not in MEASURES:
+            raise ValueError(f"Unknown measure '{measure}', expected one of {MEASURES}")
+        if measure != "count" and column is None:
+            raise ValueError(f"Metric '{name}' needs a column for the '{measure}' measure")
+
+        self.name = name
+        self.measure = measure
+        self.column = column
+        self.where = [tuple(condition) for condition in (where or [])]
+        self.window = window
+        self.description = description
+
+    def predicates(self, reference_date: Optional[datetime]) -> List[Tuple]:
+        """
+        Return the normalized (column, operator, value) predicates of the metric.
+
+        Args:
+            reference_date (datetime): Date the time window is anchored to.
+
+        Returns:
+            list: Predicates with the time window translated to a ">=" filter.
+        """
+        predicates = [
+            (condition[0], condition[1], condition[2] if len(condition) > 2 else None)
+            for condition in self.where
+        ]
+        if self.window is not None:
+            if reference_date is None:
+                raise ValueError(f"Metric '{self.name}' has a window, a reference_date is required")
+            column, delta = self.window
+            predicates.append((column, ">=", reference_date - delta))
+
+        return predicates
+
+
+class Derived:
+    """
+    A metric computed from other metrics of the same set, such as ratios or differences.
+
+    Attributes:
+        name (str): Name of the metric, used as key of the computed results.
+        func (Callable): Receives the computed metrics (a dict of values, or a DataFrame
+            when grouping) and returns the value of the derived metric.
+        description (str): Optional description of the metric.
+    """
+
+    def __init__(self, name: str, func: Callable, description: Optional[str] = None):
+        self.name = name
+        self.func = func
+        self.description = description
+
+
+def _predicate_key(predicate: Tuple) -> Hashable:
+    # Lists used with "isin" are not hashable
+    column, operator, value = predicate
+    if isinstance(value, (list, set, np.ndarray, pd.Index, pd.Series)):
+        value = tuple(value)
+    return column, operator, value
+
+
+@profile_stage()
+def compute_metrics(
+    df: pd.DataFrame,
+    metrics: Iterable[Union[Metric, Derived]],
+    by: Optional[Union[str, pd.Series]] = None,
+    groups: Optional[Iterable] = None,
+    reference_date: Optional[datetime] = None,
+) -> Union[Dict[str, Any], pd.DataFrame]:
+    """
+    Compile a set of metrics and evaluate all of them in a single pass over df.
+
+    Every distinct filter is evaluated only once and shared between the metrics
+    that use it. Counts, sums and means are then stacked as columns of one weight
+    matrix that is reduced (or grouped) at once, and distinct counts are resolved
+    over the factorized column codes.
+
+    Args:
+        df (pd.DataFrame): Data the metrics are computed on.
+        metrics (Iterable): Metric and Derived definitions, derived metrics can only
+            refer to metrics defined before them.
+        by (str or pd.Series): Optional column name or Series to group the metrics by.
+        groups (Iterable): Optional groups to report when grouping, missing ones are
+            filled with 0.
+        reference_date (datetime): Date the time windows are anchored to.
+
+    Returns:
+        dict: Metric name to value when by is None.
+        pd.DataFrame: One row per group and one column per metric otherwise.
+    """
+    metrics = list(metrics)
+    n_rows = len(df)
+
+    # Group codes of each row, rows with a null group are discarded
+    if by is None:
+        group_codes = np.zeros(n_rows, dtype=np.int64)
+        group_index = pd.RangeIndex(1)
+    else:
+        keys = df[by] if isinstance(by, str) else by
+        group_codes, group_index = pd.factorize(keys, sort=True)
+    n_groups = len(group_index)
+    valid_group = group_codes >= 0
+
+    # Evaluate each distinct predicate and each distinct conjunction only once
+    predicate_masks = {}
+    conjunction_masks = {}
+
+    def mask_for(metric: Metric) -> np.ndarray:
+        keys = []
+        for predicate in metric.predicates(reference_date):
+            key = _predicate_key(predicate)
+            if key not in predicate_masks:
+                column, operator, value = predicate
+                predicate_masks[key] = np.asarray(
+                    OPERATORS[operator](df[column], value), dtype=bool
+                )
+            keys.append(key)
+
+        conjunction = frozenset(keys)
+        if conjunction not in conjunction_masks:
+            mask = valid_group.copy()
+            for key in conjunction:
+                mask &= predicate_masks[key]
+            conjunction_masks[conjunction] = mask
+        return conjunction_masks[conjunction]
+
+    # Additive measures become columns of a single weight matrix
+    weights = []
+    weight_names = []
+    integer_names = set()
+    factorized_columns = {}
+    distinct_counts = {}
+
+    for metric in metrics:
+        if isinstance(metric, Derived):
+            continue
+        mask = mask_for(metric)
+
+        if metric.measure == "count":
+            weights.append(mask)
+            weight_names.append(metric.name)
+            integer_names.add(metric.name)
+
+        elif metric.measure in ("sum", "mean"):
+            values = df[metric.column].to_numpy()
+            present = ~pd.isnull(values)
+            weights.append(np.where(mask & present, values, 0))
+            weight_names.append(metric.name)
+            if metric.measure == "sum" and (
+                pd.api.types.is_integer_dtype(df[metric.column])
+                or pd.api.types.is_bool_dtype(df[metric.column])
+            ):
+                integer_names.add(metric.name)
+            if metric.measure == "mean":
+                weights.append(mask & present)
+                weight_names.append((metric.name, "count"))
+
+        else:  # nunique
+            if metric.column not in factorized_columns:
+                factorized_columns[metric.column] = pd.factorize(df[metric.column])
+            codes, uniques = factorized_columns[metric.column]
+            n_uniques = max(len(uniques), 1)
+            keep = mask & (codes >= 0)
+            pairs = np.unique(group_codes[keep] * n_uniques + codes[keep])
+            distinct_counts[metric.name] = np.bincount(
+                pairs // n_uniques, minlength=n_groups
+            )
+
+    if weights:
+        matrix = np.column_stack(weights).astype(np.float64)
+        if by is None:
+            totals = matrix.sum(axis=0, keepdims=True)
+        else:
+            totals = (
+                pd.DataFrame(matrix[valid_group])
+                .groupby(group_codes[valid_group])
+                .sum()
+                .reindex(range(n_groups), fill_value=0)
+                .to_numpy()
+            )
+        reduced = dict(zip(weight_names, totals.T))
+    else:
+        reduced = {}
+
+    result = pd.DataFrame(index=group_index)
+    for metric in metrics:
+        if isinstance(metric, Derived):
+            continue
+        if metric.measure == "nunique":
+            result[metric.name] = distinct_counts[metric.name]
+        elif metric.measure == "mean":
+            with np.errstate(invalid="ignore", divide="ignore"):
+                result[metric.name] = reduced[metric.name] / reduced[(metric.name, "count")]
+        elif metric.name in integer_names:
+            result[metric.name] = np.rint(reduced[metric.name]).astype(np.int64)
+        else:
+            result[metric.name] = reduced[metric.name]
+
+    if by is None:
+        values = {name: result[name].iloc[0].item() for name in result.columns}
+        for metric in metrics:
+            if isinstance(metric, Derived):
+                values[metric.name] = metric.func(values)
+        return values
+
+    if groups is not None:
+        result = result.reindex(list(groups), fill_value=0)
+    for metric in metrics:
+        if isinstance(metric, Derived):
+            result[metric.name] = metric.func(result)
+
+    return result
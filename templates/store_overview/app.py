@@ -5,6 +5,8 @@ from shimoku_api_python import Client
 from dotenv import load_dotenv
 
 from board import Board
+from utils.client_metrics import client_metrics
+from utils.profiling import profiler
 
 
 def main():
@@ -24,12 +26,28 @@ def main():
         verbosity="INFO",
         async_execution=True,
     )
+    # Latency and bytes of every client call, written to CLIENT_METRICS_FILE when it is set
+    shimoku = client_metrics.instrument(shimoku)
+    client_metrics.export(getenv("CLIENT_METRICS_FILE"), getenv("CLIENT_METRICS_INTERVAL"))
     shimoku.set_workspace(getenv("WORKSPACE_ID"))
     # Instantiate and set up the dashboard
-    board = Board(shimoku)
+    # Optional relative error to estimate distinct users with sketches
+    sketch_error = getenv("SKETCH_ERROR")
+    # Optional memory budget in MB to process the sales file in chunks
+    max_memory_mb = getenv("MAX_MEMORY_MB")
+    board = Board(
+        shimoku,
+        sketch_error=float(sketch_error) if sketch_error else None,
+        max_memory_mb=float(max_memory_mb) if max_memory_mb else None,
+    )
     board.transform()  # Perform data transformations
     board.plot()  # Plot the dashboard
-    shimoku.run()
+    with profiler.stage("run"):
+        shimoku.run()
+
+    # Time, CPU and memory of each stage, and the trace of the run when TRACE_DIR is set
+    profiler.report(getenv("TRACE_DIR"))
+    client_metrics.report()
 
 
 if __name__ == "__main__":
@@ -1,5 +1,7 @@
+from typing import Optional
 from shimoku_api_python import Client
-from utils.utils import get_data, process_retail_data
+from utils.utils import get_data, process_retail_data, process_retail_data_chunked
+from utils.profiling import profile_stage, profiler
 
 
 class Board:
@@ -7,22 +9,34 @@ class Board:
     A class representing a Retail Overview Dashboard for displaying various data visualizations related to retailers.
     """
 
-    def __init__(self, shimoku: Client):
+    def __init__(
+        self,
+        shimoku: Client,
+        sketch_error: Optional[float] = None,
+        max_memory_mb: Optional[float] = None,
+    ):
         """
         Constructor for the Retail Overview Dashboard class.
 
         Args:
             shimoku (Client): An instance of a Client class for Shimoku API interactions.
+            sketch_error (float, optional): Relative error of the approximate distinct
+                users counts, None to count them exactly.
+            max_memory_mb (float, optional): When given, the sales file is processed in
+                chunks of about this size instead of being loaded at once.
         """
 
-        file_names = ["data/retailer_sales_data.csv"]
+        self.file_names = ["data/retailer_sales_data.csv"]
         self.board_name = "Retailer Template"  # Name of the dashboard
-        self.df = get_data(file_names)
+        self.df = None  # Loaded on transform, unless processed in chunks
         self.shimoku = shimoku  # Shimoku client instance
         self.shimoku.set_board(name=self.board_name)  # Setting up the board in Shimoku
         self.shimoku.boards.update_board(name=self.board_name, is_public=True)
         self.results = None  # Placeholder for storing processed data
+        self.sketch_error = sketch_error
+        self.max_memory_mb = max_memory_mb
 
+    @profile_stage("transform")
     def transform(self):
         """
         Perform data transformations.
@@ -31,16 +45,24 @@ class Board:
         required before plotting the data on the Retail Overview dashboard.
         """
 
-        df = self.df["retailer_sales_data"]
+        if self.max_memory_mb is None:
+            self.df = profiler.call("load", get_data, self.file_names)
+            df = self.df["retailer_sales_data"]
 
-        # Process sales data
-        results_dict = process_retail_data(df)
+            # Process sales data
+            results_dict = process_retail_data(df, sketch_error=self.sketch_error)
+        else:
+            # Process sales data in chunks, peak memory is bounded by max_memory_mb
+            results_dict = process_retail_data_chunked(
+                self.file_names[0], self.max_memory_mb, sketch_error=self.sketch_error
+            )
 
         # Store processed data in results attribute
         self.results = results_dict
 
         return True
 
+    @profile_stage("plot")
     def plot(self):
         """
         Plot the Retail Overview dashboard.
@@ -63,4 +85,5 @@ class Board:
         )
 
         store_overview = RetailerDashboard(self)
+        profiler.instrument(store_overview)
         store_overview.plot()
@@ -1,7 +1,13 @@
-import pandas as pd
-import random
-from datetime import datetime, timedelta
 import numpy as np
+import pandas as pd
+from datetime import datetime
+from functools import partial
+from typing import Optional
+
+try:
+    from synthetic import Chunk, SortedDates, parse_generator_args, uniform_rounded, write_dataset
+except ImportError:  # Imported as data.generate_retailer_sales from the template root
+    from data.synthetic import Chunk, SortedDates, parse_generator_args, uniform_rounded, write_dataset
 
 # Initial Configuration
 total_stores = 6
@@ -13,57 +19,55 @@ total_data = 10000  # Total number of data points to generate
 sales_range = (10.00, 80.00)  # Range for generating random sales values
 
 
-def generate_data() -> pd.DataFrame:
+def make_chunk(chunk: Chunk, dates: SortedDates) -> pd.DataFrame:
     """
-    Generate retailer sales data and save it to a CSV file.
+    Generate the sales of one chunk of the dataset.
+
+    Args:
+        chunk (Chunk): Rows to generate and their random generator.
+        dates (SortedDates): Sale dates of the whole dataset.
 
     Returns:
-        pd.DataFrame: DataFrame containing generated sales data.
+        pd.DataFrame: Sales data of the chunk, sorted by sale_date.
     """
+    rng = chunk.rng
+    return pd.DataFrame(
+        {
+            "sale_id": chunk.ids(),
+            "store_id": rng.integers(1, total_stores + 1, size=chunk.size),
+            "user_id": rng.integers(1, total_users + 1, size=chunk.size),
+            "sale_date": dates.take(chunk.start, chunk.size),
+            "sales_amount": uniform_rounded(rng, sales_range, chunk.size),
+        }
+    )
 
-    def random_date(start_date, end_date):
-        """
-        Generate a random date between two given dates.
-
-        Args:
-            start_date (datetime): Start date.
-            end_date (datetime): End date.
 
-        Returns:
-            datetime: Random date between start_date and end_date.
-        """
-        return start_date + timedelta(
-            days=random.randint(0, (end_date - start_date).days)
-        )
-
-    data = {
-        "sale_id": [],
-        "store_id": [],
-        "user_id": [],
-        "sale_date": [],
-        "sales_amount": [],
-    }
-
-    for i in range(total_data):
-        sale_id = i + 1
-        store_id = np.random.randint(1, total_stores + 1)
-        user_id = np.random.randint(1, total_users + 1)
-        sale_date = random_date(date_ini, date_end)
-        sales_amount = round(random.uniform(*sales_range), 2)
+def generate_data(
+    total_rows: int = total_data,
+    output_file: str = output_file,
+    chunk_rows: int = 1_000_000,
+    processes: int = 1,
+    seed: Optional[int] = None,
+) -> pd.DataFrame:
+    """
+    Generate retailer sales data and save it to a CSV or Parquet file, chunk by chunk.
 
-        data["sale_id"].append(sale_id)
-        data["store_id"].append(store_id)
-        data["user_id"].append(user_id)
-        data["sale_date"].append(sale_date)
-        data["sales_amount"].append(sales_amount)
+    Args:
+        total_rows (int): Number of sales to generate.
+        output_file (str): Output path, '.csv' or '.parquet'.
+        chunk_rows (int): Rows generated at once.
+        processes (int): Number of worker processes.
+        seed (int): Seed for a reproducible dataset.
 
-    df = pd.DataFrame(data)
-    df["sale_date"] = pd.to_datetime(df["sale_date"]).dt.date
-    df.sort_values(by="sale_date", inplace=True)
-    # Save the dataframe to a CSV file
-    df.to_csv(output_file, index=False)
-    return df
+    Returns:
+        pd.DataFrame: The first rows of the generated data.
+    """
+    dates = SortedDates(date_ini, date_end, total_rows, np.random.default_rng(seed))
+    return write_dataset(
+        partial(make_chunk, dates=dates), total_rows, output_file, chunk_rows, processes, seed
+    )
 
 
 if __name__ == "__main__":
-    generate_data()
+    args = parse_generator_args(total_data, output_file, "Generate retailer sales data")
+    generate_data(args.rows, args.output, args.chunk_rows, args.processes, args.seed)
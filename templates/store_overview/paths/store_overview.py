@@ -1,5 +1,6 @@
 from board import Board
 from utils.components import create_title_name_head, format_raw_options
+from utils.downsampling import downsample
 from typing import Dict, Any, List, Union
 
 
@@ -187,6 +188,12 @@ class RetailerDashboard(Board):
         sales_accumulated_by_store = self.df_app["Sales Accumulated by Store"][
             temporality
         ]
+        # Bound the number of points whatever the length of the period
+        sales_accumulated_by_store = downsample(
+            sales_accumulated_by_store,
+            x=temporality,
+            y=[c for c in sales_accumulated_by_store.columns if c != temporality],
+        )
         self.shimoku.plt.line(
             data=sales_accumulated_by_store,
             order=self.order,
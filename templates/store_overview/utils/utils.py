@@ -1,8 +1,14 @@
 import os
-from typing import List, Dict, Union, Any, Optional
+from typing import List, Dict, Union, Any, Optional, Iterator
 from datetime import datetime
 import pandas as pd
 from pandas import DataFrame
+from utils.sketches import SketchTable
+from utils.profiling import profile_stage
+
+
+# Ratio between the memory used while parsing and aggregating a chunk and its final size
+CHUNK_MEMORY_OVERHEAD = 4
 
 
 def format_store_id(number: int) -> str:
@@ -77,7 +83,137 @@ def get_data(file_names: List[str]) -> Dict[str, DataFrame]:
     return dict_dfs
 
 
-def process_retail_data(df: pd.DataFrame) -> Dict[str, Any]:
+def current_period_masks(dates: pd.DatetimeIndex) -> Dict[str, Any]:
+    """
+    Boolean masks of the dates in the current week, month and year.
+
+    Args:
+        dates (pd.DatetimeIndex): Dates to classify.
+
+    Returns:
+        dict: Masks for "Current Week", "Current Month" and "Current Year".
+    """
+    now = datetime.now()
+    in_current_year = dates.year == now.year
+
+    return {
+        "Current Week": (
+            (dates.isocalendar().week == now.isocalendar().week).to_numpy()
+            & (dates.isocalendar().year == now.year).to_numpy()
+        ),
+        "Current Month": (dates.month == now.month) & in_current_year,
+        "Current Year": in_current_year,
+    }
+
+
+def read_csv_in_chunks(
+    file_name: str, max_memory_mb: float, usecols: Optional[List[str]] = None
+) -> Iterator[DataFrame]:
+    """
+    Reads a CSV file in chunks whose size in memory stays around max_memory_mb.
+
+    The number of rows per chunk is derived from the memory used by a sample of the
+    first rows, leaving room for the copies made while parsing and aggregating.
+
+    Args:
+        file_name (str): Path to the CSV file.
+        max_memory_mb (float): Memory budget of each chunk in megabytes.
+        usecols (list of str, optional): Only read these columns.
+
+    Returns:
+        Iterator[DataFrame]: The chunks of the file.
+    """
+    sample = pd.read_csv(file_name, nrows=1000, usecols=usecols)
+    bytes_per_row = max(sample.memory_usage(deep=True).sum() / max(len(sample), 1), 1)
+    chunk_rows = max(int(max_memory_mb * 2**20 / (bytes_per_row * CHUNK_MEMORY_OVERHEAD)), 1)
+
+    return pd.read_csv(file_name, chunksize=chunk_rows, usecols=usecols)
+
+
+def aggregate_retail_chunk(
+    df: pd.DataFrame, sketch_error: Optional[float] = None
+) -> Dict[str, Any]:
+    """
+    Computes the partial aggregates of a chunk of retail sales data.
+
+    Args:
+        df (DataFrame): Sales with 'store_id', 'user_id', 'sale_date' and 'sales_amount' columns.
+        sketch_error (float, optional): When given, distinct users are kept as HyperLogLog
+            sketches per store and day instead of exact sets of users.
+
+    Returns:
+        dict: Partial aggregates, merged with merge_retail_aggregates:
+            - 'Daily Sales': sales amount per store and day.
+            - 'Users': distinct users, None with sketches.
+            - 'Period Users': distinct (store, user) pairs of each current period, None with sketches.
+            - 'User Sketches': SketchTable per store and day, None without sketches.
+    """
+    sale_day = pd.to_datetime(df["sale_date"]).dt.normalize()
+    store_id = "Store " + df["store_id"].astype(str)
+
+    aggregates = {
+        "Daily Sales": df["sales_amount"]
+        .groupby([store_id.rename("store_id"), sale_day.rename("sale_date")])
+        .sum(),
+        "Users": None,
+        "Period Users": None,
+        "User Sketches": None,
+    }
+
+    if sketch_error is not None:
+        aggregates["User Sketches"] = SketchTable.from_frame(
+            pd.DataFrame({"store_id": store_id, "sale_day": sale_day, "user_id": df["user_id"]}),
+            ["store_id", "sale_day"],
+            "user_id",
+            error=sketch_error,
+        )
+    else:
+        store_users = pd.DataFrame({"store_id": store_id, "user_id": df["user_id"]})
+        aggregates["Users"] = pd.Series(df["user_id"].dropna().unique())
+        aggregates["Period Users"] = {
+            period: store_users[mask].drop_duplicates()
+            for period, mask in current_period_masks(pd.DatetimeIndex(sale_day)).items()
+        }
+
+    return aggregates
+
+
+def merge_retail_aggregates(left: Dict[str, Any], right: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Merges the partial aggregates of two chunks of retail sales data.
+
+    Args:
+        left (dict): Partial aggregates returned by aggregate_retail_chunk.
+        right (dict): Partial aggregates returned by aggregate_retail_chunk.
+
+    Returns:
+        dict: Partial aggregates of both chunks.
+    """
+    merged = {
+        "Daily Sales": pd.concat([left["Daily Sales"], right["Daily Sales"]])
+        .groupby(level=["store_id", "sale_date"])
+        .sum(),
+        "Users": None,
+        "Period Users": None,
+        "User Sketches": None,
+    }
+
+    if left["User Sketches"] is not None:
+        merged["User Sketches"] = left["User Sketches"].combine(right["User Sketches"])
+    else:
+        merged["Users"] = pd.Series(pd.concat([left["Users"], right["Users"]]).unique())
+        merged["Period Users"] = {
+            period: pd.concat([users, right["Period Users"][period]]).drop_duplicates()
+            for period, users in left["Period Users"].items()
+        }
+
+    return merged
+
+
+@profile_stage()
+def process_retail_data(
+    df: pd.DataFrame, sketch_error: Optional[float] = None
+) -> Dict[str, Any]:
     """
     Processes retail sales data.
 
@@ -88,48 +224,97 @@ def process_retail_data(df: pd.DataFrame) -> Dict[str, Any]:
             - 'user_id' (str): Unique user identifier.
             - 'sale_date' (datetime): Sale date.
             - 'sales_amount' (float): Sale amount.
+        sketch_error (float, optional): When given, distinct users are estimated with
+            HyperLogLog sketches stored per store and day, with this relative standard
+            error, instead of being counted exactly.
 
     Returns:
         Dict[str, Any]: A dictionary containing KPIs and DataFrames for charts.
     """
-    # Convert 'sale_date' to datetime and set as index
-    df["sale_date"] = pd.to_datetime(df["sale_date"])
-    df["store_id"] = df["store_id"].apply(format_store_id)
-    df.set_index("sale_date", inplace=True)
+    return finalize_retail_aggregates(aggregate_retail_chunk(df, sketch_error))
+
+
+@profile_stage()
+def process_retail_data_chunked(
+    file_name: str, max_memory_mb: float, sketch_error: Optional[float] = None
+) -> Dict[str, Any]:
+    """
+    Processes a retail sales CSV file that may not fit in memory.
+
+    The file is read in chunks of about max_memory_mb, each chunk is reduced to
+    partial aggregates per store and day which are merged as they come, so the
+    peak memory is bounded by the chunk size plus the aggregates. Distinct users
+    are kept as exact sets unless sketch_error is given, use it to also bound them.
+
+    Args:
+        file_name (str): Path to the sales CSV file.
+        max_memory_mb (float): Memory budget of each chunk in megabytes.
+        sketch_error (float, optional): Relative standard error of the distinct users sketches.
+
+    Returns:
+        Dict[str, Any]: The same dictionary returned by process_retail_data.
+    """
+    aggregates = None
+    for chunk in read_csv_in_chunks(
+        file_name, max_memory_mb, usecols=["store_id", "user_id", "sale_date", "sales_amount"]
+    ):
+        chunk_aggregates = aggregate_retail_chunk(chunk, sketch_error)
+        if aggregates is None:
+            aggregates = chunk_aggregates
+        else:
+            aggregates = merge_retail_aggregates(aggregates, chunk_aggregates)
+
+    return finalize_retail_aggregates(aggregates)
+
+
+def finalize_retail_aggregates(aggregates: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Builds the KPIs and DataFrames for charts from the aggregates of all the sales.
+
+    Args:
+        aggregates (dict): Partial aggregates of all the sales.
+
+    Returns:
+        Dict[str, Any]: A dictionary containing KPIs and DataFrames for charts.
+    """
+    # One row per store and day
+    df = aggregates["Daily Sales"].reset_index().set_index("sale_date")
+    user_sketches = aggregates["User Sketches"]
+    if user_sketches is not None:
+        sketch_masks = current_period_masks(pd.DatetimeIndex(user_sketches.keys["sale_day"]))
 
     # Calculate KPIs
     total_stores = df["store_id"].nunique()
     total_sales = df["sales_amount"].sum()
     average_sales_per_store = total_sales / total_stores
-    total_users = df["user_id"].nunique()
+    if user_sketches is None:
+        total_users = len(aggregates["Users"])
+    else:
+        total_users = user_sketches.count()
     average_sales_per_user = total_sales / total_users
 
     # Get unique store_ids from the original DataFrame
     unique_stores = df["store_id"].unique()
-    current_year = datetime.now().year
 
     # Filter for current time periods
-    current_week = df[
-        (df.index.isocalendar().week == datetime.now().isocalendar().week)
-        & (df.index.isocalendar().year == current_year)
-    ].reset_index()
-    current_month = df[
-        (df.index.month == datetime.now().month) & (df.index.year == current_year)
-    ].reset_index()
-    current_year = df[df.index.year == current_year].reset_index()
+    period_masks = current_period_masks(df.index)
+    current_week = df[period_masks["Current Week"]].reset_index()
+    current_month = df[period_masks["Current Month"]].reset_index()
+    current_year = df[period_masks["Current Year"]].reset_index()
 
     # Sales and users by store for the current period
-    sales_users_by_store = {
-        "Current Week": current_week.groupby("store_id")
-        .agg({"sales_amount": "sum", "user_id": "nunique"})
-        .reset_index(),
-        "Current Month": current_month.groupby("store_id")
-        .agg({"sales_amount": "sum", "user_id": "nunique"})
-        .reset_index(),
-        "Current Year": current_year.groupby("store_id")
-        .agg({"sales_amount": "sum", "user_id": "nunique"})
-        .reset_index(),
-    }
+    sales_users_by_store = {}
+    for period, period_df in [
+        ("Current Week", current_week),
+        ("Current Month", current_month),
+        ("Current Year", current_year),
+    ]:
+        by_store = period_df.groupby("store_id").agg({"sales_amount": "sum"})
+        if user_sketches is None:
+            by_store["user_id"] = aggregates["Period Users"][period].groupby("store_id").size()
+        else:
+            by_store["user_id"] = user_sketches.count_by("store_id", sketch_masks[period])
+        sales_users_by_store[period] = by_store.reset_index()
     for key, df in sales_users_by_store.items():
         df.rename(
             columns={"sales_amount": "Sales Amount", "user_id": "Number of Users"},
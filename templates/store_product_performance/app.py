@@ -2,6 +2,8 @@ from os import getenv
 from shimoku_api_python import Client
 from dotenv import load_dotenv
 from board import Board
+from utils.client_metrics import client_metrics
+from utils.profiling import profiler
 
 
 def main():
@@ -21,13 +23,24 @@ def main():
         verbosity="INFO",
         async_execution=True,
     )
+    # Latency and bytes of every client call, written to CLIENT_METRICS_FILE when it is set
+    shimoku = client_metrics.instrument(shimoku)
+    client_metrics.export(getenv("CLIENT_METRICS_FILE"), getenv("CLIENT_METRICS_INTERVAL"))
     shimoku.set_workspace(getenv("WORKSPACE_ID"))
 
+    # Optional memory budget in MB to process the sales file in chunks
+    max_memory_mb = getenv("MAX_MEMORY_MB")
+
     # Instantiate and set up the dashboard
-    board = Board(shimoku)
+    board = Board(shimoku, max_memory_mb=float(max_memory_mb) if max_memory_mb else None)
     board.transform()  # Perform data transformations
     board.plot()  # Plot the dashboard
-    shimoku.run()
+    with profiler.stage("run"):
+        shimoku.run()
+
+    # Time, CPU and memory of each stage, and the trace of the run when TRACE_DIR is set
+    profiler.report(getenv("TRACE_DIR"))
+    client_metrics.report()
 
 
 if __name__ == "__main__":
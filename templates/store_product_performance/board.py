@@ -1,5 +1,7 @@
+from typing import Optional
 from shimoku_api_python import Client
-from utils.utils import get_data, process_retail_data
+from utils.utils import get_data, process_retail_data, process_retail_data_chunked
+from utils.profiling import profile_stage, profiler
 
 
 class Board:
@@ -7,22 +9,26 @@ class Board:
     A class representing a Store Product Dashboard for displaying various data visualizations related to retailers.
     """
 
-    def __init__(self, shimoku: Client):
+    def __init__(self, shimoku: Client, max_memory_mb: Optional[float] = None):
         """
         Constructor for the Store Product Dashboard class.
 
         Args:
             shimoku (Client): An instance of a Client class for Shimoku API interactions.
+            max_memory_mb (float, optional): When given, the sales file is processed in
+                chunks of about this size instead of being loaded at once.
         """
 
-        file_names = ["data/store_product_data.csv"]
+        self.file_names = ["data/store_product_data.csv"]
         self.board_name = "Retail Template"  # Name of the dashboard
-        self.df = get_data(file_names)
+        self.df = None  # Loaded on transform, unless processed in chunks
         self.shimoku = shimoku  # Shimoku client instance
         self.shimoku.set_board(name=self.board_name)  # Setting up the board in Shimoku
         self.shimoku.boards.update_board(name=self.board_name, is_public=True)
         self.results = None  # Placeholder for storing processed data
+        self.max_memory_mb = max_memory_mb
 
+    @profile_stage("transform")
     def transform(self) -> bool:
         """
         Perform data transformations.
@@ -34,16 +40,22 @@ class Board:
             bool: True if data transformation is successful.
         """
 
-        df = self.df["store_product_data"]
+        if self.max_memory_mb is None:
+            self.df = profiler.call("load", get_data, self.file_names)
+            df = self.df["store_product_data"]
 
-        # Process sales data
-        results_dict = process_retail_data(df)
+            # Process sales data
+            results_dict = process_retail_data(df)
+        else:
+            # Process sales data in chunks, peak memory is bounded by max_memory_mb
+            results_dict = process_retail_data_chunked(self.file_names[0], self.max_memory_mb)
 
         # Store processed data in results attribute
         self.results = results_dict
 
         return True
 
+    @profile_stage("plot")
     def plot(self) -> None:
         """
         Plot the Store Product Dashboard.
@@ -64,4 +76,5 @@ class Board:
         from paths.store_product_performance import StoreProductDashboard
 
         store_product = StoreProductDashboard(self)
+        profiler.instrument(store_product)
         store_product.plot()
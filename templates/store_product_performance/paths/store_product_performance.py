@@ -1,5 +1,6 @@
 from board import Board
 from utils.components import create_title_name_head, format_raw_options
+from utils.downsampling import downsample
 from typing import Dict, Any, List, Union
 
 
@@ -213,6 +214,10 @@ class StoreProductDashboard(Board):
             data = self.df_app["Sales Accumulated by Store"][temporality]
             title = "Sales by Store (Accumulated)"
 
+        # Bound the number of points whatever the length of the period
+        data = downsample(
+            data, x=temporality, y=[c for c in data.columns if c != temporality]
+        )
         self.shimoku.plt.line(
             data=data,
             order=self.order,
@@ -0,0 +1,219 @@
+# Copied from templates/shared/profiling.py, edit it there and run templates/shared/vendor.py
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from functools import wraps
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Windows, the peak RSS is not reported
+    resource = None
+
+
+def peak_rss_mb() -> Optional[float]:
+    """
+    Peak resident memory of the process so far in MB, None where it is not available.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Bytes on macOS, kilobytes elsewhere
+    return peak / 1024 ** 2 if sys.platform == "darwin" else peak / 1024
+
+
+def count_rows(result: Any) -> Optional[int]:
+    """
+    Rows of a DataFrame, or of the DataFrames of a dict, None for anything else.
+    """
+    if isinstance(result, (pd.DataFrame, pd.Series)):
+        return len(result)
+    if isinstance(result, dict):
+        frames = [value for value in result.values() if isinstance(value, (pd.DataFrame, pd.Series))]
+        if frames:
+            return sum(len(frame) for frame in frames)
+    return None
+
+
+class Stage:
+    """
+    Measures of one run of a named stage.
+
+    Attributes:
+        name (str): Name of the stage.
+        depth (int): Number of stages it runs inside of.
+        start (float): Seconds since the profiler was created.
+        wall (float): Wall time in seconds.
+        cpu (float): CPU time of the process in seconds.
+        peak_rss_delta_mb (float): Growth of the peak resident memory during the stage.
+        rows (int): Rows loaded or produced, when known.
+    """
+
+    def __init__(self, name: str, depth: int, start: float):
+        self.name = name
+        self.depth = depth
+        self.start = start
+        self.wall = None
+        self.cpu = None
+        self.peak_rss_delta_mb = None
+        self.rows = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "stage": self.name,
+            "depth": self.depth,
+            "start_s": round(self.start, 6),
+            "wall_s": round(self.wall, 6),
+            "cpu_s": round(self.cpu, 6),
+            "peak_rss_delta_mb": None if self.peak_rss_delta_mb is None else round(self.peak_rss_delta_mb, 3),
+            "rows": self.rows,
+        }
+
+
+class StageProfiler:
+    """
+    Records the wall time, CPU time, peak memory growth and rows of named stages,
+    e.g. load, each transform step, each plot_* method and run().
+
+    Stages are recorded with the stage context manager, the profile decorator,
+    call, or instrument for every plot_* method of an object. Stages can be
+    nested. The records are exported as a trace-event JSON file, which can be
+    opened in chrome://tracing or https://ui.perfetto.dev.
+    """
+
+    def __init__(self):
+        self.stages: List[Stage] = []
+        self.created = datetime.now()
+        self._origin = time.perf_counter()
+        self._local = threading.local()
+
+    @contextmanager
+    def stage(self, name: str, rows: Optional[int] = None) -> Iterator[Stage]:
+        """
+        Measures the block as a stage, rows can also be set on the yielded Stage.
+        """
+        depth = getattr(self._local, "depth", 0)
+        record = Stage(name, depth, time.perf_counter() - self._origin)
+        record.rows = rows
+        peak_before = peak_rss_mb()
+        cpu_before = time.process_time()
+        wall_before = time.perf_counter()
+        self._local.depth = depth + 1
+        try:
+            yield record
+        finally:
+            self._local.depth = depth
+            record.wall = time.perf_counter() - wall_before
+            record.cpu = time.process_time() - cpu_before
+            if peak_before is not None:
+                record.peak_rss_delta_mb = peak_rss_mb() - peak_before
+            self.stages.append(record)
+
+    def call(self, name: str, function: Callable, *args, **kwargs) -> Any:
+        """
+        Calls function as a stage, the rows are counted from its result.
+        """
+        with self.stage(name) as record:
+            result = function(*args, **kwargs)
+            record.rows = count_rows(result)
+        return result
+
+    def profile(self, name: Optional[str] = None) -> Callable:
+        """
+        Decorator that records every call of a function as a stage, named after
+        the function unless a name is given.
+        """
+
+        def decorator(function: Callable) -> Callable:
+            @wraps(function)
+            def wrapper(*args, **kwargs):
+                return self.call(name or function.__qualname__, function, *args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def instrument(self, obj: Any, prefix: str = "plot_") -> Any:
+        """
+        Records every method of obj starting with prefix as a stage named
+        'Class.method', also when the methods call each other.
+        """
+        for attribute in dir(type(obj)):
+            method = getattr(obj, attribute)
+            if attribute.startswith(prefix) and callable(method):
+                setattr(obj, attribute, self.profile(f"{type(obj).__name__}.{attribute}")(method))
+        return obj
+
+    def summary(self) -> pd.DataFrame:
+        """
+        One row per recorded stage, in the order they started.
+        """
+        columns = ["stage", "depth", "start_s", "wall_s", "cpu_s", "peak_rss_delta_mb", "rows"]
+        records = sorted(self.stages, key=lambda record: record.start)
+        summary = pd.DataFrame([record.to_dict() for record in records], columns=columns)
+        return summary.astype({"rows": "Int64"})
+
+    def trace_events(self) -> Dict[str, Any]:
+        """
+        Stages as complete ('X') trace events, times in microseconds.
+        """
+        pid = os.getpid()
+        events = [
+            {
+                "name": record.name,
+                "cat": "stage",
+                "ph": "X",
+                "ts": round(record.start * 1e6),
+                "dur": round(record.wall * 1e6),
+                "pid": pid,
+                "tid": 0,
+                "args": {
+                    key: value
+                    for key, value in record.to_dict().items()
+                    if key in ("cpu_s", "peak_rss_delta_mb", "rows")
+                },
+            }
+            for record in self.stages
+        ]
+        return {
+            "traceEvents": events,
+            "displayTimeUnit": "ms",
+            "otherData": {"started": self.created.isoformat()},
+        }
+
+    def write(self, path: str) -> str:
+        """
+        Writes the trace-event JSON file of the run.
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w") as file:
+            json.dump(self.trace_events(), file, indent=1)
+        return path
+
+    def report(self, trace_dir: Optional[str] = None) -> Optional[str]:
+        """
+        Prints the summary of the stages and, when trace_dir is given, writes the
+        trace of the run in it as trace_<start time>.json.
+
+        Returns:
+            str: Path of the trace file, None when not written.
+        """
+        print(self.summary().to_string(index=False))
+        if not trace_dir:
+            return None
+        return self.write(
+            os.path.join(trace_dir, f"trace_{self.created:%Y%m%d_%H%M%S}.json")
+        )
+
+
+# Profiler of the run, shared by the board, its paths and the app
+profiler = StageProfiler()
+profile_stage = profiler.profile
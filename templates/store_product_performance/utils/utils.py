@@ -2,8 +2,13 @@ import pandas as pd
 import random
 from datetime import datetime, timedelta
 import numpy as np
-from typing import Dict, List, Union, Optional
+from typing import Dict, List, Union, Optional, Iterator
 import os
+from utils.profiling import profile_stage
+
+
+# Ratio between the memory used while parsing and aggregating a chunk and its final size
+CHUNK_MEMORY_OVERHEAD = 4
 
 
 def format_store_id(number: int) -> str:
@@ -113,6 +118,103 @@ def get_data(file_names: List[str]) -> Dict[str, pd.DataFrame]:
     return dict_dfs
 
 
+def current_period_masks(dates: pd.DatetimeIndex) -> Dict[str, np.ndarray]:
+    """Boolean masks of the dates in the current week, month and year.
+
+    Args:
+        dates (pd.DatetimeIndex): Dates to classify.
+
+    Returns:
+        dict: Masks for "Current Week", "Current Month" and "Current Year".
+    """
+    now = datetime.now()
+    in_current_year = dates.year == now.year
+
+    return {
+        "Current Week": (
+            (dates.isocalendar().week == now.isocalendar().week).to_numpy()
+            & (dates.isocalendar().year == now.year).to_numpy()
+        ),
+        "Current Month": (dates.month == now.month) & in_current_year,
+        "Current Year": in_current_year,
+    }
+
+
+def read_csv_in_chunks(
+    file_name: str, max_memory_mb: float, usecols: Optional[List[str]] = None
+) -> Iterator[pd.DataFrame]:
+    """Reads a CSV file in chunks whose size in memory stays around max_memory_mb.
+
+    The number of rows per chunk is derived from the memory used by a sample of the
+    first rows, leaving room for the copies made while parsing and aggregating.
+
+    Args:
+        file_name (str): Path to the CSV file.
+        max_memory_mb (float): Memory budget of each chunk in megabytes.
+        usecols (list of str, optional): Only read these columns.
+
+    Returns:
+        Iterator[pd.DataFrame]: The chunks of the file.
+    """
+    sample = pd.read_csv(file_name, nrows=1000, usecols=usecols)
+    bytes_per_row = max(sample.memory_usage(deep=True).sum() / max(len(sample), 1), 1)
+    chunk_rows = max(int(max_memory_mb * 2**20 / (bytes_per_row * CHUNK_MEMORY_OVERHEAD)), 1)
+
+    return pd.read_csv(file_name, chunksize=chunk_rows, usecols=usecols)
+
+
+def aggregate_retail_chunk(df: pd.DataFrame) -> Dict[str, pd.Series]:
+    """Computes the partial aggregates of a chunk of retail sales data.
+
+    Args:
+        df (pd.DataFrame): Sales with 'store_id', 'product_id', 'sale_date' and 'sales_amount' columns.
+
+    Returns:
+        dict: Partial aggregates, merged with merge_retail_aggregates:
+            - 'Daily Sales': sales amount and number of products per store and day.
+            - 'Monthly Product Sales': sales amount per product and month.
+    """
+    sale_date = pd.to_datetime(df["sale_date"])
+    sale_day = sale_date.dt.normalize().rename("sale_date")
+    store_id = ("Store " + df["store_id"].astype(str)).rename("store_id")
+    product_id = ("Product " + df["product_id"].astype(str)).rename("product_id")
+
+    # First day of the month, labelled with the ISO year of the sale
+    sale_month = pd.to_datetime(
+        pd.DataFrame(
+            {"year": sale_date.dt.isocalendar().year, "month": sale_date.dt.month, "day": 1}
+        )
+    ).rename("Fecha1")
+
+    return {
+        "Daily Sales": pd.DataFrame(
+            {"sales_amount": df["sales_amount"], "product_id": df["product_id"].notnull()}
+        )
+        .groupby([store_id, sale_day])
+        .sum(),
+        "Monthly Product Sales": df["sales_amount"].groupby([product_id, sale_month]).sum(),
+    }
+
+
+def merge_retail_aggregates(
+    left: Dict[str, pd.Series], right: Dict[str, pd.Series]
+) -> Dict[str, pd.Series]:
+    """Merges the partial aggregates of two chunks of retail sales data.
+
+    Args:
+        left (dict): Partial aggregates returned by aggregate_retail_chunk.
+        right (dict): Partial aggregates returned by aggregate_retail_chunk.
+
+    Returns:
+        dict: Partial aggregates of both chunks.
+    """
+    return {
+        key: pd.concat([left[key], right[key]]).groupby(level=[0, 1]).sum()
+        for key in left
+    }
+
+
+@profile_stage()
 def process_retail_data(df: pd.DataFrame) -> Dict[str, any]:
     """Processes retail sales data and calculates various Key Performance Indicators (KPIs).
 
@@ -127,44 +229,78 @@ def process_retail_data(df: pd.DataFrame) -> Dict[str, any]:
     Returns:
         dict: A dictionary containing KPIs and DataFrames for charts.
     """
-    # Convert 'sale_date' to datetime and set as index
-    df["sale_date"] = pd.to_datetime(df["sale_date"])
-    df["store_id"] = df["store_id"].apply(format_store_id)
-    df["product_id"] = df["product_id"].apply(format_product_id)
-    df.set_index("sale_date", inplace=True)
+    return finalize_retail_aggregates(aggregate_retail_chunk(df))
+
+
+@profile_stage()
+def process_retail_data_chunked(file_name: str, max_memory_mb: float) -> Dict[str, any]:
+    """Processes a retail sales CSV file that may not fit in memory.
+
+    The file is read in chunks of about max_memory_mb, each chunk is reduced to
+    sums and counts per store and day and per product and month, which are merged
+    as they come, so the peak memory is bounded by the chunk size.
+
+    Args:
+        file_name (str): Path to the sales CSV file.
+        max_memory_mb (float): Memory budget of each chunk in megabytes.
+
+    Returns:
+        dict: The same dictionary returned by process_retail_data.
+    """
+    aggregates = None
+    for chunk in read_csv_in_chunks(
+        file_name, max_memory_mb, usecols=["store_id", "product_id", "sale_date", "sales_amount"]
+    ):
+        chunk_aggregates = aggregate_retail_chunk(chunk)
+        if aggregates is None:
+            aggregates = chunk_aggregates
+        else:
+            aggregates = merge_retail_aggregates(aggregates, chunk_aggregates)
+
+    return finalize_retail_aggregates(aggregates)
+
+
+def finalize_retail_aggregates(aggregates: Dict[str, pd.Series]) -> Dict[str, any]:
+    """Builds the KPIs and DataFrames for charts from the aggregates of all the sales.
+
+    Args:
+        aggregates (dict): Partial aggregates of all the sales.
+
+    Returns:
+        dict: A dictionary containing KPIs and DataFrames for charts.
+    """
+    # One row per store and day, 'product_id' holds the number of products sold
+    df = aggregates["Daily Sales"].reset_index().set_index("sale_date")
+    # One row per product and month
+    monthly_product_sales = aggregates["Monthly Product Sales"].reset_index()
 
     # Calculate KPIs
     total_stores = df["store_id"].nunique()
     total_sales = df["sales_amount"].sum()
     average_sales_per_store = total_sales / total_stores
-    sold_products = df["product_id"].count()
+    sold_products = df["product_id"].sum()
     average_sales_per_user = 1
 
     # Get unique store_ids from the original DataFrame
     unique_stores = df["store_id"].unique()
-    unique_products = df["product_id"].unique()
-    current_year = datetime.now().year
+    unique_products = monthly_product_sales["product_id"].unique()
 
     # Filter for current time periods
-    current_week = df[
-        (df.index.isocalendar().week == datetime.now().isocalendar().week)
-        & (df.index.isocalendar().year == current_year)
-    ].reset_index()
-    current_month = df[
-        (df.index.month == datetime.now().month) & (df.index.year == current_year)
-    ].reset_index()
-    current_year = df[df.index.year == current_year].reset_index()
+    period_masks = current_period_masks(df.index)
+    current_week = df[period_masks["Current Week"]].reset_index()
+    current_month = df[period_masks["Current Month"]].reset_index()
+    current_year = df[period_masks["Current Year"]].reset_index()
 
     # Sales and users by store for the current period
     sales_products_by_store = {
         "Current Week": current_week.groupby("store_id")
-        .agg({"sales_amount": "sum", "product_id": "count"})
+        .agg({"sales_amount": "sum", "product_id": "sum"})
         .reset_index(),
         "Current Month": current_month.groupby("store_id")
-        .agg({"sales_amount": "sum", "product_id": "count"})
+        .agg({"sales_amount": "sum", "product_id": "sum"})
         .reset_index(),
         "Current Year": current_year.groupby("store_id")
-        .agg({"sales_amount": "sum", "product_id": "count"})
+        .agg({"sales_amount": "sum", "product_id": "sum"})
         .reset_index(),
     }
     for key, daf in sales_products_by_store.items():
@@ -249,12 +385,11 @@ def process_retail_data(df: pd.DataFrame) -> Dict[str, any]:
     df_yearly_pivot["month"] = new_values_yearly
     df_yearly_pivot = df_yearly_pivot.rename(columns={"month": "Current Year"})
 
-    all_data = df.reset_index()
     # Sales percentage by store
     sales_product_percentage_by_store = round(
-        all_data.groupby("product_id")["sales_amount"].sum()
+        monthly_product_sales.groupby("product_id")["sales_amount"].sum()
         * 100
-        / all_data["sales_amount"].sum(),
+        / monthly_product_sales["sales_amount"].sum(),
         2,
     ).reset_index()
 
@@ -274,18 +409,7 @@ def process_retail_data(df: pd.DataFrame) -> Dict[str, any]:
         sales_product_percentage_by_store["sales_amount"], 2
     )
 
-    df_all_sorted = all_data.sort_values(by="sale_date").set_index("sale_date")
-    df_all_sorted["month"] = df_all_sorted.index.month
-    df_all_sorted["year"] = df_all_sorted.index.isocalendar().year
-
-    new_values_all = [
-        f"Month {row['month']} of {row['year']}"
-        for index, row in df_all_sorted.iterrows()
-    ]
-    df_all_sorted["Fecha"] = new_values_all
-    df_all_sorted["Fecha1"] = pd.to_datetime(
-        df_all_sorted["Fecha"], format="Month %m of %Y"
-    )
+    df_all_sorted = monthly_product_sales.sort_values(by="Fecha1")
     df_all_pivot = prepare_pivot(
         df_all_sorted,
         "Fecha1",
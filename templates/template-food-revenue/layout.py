@@ -5,8 +5,8 @@ import pandas as pd
 import numpy as np
 from shimoku_api_python import Client
 # Local imports
-from transform import filter_by_origin, human_format
-from utils import origins, get_data
+from transform import OriginIndex, PeriodComparison, human_format
+from utils import origins, get_history
 
 # --- Tabs Configuration ---
 periodpath = "Food"
@@ -28,13 +28,16 @@ origin_tabs_map = {
 period_group = "period_group"
 period_tabs = {
     'WoW': {
-        'tab_index': (period_group, "Week over Week")
+        'tab_index': (period_group, "Week over Week"),
+        'labels': {'current': "CW", 'previous': "SPLW", 'name': "Week", 'last': "Last Week"},
     },
     'MoM': {
-        'tab_index': (period_group, "Month over Month")
+        'tab_index': (period_group, "Month over Month"),
+        'labels': {'current': "CM", 'previous': "SPLM", 'name': "Month", 'last': "Last Month"},
     },
     'YoY': {
-        'tab_index': (period_group, "Year over Year")
+        'tab_index': (period_group, "Year over Year"),
+        'labels': {'current': "CY", 'previous': "SPLY", 'name': "Year", 'last': "Last Year"},
     },
 }
 
@@ -53,36 +56,30 @@ wn = {
 # --- End Tabs Configuration ---
 
 
-def kpis(s: Client, order: int, dfs: dict[str, pd.DataFrame], origin=""):
+def period_tab_group(group: str, period: str) -> str:
     """
-    Indicators
+    Tab groups are repeated in every period tab, WoW keeps the original names
     """
+    return group if period == "WoW" else f"{group}_{period}"
 
-    def calculate_kpis(df: pd.DataFrame):
-        """
-        Calculate values for indicators
-        """
-
-        data: pd.DataFrame = filter_by_origin(df, origin)
-
-        # number of orders
-        orders_kpi = data['order_id'].nunique()
 
-        # revenue made
-        revenue = data['prod_billing'].sum()
+def origin_tabs_index(origin: str, period: str) -> Tuple[str, str]:
+    """
+    Tabs index of an origin inside a period tab
+    """
+    group, label = origin_tabs_map[origin]['tab_index']
+    return period_tab_group(group, period), label
 
-        # How many products were sold
-        prod_sold = data['quantity'].sum()
 
-        return {
-            'orders': orders_kpi,
-            'revenue': revenue,
-            'products_sold': prod_sold,
-        }
+def kpis(s: Client, order: int, index: OriginIndex, origin="all", period="WoW"):
+    """
+    Indicators
+    """
+    labels = period_tabs[period]['labels']
 
-    # Calculate kpis for each week period
-    cw_kpis = calculate_kpis(dfs['cw_data'])
-    lw_kpis = calculate_kpis(dfs['lw_data'])
+    # Orders, revenue and products sold of each week period, already aggregated by origin
+    cw_kpis = index.kpis['cw_data'][origin]
+    lw_kpis = index.kpis['lw_data'][origin]
 
     def plot_indicator(data: dict[str, Any], kpi_name: str, order: int, options=None):
         """
@@ -102,7 +99,7 @@ def kpis(s: Client, order: int, dfs: dict[str, pd.DataFrame], origin=""):
             'value': human_format(cw_kpi),
             'icon': '',
             'bigIcon': '',
-            'description': f"CW {human_format(cw_kpi)} - SPLW {human_format(lw_kpi)}"
+            'description': f"{labels['current']} {human_format(cw_kpi)} - {labels['previous']} {human_format(lw_kpi)}"
         }
 
         if kpi_diff < 0:
@@ -126,8 +123,11 @@ def kpis(s: Client, order: int, dfs: dict[str, pd.DataFrame], origin=""):
 
     next_order = order
 
-    # Current week
-    title = "CW - Current Week status Vs SPLW - Same Period Last Week"
+    # Current period
+    title = (
+        f"{labels['current']} - Current {labels['name']} status Vs "
+        f"{labels['previous']} - Same Period {labels['last']}"
+    )
 
     s.plt.html(
         order=next_order, cols_size=12,
@@ -165,7 +165,7 @@ def kpis(s: Client, order: int, dfs: dict[str, pd.DataFrame], origin=""):
 
 
 def stacked_bar_sales(
-    s: Client, order: int, dfs: dict[str, pd.DataFrame],
+    s: Client, order: int, index: OriginIndex,
     origins: list[str], parent_tabs_index: tuple[str, str]
 ):
     """
@@ -183,14 +183,9 @@ def stacked_bar_sales(
 
         dfsname = wn[period]['dfsname']
 
-        data = filter_by_origin(dfs[dfsname], origin)
-
-        grouped_data = data.groupby('date', as_index=False)['prod_billing'].sum()
-
         # Rename columns
-        grouped_data.rename(
+        grouped_data = index.revenue_by_date[dfsname][origin].rename(
             columns={'prod_billing': wn[period]['colname']},
-            inplace=True
         )
 
         return grouped_data
@@ -200,20 +195,21 @@ def stacked_bar_sales(
         Plots the stacked bar chart
         """
 
-        # Build data
+        revenues = {
+            origin: get_stack_data(origin, week)
+            for origin in origins
+        }
+
+        # Build data, every origin has a row for each day of the week
         basedfs = pd.DataFrame(data={
-            'Day': ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday'],
+            'Day': pd.to_datetime(revenues[origins[0]]['date']).dt.day_name(),
         })
 
         week_colname = wn[week]['colname']
-        for origin in origins:
-            revenue = get_stack_data(
-                origin,
-                week,
-            )
+        for origin, revenue in revenues.items():
             # Add revenue by origin
             pt_colname = origin_tabs_map[origin]['tab_index'][1]
-            basedfs[pt_colname] = revenue[week_colname]
+            basedfs[pt_colname] = revenue[week_colname].to_numpy()
 
         # Fill in with 0 NAN values
         basedfs.fillna(0, inplace=True)
@@ -243,26 +239,17 @@ def stacked_bar_sales(
     return order + 1
 
 
-def product_type_table(s: Client, order: int, dfs: dict[str, pd.DataFrame], origin: str) -> int:
+def product_type_table(s: Client, order: int, index: OriginIndex, origin: str, period="WoW") -> int:
     """
     The table shows the revenue
     """
+    labels = period_tabs[period]['labels']
     def get_products_data(column: str, rn_cols: dict[str, str]):
         """
         """
-        aggregations = {
-            'revenue': ('prod_billing', 'sum'),
-            'quantity': ('quantity', "sum"),
-            'origin': ('origin','first'),
-        }
-
-        filter_by_origin(dfs['cw_data'], origin)
-        cw_revenue = filter_by_origin(dfs['cw_data'], origin).groupby(column, as_index=False).agg(
-            **aggregations,
-        )
-        lw_revenue = filter_by_origin(dfs['lw_data'], origin).groupby(column, as_index=False).agg(
-            **aggregations
-        )
+        # Revenue, quantity and first origin of each product, already aggregated by origin
+        cw_revenue = index.products['cw_data'][origin].rename(columns={'prod_billing': 'revenue'})
+        lw_revenue = index.products['lw_data'][origin].rename(columns={'prod_billing': 'revenue'})
         pt_table_plan = pd.merge(cw_revenue,lw_revenue, on=[column, 'origin'], how="outer")
 
         pt_table_plan.fillna(0, inplace=True)
@@ -305,10 +292,10 @@ def product_type_table(s: Client, order: int, dfs: dict[str, pd.DataFrame], orig
         # Make columns names more readable for plotting
         pt_table_plan.rename(
             columns={
-                'revenue_x':'Revenue CW (€)',
-                'quantity_x': 'Quantity CW',
-                'revenue_y': 'Revenue SPLW (€)',
-                'quantity_y': 'Quantity SPLW',
+                'revenue_x': f"Revenue {labels['current']} (€)",
+                'quantity_x': f"Quantity {labels['current']}",
+                'revenue_y': f"Revenue {labels['previous']} (€)",
+                'quantity_y': f"Quantity {labels['previous']}",
                 'origin': 'Origin',
                  **rn_cols,
             },
@@ -321,12 +308,15 @@ def product_type_table(s: Client, order: int, dfs: dict[str, pd.DataFrame], orig
     )
 
     # Reorder columns
-    table = table[['Product', 'Revenue SPLW (€)', 'Revenue CW (€)', 'Rev Growth', 'Rev Change', 'Quantity SPLW', 'Quantity CW', 'Qty Growth', 'Qty Change', 'Origin']]
+    table = table[[
+        'Product', f"Revenue {labels['previous']} (€)", f"Revenue {labels['current']} (€)", 'Rev Growth', 'Rev Change',
+        f"Quantity {labels['previous']}", f"Quantity {labels['current']}", 'Qty Growth', 'Qty Change', 'Origin'
+    ]]
 
     s.plt.html(
         order=order,
         html=s.html_components.panel(
-            text="Compare the last two weeks, see which products grew in revenue",
+            text=f"Compare the last two {labels['name'].lower()}s, see which products grew in revenue",
             href=""
         )
     )
@@ -353,8 +343,8 @@ def product_type_table(s: Client, order: int, dfs: dict[str, pd.DataFrame], orig
 
 
 def top_ten_winners(
-    s: Client, order: int, dfs: dict[str, pd.DataFrame],
-    origin: str
+    s: Client, order: int, index: OriginIndex,
+    origin: str, period="WoW"
 ) -> int:
     """
     Top 10 Product Winners WoW & Top 10 Product Losers WoW
@@ -363,19 +353,20 @@ def top_ten_winners(
     compared to last week
     """
 
-    top_ten_tabgroup = f"top_ten_tabgroup_{origin}"
-    tabs_index = origin_tabs_map[origin]['tab_index']
+    labels = period_tabs[period]['labels']
+    top_ten_tabgroup = period_tab_group(f"top_ten_tabgroup_{origin}", period)
+    tabs_index = origin_tabs_index(origin, period)
     menupath = periodpath
 
     def plot_chart(agg_col: str, tab: str, order: int):
-        def group_rev(df: pd.DataFrame):
+        def group_rev(dfsname: str):
             """
-            Filters data by origin, then groups and sums the products by revenue or quantity
+            Revenue or quantity of the products of the origin
             """
-            return filter_by_origin(df, origin).groupby('product_name', as_index=False).agg({agg_col: "sum"})
+            return index.products[dfsname][origin][['product_name', agg_col]]
 
-        cw_rev = group_rev(dfs['cw_data'])
-        lw_rev = group_rev(dfs['lw_data'])
+        cw_rev = group_rev('cw_data')
+        lw_rev = group_rev('lw_data')
 
         # Join tables, to compare revenues over cw & lw
         df = pd.merge(cw_rev, lw_rev, on='product_name', how='outer')
@@ -535,7 +526,7 @@ def top_ten_winners(
     s.plt.set_tabs_index(tabs_index)
     s.plt.html(
         html=s.html_components.panel(
-            text="Products that didn't sold this current week, are not shown.",
+            text=f"Products that didn't sold this current {labels['name'].lower()}, are not shown.",
             symbol_name="info",
             href="",
         ), order=order,
@@ -556,9 +547,9 @@ def plot_dashboard(s: Client):
     """
     Main function, plots the dashboard
     """
-    # Get the two dataframes we will be working
-    # cw_data, lw_data
-    dfs = get_data()
+    # Compare the current and previous week, month and year
+    # from the daily history, every period ends the same day
+    comparisons = PeriodComparison(get_history(), origins).compare()
 
     # Get origins including the special 'all'
     all_origins = ['all'] + origins
@@ -567,34 +558,25 @@ def plot_dashboard(s: Client):
     s.plt.clear_menu_path()
     for period in period_tabs.keys():
         period_tab_index = period_tabs[period]['tab_index']
-        s.plt.set_tabs_index(period_tabs[period]['tab_index'], order=0)
-
-        if period != "WoW":
-            # dummy stuff, so the other tabs are visible
-            s.plt.html(
-                order=1,
-                html=s.html_components.panel(
-                    text=f"{period_tab_index[1]}",
-                    href="",
-                )
-            )
-        if period == "WoW":
-            for origin in all_origins:
-                tabs_index = origin_tabs_map[origin]['tab_index']
-                s.plt.set_tabs_index(tabs_index, order=2, parent_tabs_index=period_tabs[period]['tab_index'],
-                                     sticky=False, just_labels=True)
-                order = kpis(s, 1, dfs, origin)
-                # Only plot the stacked bar chart in all tab
-                if origin == "all":
-                    s.plt.html(
-                        order=order,
-                        html=s.html_components.panel(
-                            text="Revenue Week Over Week",
-                            href="",
-                        )
+        s.plt.set_tabs_index(period_tab_index, order=0)
+        index = comparisons[period]
+
+        for origin in all_origins:
+            tabs_index = origin_tabs_index(origin, period)
+            s.plt.set_tabs_index(tabs_index, order=2, parent_tabs_index=period_tab_index,
+                                 sticky=False, just_labels=True)
+            order = kpis(s, 1, index, origin, period)
+            # Only plot the stacked bar chart in the all tab of the week comparison
+            if origin == "all" and period == "WoW":
+                s.plt.html(
+                    order=order,
+                    html=s.html_components.panel(
+                        text="Revenue Week Over Week",
+                        href="",
                     )
-                    stacked_bar_sales(s, order+1, dfs, origins, tabs_index)
+                )
+                stacked_bar_sales(s, order+1, index, origins, tabs_index)
 
-                order = top_ten_winners(s, order+2, dfs, origin)
+            order = top_ten_winners(s, order+2, index, origin, period)
 
-                product_type_table(s, order, dfs, origin)
+            product_type_table(s, order, index, origin, period)
@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 
 def human_format(num):
@@ -14,18 +15,172 @@ def human_format(num):
         num /= 1000.0
     return '{}{}'.format('{:f}'.format(num).rstrip('0').rstrip('.'), ['', 'K', 'M', 'B', 'T'][magnitude])
 
-def filter_by_origin(data: pd.DataFrame, origin=""):
+
+class OriginIndex:
     """
-    Filter by origin
-    - origin: web, app_mobile, store, all
+    Aggregates of the current and previous period of every origin
+
+    KPIs, revenue by date and product totals of each period, keyed by
+    the period ('cw_data', 'lw_data') and then by origin, as computed
+    by PeriodComparison. The special origin 'all' holds the aggregates
+    of every origin together.
+
+    - origins: origins of the aggregates, 'all' is always added
+    - kpis: {period: {origin: {'orders', 'revenue', 'products_sold'}}}
+    - revenue_by_date: {period: {origin: df of date and prod_billing}}
+    - products: {period: {origin: df of product_name, prod_billing, quantity and origin}}
     """
 
-    if origin == "web":
-        return data.query(f"origin == 'web'")
-    if origin == "app_mobile":
-        return data.query(f"origin == 'app_mobile'")
-    if origin == "store":
-        return data.query(f"origin == 'store'")
+    def __init__(self, origins: list[str], kpis: dict, revenue_by_date: dict, products: dict):
+        self.origins = ['all'] + [origin for origin in origins if origin != 'all']
+        self.kpis = kpis
+        self.revenue_by_date = revenue_by_date
+        self.products = products
+
+
+class PeriodComparison:
+    """
+    Current vs previous period comparisons from the daily history
+
+    The daily revenue and quantity by origin and product, and the
+    daily orders by origin, are laid out in day x origin (x product)
+    arrays and accumulated over the days once. The sum of any window
+    is then the difference of two rows of the cumulative sums, so the
+    Week, Month and Year over Year comparisons cost the same and none
+    of them reads the history again.
+
+    - history: {'products': df, 'orders': df} as made by utils.aggregate_daily
+    - origins: origins to compare, 'all' is always added
+    """
+
+    offsets = {
+        'WoW': pd.DateOffset(weeks=1),
+        'MoM': pd.DateOffset(months=1),
+        'YoY': pd.DateOffset(years=1),
+    }
+
+    def __init__(self, history: dict[str, pd.DataFrame], origins: list[str]):
+        products = history['products']
+        orders = history['orders']
+        self.origins = [origin for origin in origins if origin != 'all']
+
+        dates = pd.to_datetime(pd.concat([products['date'], orders['date']]))
+        self.dates = pd.date_range(dates.min(), dates.max())
+        self.product_names = np.sort(products['product_name'].unique())
+
+        # Row 0 stays empty, so the sum of the days [i, j) is cumulative[j] - cumulative[i]
+        shape = (len(self.dates) + 1, len(self.origins))
+        day, origin = self._positions(products)
+        product = np.searchsorted(self.product_names, products['product_name'].to_numpy())
+        known = origin >= 0
+        self._cumulative = {}
+        for metric in ('prod_billing', 'quantity'):
+            daily = np.zeros(shape + (len(self.product_names),))
+            np.add.at(
+                daily, (day[known], origin[known], product[known]),
+                products[metric].to_numpy()[known],
+            )
+            if metric == 'prod_billing':
+                self._daily_revenue = daily[1:].sum(axis=2)
+            self._cumulative[metric] = daily.cumsum(axis=0)
+
+        day, origin = self._positions(orders)
+        known = origin >= 0
+        daily = np.zeros(shape)
+        np.add.at(daily, (day[known], origin[known]), orders['orders'].to_numpy()[known])
+        self._cumulative['orders'] = daily.cumsum(axis=0)
+
+    def _positions(self, df: pd.DataFrame) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Row of the cumulative sums and origin position of each history row,
+        -1 for origins that are not compared
+        """
+        day = (pd.to_datetime(df['date']) - self.dates[0]).dt.days.to_numpy() + 1
+        origin = pd.Index(self.origins).get_indexer(df['origin'])
+        return day, origin
+
+    def _rows(self, start: pd.Timestamp, end: pd.Timestamp) -> tuple[int, int]:
+        """
+        Cumulative rows of the days after start up to end, clipped to the history
+        """
+        rows = len(self.dates)
+        return (
+            int(np.clip((start - self.dates[0]).days + 1, 0, rows)),
+            int(np.clip((end - self.dates[0]).days + 1, 0, rows)),
+        )
+
+    def _product_origins(self, start: pd.Timestamp, end: pd.Timestamp) -> np.ndarray:
+        """
+        Origin where each product made the most revenue in the days after start up to end
+        """
+        i, j = self._rows(start, end)
+        revenue = self._cumulative['prod_billing'][j] - self._cumulative['prod_billing'][i]
+        return np.array(self.origins)[revenue.argmax(axis=0)]
+
+    def _aggregates(self, start: pd.Timestamp, end: pd.Timestamp, product_origins: np.ndarray) -> dict[str, dict]:
+        """
+        KPIs, revenue by date and product totals of every origin in the days after start up to end,
+        the products of all origins are labelled with product_origins
+        """
+        i, j = self._rows(start, end)
+        revenue = self._cumulative['prod_billing'][j] - self._cumulative['prod_billing'][i]
+        quantity = self._cumulative['quantity'][j] - self._cumulative['quantity'][i]
+        orders = self._cumulative['orders'][j] - self._cumulative['orders'][i]
+        daily_revenue = self._daily_revenue[i:j]
+        dates = self.dates[i:j]
+
+        def origin_products(revenue: np.ndarray, quantity: np.ndarray, origin) -> pd.DataFrame:
+            sold = quantity > 0
+            return pd.DataFrame(data={
+                'product_name': self.product_names[sold],
+                'prod_billing': revenue[sold],
+                'quantity': quantity[sold].astype(np.int64),
+                'origin': origin[sold] if isinstance(origin, np.ndarray) else origin,
+            })
+
+        kpis = {
+            'all': {
+                'orders': int(orders.sum()),
+                'revenue': float(revenue.sum()),
+                'products_sold': int(quantity.sum()),
+            }
+        }
+        revenue_by_date = {'all': pd.DataFrame(data={'date': dates, 'prod_billing': daily_revenue.sum(axis=1)})}
+        products = {'all': origin_products(revenue.sum(axis=0), quantity.sum(axis=0), product_origins)}
+        for position, origin in enumerate(self.origins):
+            kpis[origin] = {
+                'orders': int(orders[position]),
+                'revenue': float(revenue[position].sum()),
+                'products_sold': int(quantity[position].sum()),
+            }
+            revenue_by_date[origin] = pd.DataFrame(data={'date': dates, 'prod_billing': daily_revenue[:, position]})
+            products[origin] = origin_products(revenue[position], quantity[position], origin)
+
+        return {'kpis': kpis, 'revenue_by_date': revenue_by_date, 'products': products}
+
+    def window(self, period: str, end=None) -> OriginIndex:
+        """
+        Current period, ending at end (last day of the history by default),
+        vs the same period before it, as 'cw_data' and 'lw_data'
+        - period: WoW, MoM, YoY
+        """
+        end = self.dates[-1] if end is None else pd.Timestamp(end).normalize()
+        offset = self.offsets[period]
+        # Products of all origins get one label for both periods, the origin where they made
+        # the most revenue in the two, so each product is a single row of the comparison
+        product_origins = self._product_origins(end - offset * 2, end)
+        current = self._aggregates(end - offset, end, product_origins)
+        previous = self._aggregates(end - offset * 2, end - offset, product_origins)
+        return OriginIndex(
+            self.origins,
+            **{
+                name: {'cw_data': current[name], 'lw_data': previous[name]}
+                for name in ('kpis', 'revenue_by_date', 'products')
+            },
+        )
 
-    # origin == all
-    return data
+    def compare(self, end=None) -> dict[str, OriginIndex]:
+        """
+        Comparisons of every period, ending at the same day
+        """
+        return {period: self.window(period, end) for period in self.offsets}
@@ -1,6 +1,6 @@
+import os
 import pandas as pd
 import numpy as np
-import datetime
 
 # Constants
 origins = ['web', 'app_mobile', 'store']
@@ -11,82 +11,84 @@ product_names = ["Cheeseburger", "Fried Chicken", "Pasta Carbonara", "Caesar Sal
                  "Beef Tacos", "Vegetable Stir Fry", "Spinach and Ricotta Ravioli", "Cobb Salad", "Chicken Caesar Wrap",
                  "Seafood Paella", "Pad Thai", "Chicken Katsu Curry", "Spicy Tuna Roll", "Sushi Platter"]
 
-# Constant importable objects
-def get_data():
+# Daily history by origin and product, see aggregate_daily
+history_files = {
+    'products': 'data/daily_products.csv',
+    'orders': 'data/daily_orders.csv',
+}
+
+def get_history():
     """
-    Reads csv in the data/ folder
+    Reads the daily history in the data/ folder, it is generated the first time
     """
-
-    cw_data = pd.read_csv('data/cw_data.csv')
-    lw_data = pd.read_csv('data/lw_data.csv')
+    if not all(os.path.exists(path) for path in history_files.values()):
+        generate_history()
     return {
-        # Current week data
-        'cw_data': cw_data,
-        # Last week data
-        'lw_data': lw_data
+        name: pd.read_csv(path, parse_dates=['date'])
+        for name, path in history_files.items()
     }
 
-# Data generation
-def gen_df(date_range, origins: list[str], product_names: list[str]):
-    """
-    Generates a Dataframe with random data
+# Daily history
+def aggregate_daily(orders: pd.DataFrame):
     """
-    rng = np.random.default_rng() # Numpy random value generator
-
-    df_size = 400 # Dataframe row size
-
-    order_ids = list(range(df_size))
-    order_choice = rng.choice(order_ids, size=df_size)
+    Aggregates order lines into the daily history
+    - products: revenue and quantity by date, origin and product
+    - orders: distinct orders by date and origin
 
-    dates = rng.choice(date_range, size=df_size)
+    An order has a single date and origin, so the orders of any
+    window of days are the sum of its daily orders
+    """
+    lines = orders.assign(date=pd.to_datetime(orders['date']).dt.normalize())
+    return {
+        'products': lines.groupby(['date', 'origin', 'product_name'], as_index=False).agg(
+            prod_billing=('prod_billing', 'sum'),
+            quantity=('quantity', 'sum'),
+        ),
+        'orders': lines.groupby(['date', 'origin'], as_index=False).agg(
+            orders=('order_id', 'nunique'),
+        ),
+    }
 
-    # Generate random values for the columns prod_billing and quantity
-    prod_billing = rng.uniform(low=1, high=50, size=df_size)
-    quantity = rng.integers(low=1, high=6, size=df_size)
+def update_history(history: dict[str, pd.DataFrame], orders: pd.DataFrame):
+    """
+    Adds new order lines to the daily history
+    """
+    new = aggregate_daily(orders)
+    keys = {'products': ['date', 'origin', 'product_name'], 'orders': ['date', 'origin']}
+    return {
+        name: pd.concat([history[name], new[name]]).groupby(keys[name], as_index=False).sum()
+        for name in keys
+    }
 
-    # Make a permutated list of origings
-    origin = rng.choice(origins, size=df_size)
-    product_name = rng.choice(product_names, size=df_size)
+def gen_orders(date_range, origins: list[str], product_names: list[str], orders_per_day=40):
+    """
+    Generates order lines with random data, each order has
+    a single date and origin and one to four products
+    """
+    rng = np.random.default_rng() # Numpy random value generator
 
-    # Craft the dataframe by date range
-    df = pd.DataFrame(data={
-        'date': dates,
-        'order_id': order_choice,
-        'prod_billing': prod_billing,
-        'quantity': quantity,
-        'origin': origin,
-        'product_name': product_name
+    n_orders = orders_per_day * len(date_range)
+    lines = rng.integers(low=1, high=5, size=n_orders)
+    df_size = lines.sum()
+
+    return pd.DataFrame(data={
+        'date': np.repeat(rng.choice(date_range, size=n_orders), lines),
+        'order_id': np.repeat(np.arange(n_orders), lines),
+        'prod_billing': rng.uniform(low=1, high=50, size=df_size),
+        'quantity': rng.integers(low=1, high=6, size=df_size),
+        'origin': np.repeat(rng.choice(origins, size=n_orders), lines),
+        'product_name': rng.choice(product_names, size=df_size),
     })
 
-    return df
-
-def generate_dfs():
+def generate_history(days=2 * 366):
     """
-    Generates two dataframes for two time periods, current week (cw)
-    and last week (lw) an saves them to data/ folder as .csv files
+    Generates the daily history of the last days, up to yesterday,
+    and saves it to the data/ folder as .csv files
     """
-    # --- Calculate week start date for cw and lw ---
-
-    # Start with last week (lw)
-    lastweek_dtref = datetime.datetime.now() - datetime.timedelta(weeks=2)
-
-    # Shift back lw to monday (start of the week)
-    lastweek_start = lastweek_dtref - datetime.timedelta(days=lastweek_dtref.weekday())
-
-    # Advance one week to get the start of the current week (cw)
-    currentweek_start = lastweek_start + datetime.timedelta(weeks=1)
-
-    # --- End week calculate week ---
-
-    # Generate days of the week for cw and lw
-    cw_range = pd.date_range(start=lastweek_start.date(), periods=7)
-    lw_range = pd.date_range(start=currentweek_start.date(), periods=7)
-
-    # Generate dataframes
-    cw_data = gen_df(cw_range, origins, product_names)
-    lw_data = gen_df(lw_range, origins, product_names)
-
-    # Save dataframes to data/ folder
-    cw_data.to_csv('data/cw_data.csv', index=False)
-    lw_data.to_csv('data/lw_data.csv', index=False)
+    end = pd.Timestamp.now().normalize() - pd.Timedelta(days=1)
+    date_range = pd.date_range(end=end, periods=days)
 
+    history = aggregate_daily(gen_orders(date_range, origins, product_names))
+    for name, path in history_files.items():
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        history[name].to_csv(path, index=False)